@@ -3,60 +3,204 @@ import os
 import io
 import time
 import json
+import re
 import random
-from datetime import datetime
-import google.generativeai as genai
-from flask import Flask, request, jsonify, session, send_file
+import secrets
+import copy
+import uuid
+from flask import Flask, Blueprint, Response, current_app, request, jsonify, session, send_file, g
 from flask_cors import CORS
 from dotenv import load_dotenv
-from weasyprint import HTML
 
 from question_router import QuestionRouter
 from evaluator import Evaluator
-from utils import get_available_topics
+from semantic_scorer import SemanticScorer
+from llm_client import get_client
+from response_cache import ResponseCache
+from assist_store import AssistStore
+from prompts import get_persona_prompt, build_hint_prompt, build_explanation_prompt
+from tag_index import normalize_tag
+from question_bank import Bitset
+from scheduler import AdaptiveScheduler, new_state
+from session_store import CompactSessionInterface, create_session_store_from_env
+from progress_store import PROGRESS_TTL, create_progress_store_from_env
+from report_renderer import ReportQueue
+from prefetch import Prefetcher, WarmPool
+import metrics
 
 # --- SETUP AND INITIALIZATION ---
-load_dotenv(dotenv_path="../.env")
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'a-super-secret-key-that-should-be-changed'
-CORS(app, origins="http://127.0.0.1:5500", supports_credentials=True)
-question_router = QuestionRouter('../data/questions') 
-evaluator = Evaluator()
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+load_dotenv(dotenv_path=os.path.join(ROOT_DIR, '.env'))
 
-# --- HELPER FUNCTIONS ---
+CUSTOM_INTERVIEW_SIZE = 5
+MAX_JD_SKILLS = 7      # skills a custom interview is built from
+MIN_LOCAL_SKILLS = 3   # skills found in the bank's vocabulary before Gemini is not asked for more
+JD_PROMPT_CHARS = 4000 # job description characters sent to Gemini when it is asked
+DYNAMIC_BATCH_DEADLINE = 15.0  # seconds for all dynamic questions of one custom interview
+DYNAMIC_BATCH_ATTEMPTS = 2     # batched LLM requests allowed before returning partial results
+REPORT_WAIT_TIMEOUT = 60.0     # seconds /generate-report waits for its job before answering 202
+PREFETCH_WAIT = 20.0  # seconds a request waits for prefetched work that is still running
+WARM_THRESHOLD = 3    # unasked bank questions left in a topic when its dynamic questions start warming up
+PROGRESS_COOKIE = 'mockview_user'
+TOPIC_STATE = ('topic', 'asked', 'schedule', 'bank_version')  # session keys a topic session's next pick reads and updates
+
+def default_config():
+    """Settings from the environment, with every path made absolute so the app can be started from any directory."""
+    cache_dir = os.path.join(BACKEND_DIR, 'cache')
+    band = os.getenv("MOCKVIEW_ESCALATION_BAND", "30,80")
+    return {
+        "SECRET_KEY": 'a-super-secret-key-that-should-be-changed',
+        "CORS_ORIGINS": "http://127.0.0.1:5500",
+        "QUESTIONS_DIR": os.path.join(ROOT_DIR, 'data', 'questions'),
+        # Topics compiled with notebooks/compile_bank.py are memory-mapped; the rest are parsed from JSON.
+        "COMPILED_BANK": os.path.abspath(os.getenv("MOCKVIEW_COMPILED_BANK", os.path.join(ROOT_DIR, 'data', 'questions.bank'))),
+        "ASSISTS_PATH": os.path.join(ROOT_DIR, 'data', 'assists', 'assists.jsonl'),
+        "CACHE_PATH": os.path.abspath(os.getenv("MOCKVIEW_CACHE_PATH", os.path.join(cache_dir, 'responses.sqlite3'))),
+        "SESSION_PATH": os.path.join(cache_dir, 'sessions.sqlite3'),    # unless MOCKVIEW_SESSION_URL is set
+        "PROGRESS_PATH": os.path.join(cache_dir, 'progress.sqlite3'),  # unless MOCKVIEW_PROGRESS_URL is set
+        "PROFILE_DIR": os.path.join(cache_dir, 'profiles'),
+        "ESCALATION_BAND": tuple(int(x) for x in band.split(',')) if band != 'off' else None,
+        "RELOAD_INTERVAL": float(os.getenv("MOCKVIEW_RELOAD_INTERVAL", "2")),  # seconds between checks; 0 disables
+        "REPORT_WORKERS": int(os.getenv("MOCKVIEW_REPORT_WORKERS", 2)),
+        "PREFETCH_WORKERS": int(os.getenv("MOCKVIEW_PREFETCH_WORKERS", 4)),
+        "PREFETCH_HINTS": os.getenv("MOCKVIEW_PREFETCH_HINTS", "0") == "1",
+        "WARM_POOL_SIZE": int(os.getenv("MOCKVIEW_WARM_POOL_SIZE", 2)),
+        "SLOW_REQUEST_MS": float(os.getenv("MOCKVIEW_SLOW_REQUEST_MS", "1000")) or None,
+        "PROFILE_RATE": float(os.getenv("MOCKVIEW_PROFILE_RATE", "0")),
+    }
+
+def _fit_local_scorers(evaluator, snapshot):
+    """
+    Local scorers learn IDF weights and pre-tokenize model answers from the whole bank.
+    A compiled bank carries the IDF statistics, so startup does not touch every question.
+    """
+    if snapshot.compiled is not None and snapshot.compiled.scorer_statistics:
+        evaluator.semantic_scorer.load_statistics(snapshot.compiled.scorer_statistics)
+        return
+    answers = [q['answer'] for q in snapshot.bank.questions()]
+    scorer = SemanticScorer()
+    scorer.fit(answers)
+    evaluator.semantic_scorer.load_statistics(scorer.statistics())
+    evaluator.keyword_scorer.preload(answers)
 
-def _get_persona_prompt(persona: str):
-    """NEW: Returns the system prompt instruction based on the selected persona."""
-    if persona == 'Friendly':
-        return "You are an AI assistant acting as a friendly and encouraging teammate. Your tone should be collaborative and positive."
-    elif persona == 'Strict':
-        return "You are an AI assistant acting as a strict, direct senior engineer. You value accuracy and conciseness. Your response should be technical and to-the-point."
-    else: # Neutral
-        return "You are a helpful AI assistant. Your tone should be professional and neutral."
+def load_bank(config):
+    """
+    The read-mostly state: the question bank with its indexes, and an evaluator whose local scorers
+    are fitted to it. It holds no connections or threads, so serve.py builds it once before forking
+    and every worker shares its memory pages.
+    """
+    router = QuestionRouter(config['QUESTIONS_DIR'], compiled_path=config['COMPILED_BANK'])
+    router.snapshot.skill_extractor()  # also builds the tag index
+    scorer = Evaluator(escalation_band=config['ESCALATION_BAND'])
+    _fit_local_scorers(scorer, router.snapshot)
+    # New or edited question files are picked up without a restart; scorers are refitted in the watcher thread.
+    router.on_reload(lambda snapshot: _fit_local_scorers(scorer, snapshot))
+    return router, scorer
+
+# Per-process state, set by create_app(). The routes use these globals, so a process serves one app.
+question_router = evaluator = response_cache = assist_store = progress_store = None
+report_queue = prefetcher = dynamic_pool = None
+_prefetch_hints = False
+routes = Blueprint('mockview', __name__)
+
+def create_app(config=None, preloaded=None):
+    """
+    Builds the app from default_config() updated with `config`. `preloaded` is a load_bank() result
+    to reuse. Everything that must not cross a fork (SQLite connections, thread and process pools,
+    the bank watcher) is created here, so a preforking server calls this in each worker.
+    """
+    global question_router, evaluator, response_cache, assist_store, progress_store, report_queue, prefetcher, dynamic_pool, _prefetch_hints
+    settings = {**default_config(), **(config or {})}
+    question_router, evaluator = preloaded or load_bank(settings)
+    response_cache = ResponseCache(settings['CACHE_PATH'])
+    evaluator.cache = response_cache
+    assist_store = AssistStore(settings['ASSISTS_PATH'])
+    # Answered questions are remembered per browser on the server, keyed by a long-lived cookie.
+    progress_store = create_progress_store_from_env(settings['PROGRESS_PATH'])
+    # PDF reports render in worker processes so WeasyPrint never blocks a request thread.
+    report_queue = ReportQueue(max_workers=settings['REPORT_WORKERS'])
+    # The next question (and optionally its hint) is prepared while the user reads their feedback.
+    prefetcher = Prefetcher(max_workers=settings['PREFETCH_WORKERS'])
+    _prefetch_hints = settings['PREFETCH_HINTS']
+    # Pre-generated dynamic questions per (topic, persona), so running out of bank questions never waits on Gemini.
+    dynamic_pool = WarmPool(lambda topic, persona: _get_dynamic_question(topic, persona), size=settings['WARM_POOL_SIZE'])
+
+    app = Flask(__name__)
+    app.config.update(settings)
+    CORS(app, origins=settings['CORS_ORIGINS'], supports_credentials=True)
+    # Per-request spans feed /metrics and the Server-Timing header; slow requests are logged with their breakdown.
+    metrics.instrument(app, slow_ms=settings['SLOW_REQUEST_MS'], profile_rate=settings['PROFILE_RATE'], profile_dir=settings['PROFILE_DIR'])
+    # Sessions live server-side; the cookie only carries a random session id.
+    app.session_interface = CompactSessionInterface(create_session_store_from_env(settings['SESSION_PATH']))
+    app.register_blueprint(routes)
+    if settings['RELOAD_INTERVAL'] > 0: question_router.start_watching(settings['RELOAD_INTERVAL'])
+    return app
+
+def shutdown():
+    """Stops this process's background work: the bank watcher and the PDF worker processes."""
+    if question_router is not None: question_router.stop_watching()
+    if report_queue is not None: report_queue.shutdown()
+
+_app = None
+
+def __getattr__(name):
+    """`app.app` (e.g. `flask --app app run` or the load test) builds the default app on first use."""
+    global _app
+    if name != 'app': raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None: _app = create_app()
+    return _app
+
+def _llm_metrics(stats):
+    families = [("mockview_llm_hedged_total", "counter", "Slow LLM calls that got a duplicate request, and duplicates that answered first.",
+                 [({"result": "sent"}, stats["hedged"]), ({"result": "won"}, stats["hedge_wins"])])]
+    if "circuit" in stats:
+        families += [("mockview_llm_circuit_open", "gauge", "1 while the LLM circuit breaker is open or half-open.", [({}, int(stats["circuit"] != "closed"))]),
+                     ("mockview_llm_rejected_total", "counter", "LLM calls answered by a fallback because the circuit was open.", [({}, stats["rejected"])])]
+    return families
+
+metrics.REGISTRY.register_collector(lambda: [
+    ("mockview_evaluations_total", "counter", "Answers graded, by the tier that decided the score.", [({"tier": tier}, s["count"]) for tier, s in evaluator.tier_stats().items()]),
+    ("mockview_response_cache_total", "counter", "Response cache lookups and writes, by outcome.", [({"outcome": k}, v) for k, v in response_cache.stats().items() if k not in ("memory_items", "hit_rate")]),
+    ("mockview_prefetch_total", "counter", "Prefetched work, by outcome.", [({"outcome": k}, v) for k, v in prefetcher.stats().items() if k != "sessions"]),
+    *_llm_metrics(get_client().stats()),
+])
+
+# --- HELPER FUNCTIONS ---
 
 def _extract_skills_from_jd(jd_text: str):
-    """Calls Gemini to extract skills from a job description."""
+    """
+    Skills named in a job description. The bank's tags, topics and their synonyms are matched
+    locally; Gemini is only asked, with the text capped at JD_PROMPT_CHARS, if too few are found.
+    """
+    with metrics.span('skill_extraction'):
+        skills = question_router.snapshot.skill_extractor().extract(jd_text, MAX_JD_SKILLS)
+    if len(skills) >= MIN_LOCAL_SKILLS:
+        print(f"Extracted skills locally: {skills}")
+        return skills
     try:
-        print("Attempting to extract skills from JD...")
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        print(f"Found {len(skills)} known skills in the JD; asking Gemini for more...")
         prompt = f"""
         From the following job description, extract the 5 to 7 most important technical skills, programming languages, and key concepts.
-        Return them as a valid JSON list of strings. Do not include soft skills. Job Description: "{jd_text}"
+        Return them as a valid JSON list of strings. Do not include soft skills. Job Description: "{jd_text[:JD_PROMPT_CHARS]}"
         """
-        response = model.generate_content(prompt, generation_config=genai.types.GenerationConfig(response_mime_type="application/json"))
-        skills = json.loads(response.text)
+        extracted = get_client().generate_json(prompt)
+        known = {normalize_tag(skill) for skill in skills}
+        for skill in extracted if isinstance(extracted, list) else []:
+            if isinstance(skill, str) and skill.strip() and normalize_tag(skill) not in known and len(skills) < MAX_JD_SKILLS:
+                known.add(normalize_tag(skill))
+                skills.append(skill)
         print(f"Extracted skills: {skills}")
         return skills
     except Exception as e:
         print(f"Error extracting skills from JD: {e}")
-        return []
+        return skills
 
 def _get_dynamic_question(topic: str, persona: str = 'Neutral'):
     """Calls Gemini to generate a single, new question on the fly."""
     try:
         print(f"Attempting to dynamically generate a question for topic: {topic}")
-        persona_instruction = _get_persona_prompt(persona)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        persona_instruction = get_persona_prompt(persona)
         prompt = f"""
         {persona_instruction}
         Generate a single, new, medium-difficulty technical interview question about '{topic}'.
@@ -64,139 +208,427 @@ def _get_dynamic_question(topic: str, persona: str = 'Neutral'):
         Return your response as a valid JSON object with two keys: "question" and "answer".
         The "answer" should be concise and accurate (2-4 sentences).
         """
-        response = model.generate_content(prompt, generation_config=genai.types.GenerationConfig(response_mime_type="application/json"))
-        data = json.loads(response.text)
-        return {"id": f"dynamic-{int(time.time())}", "question": data["question"], "answer": data["answer"], "difficulty": "dynamic", "tags": [topic]}
+        data = get_client().generate_json(prompt)
+        return _make_dynamic_question(topic, data)
     except Exception as e:
         print(f"Error generating dynamic question: {e}")
         return None
 
+def _make_dynamic_question(topic: str, data: dict):
+    """Wraps a generated question/answer pair in the question schema with a unique id."""
+    return {"id": f"dynamic-{uuid.uuid4().hex[:12]}", "question": data["question"], "answer": data["answer"], "difficulty": "dynamic", "tags": [topic]}
+
+def _get_dynamic_questions(topics: list, persona: str = 'Neutral', deadline: float = DYNAMIC_BATCH_DEADLINE, max_attempts: int = DYNAMIC_BATCH_ATTEMPTS):
+    """
+    Generates one question per entry in `topics` with a single batched Gemini request.
+    Slots the model leaves empty are retried within the retry budget; whatever was
+    generated before the deadline is returned, so the result may be shorter than `topics`.
+    """
+    questions = []
+    pending = list(topics)
+    deadline_at = time.monotonic() + deadline
+    persona_instruction = get_persona_prompt(persona)
+    for attempt in range(max_attempts):
+        time_left = deadline_at - time.monotonic()
+        if not pending or time_left <= 0: break
+        try:
+            print(f"Attempting to generate {len(pending)} dynamic questions (attempt {attempt + 1})")
+            topic_lines = "\n".join(f"{i + 1}. {topic}" for i, topic in enumerate(pending))
+            prompt = f"""
+            {persona_instruction}
+            Generate exactly {len(pending)} new, medium-difficulty technical interview questions, one for each topic below, in the same order:
+            {topic_lines}
+            Each question should be unique and not a simple definition.
+            Return your response as a valid JSON object with a single key "questions" holding a list of objects with two keys: "question" and "answer".
+            Each "answer" should be concise and accurate (2-4 sentences).
+            """
+            data = get_client().generate_json(prompt, timeout=time_left)
+            items = data.get("questions", []) if isinstance(data, dict) else data
+            items = items if isinstance(items, list) else []
+            valid = [isinstance(item, dict) and bool(item.get("question")) and bool(item.get("answer")) for item in items[:len(pending)]]
+            questions.extend(_make_dynamic_question(topic, item) for topic, item, ok in zip(pending, items, valid) if ok)
+            # Only the topics whose slot was left empty or invalid are asked for again, wherever they were in the reply.
+            pending = [topic for topic, ok in zip(pending, valid) if not ok] + pending[len(valid):]
+        except Exception as e:
+            print(f"Error generating dynamic questions: {e}")
+    return questions
+
 def _get_ai_hint(question: str, persona: str = 'Neutral'):
-    """Calls Gemini API to generate a hint for a given question."""
+    """Returns a precomputed or cached hint, falling back to Gemini. Successful hints are cached."""
+    cache_key = response_cache.key('hint', question, persona)
+    precomputed = assist_store.get(cache_key)
+    if precomputed is not None: return precomputed
+    cached = response_cache.get(cache_key)
+    if cached is not None: return cached
     try:
         print(f"Attempting to generate a hint for question: {question[:30]}...")
-        persona_instruction = _get_persona_prompt(persona)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        prompt = f"""
-        {persona_instruction}
-        The user is stuck on the following technical interview question: "{question}"
-        Your task is to provide a single, concise, one-sentence hint that guides the user toward the main concept, but does NOT give away the answer.
-        """
-        response = model.generate_content(prompt)
+        hint = get_client().generate(build_hint_prompt(question, persona))
         print("Hint generated successfully.")
-        return response.text
+        response_cache.set(cache_key, hint)
+        return hint
     except Exception as e:
         print(f"Error generating hint: {e}")
         return "Sorry, I couldn't generate a hint at this time."
 
 def _get_ai_explanation(question: str, answer: str, persona: str = 'Neutral'):
-    """Calls Gemini API to generate a detailed explanation of a concept."""
+    """Returns a precomputed or cached explanation, falling back to Gemini. Successful explanations are cached."""
+    cache_key = response_cache.key('explanation', question, answer, persona)
+    precomputed = assist_store.get(cache_key)
+    if precomputed is not None: return precomputed
+    cached = response_cache.get(cache_key)
+    if cached is not None: return cached
     try:
         print(f"Attempting to generate an explanation for question: {question[:30]}...")
-        persona_instruction = _get_persona_prompt(persona)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        prompt = f"""
-        Act as a patient and knowledgeable computer science tutor, with the personality of a {persona} interviewer.
-        A user has just seen the answer to an interview question and wants to understand the core concept better.
-        The question was: "{question}"
-        The correct answer provided was: "{answer}"
-        Your task is to explain the underlying concept in a simple, easy-to-understand way, matching your persona. Use an analogy if it helps.
-        """
-        response = model.generate_content(prompt)
+        explanation = get_client().generate(build_explanation_prompt(question, answer, persona))
         print("Explanation generated successfully.")
-        return response.text
+        response_cache.set(cache_key, explanation)
+        return explanation
     except Exception as e:
         print(f"Error generating explanation: {e}")
         return "Sorry, I couldn't generate an explanation at this time."
 
+def _stream_assist(cache_key: str, prompt: str, error_message: str):
+    """
+    Streaming counterpart of _get_ai_hint/_get_ai_explanation: yields text chunks as Gemini
+    produces them. Precomputed and cached texts are yielded whole; a completed stream is cached.
+    """
+    stored = assist_store.get(cache_key)
+    if stored is None: stored = response_cache.get(cache_key)
+    if stored is not None:
+        yield stored
+        return
+    text = ''
+    try:
+        for chunk in get_client().stream(prompt):
+            text += chunk
+            yield chunk
+        response_cache.set(cache_key, text)
+    except Exception as e:
+        print(f"Error streaming response: {e}")
+        if not text: yield error_message
+
+def _sse_response(events):
+    """Wraps (event, data) pairs in a text/event-stream response, ending with a 'done' event."""
+    def generate():
+        for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    return Response(generate(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _set_current_question(question_data: dict):
+    """Bank questions are referenced by id; only dynamic questions keep their text in the session."""
+    if question_router.bank.get(question_data['id']) is not None: session['current'] = question_data['id']
+    else: session['current'] = {"question": question_data['question'], "answer": question_data['answer']}
+
+def _get_current_question():
+    """Returns (question text, model answer) for the active question, or None."""
+    current = session.get('current')
+    if isinstance(current, str):
+        question_data = question_router.bank.get(current)
+        return (question_data['question'], question_data['answer']) if question_data else None
+    return (current['question'], current['answer']) if current else None
+
+def _record_scheduled_score(session_data, score: int):
+    """Feeds an answer's score to the adaptive scheduler state of a topic session."""
+    if not session_data.get('schedule'): return
+    _sync_bank_version(session_data, question_router.bank)  # the answered question's position may have moved
+    session_data['schedule'] = AdaptiveScheduler.record_answer(session_data['schedule'], score)
+
+def _progress_user():
+    """The caller's progress id from its cookie; a new one is issued (see _issue_progress_cookie) if missing."""
+    user = request.cookies.get(PROGRESS_COOKIE)
+    if user and re.fullmatch(r'[A-Za-z0-9_-]{16,64}', user): return user
+    if 'new_progress_user' not in g: g.new_progress_user = secrets.token_urlsafe(18)
+    return g.new_progress_user
+
+def _record_progress(question_id, user=None):
+    """Marks a bank question as answered in the caller's (or `user`'s) server-side progress, once it was graded."""
+    if isinstance(question_id, str): progress_store.mark_question(user or _progress_user(), question_id, question_router.bank)
+
+def _sync_bank_version(state, bank):
+    """
+    `asked` and the schedule of a topic session (`state`) hold positions within the topic, which a reload
+    may insert, remove or reorder. When the topic changed since they were recorded they are remapped by id,
+    like saved progress, or dropped if the old version is unknown.
+    """
+    topic = state.get('topic')
+    if not bank.has_topic(topic): return
+    version, recorded = progress_store.version(bank, topic), state.get('bank_version')
+    state['bank_version'] = version
+    if recorded is None or recorded == version: return
+    remap = progress_store.remapper(recorded, topic, bank) or (lambda position: None)
+    asked = Bitset()
+    for position in Bitset.from_bytes(state.get('asked')):
+        if remap(position) is not None: asked.add(remap(position))
+    state['asked'] = asked.to_bytes()
+    schedule = state.get('schedule')
+    if not schedule: return
+    schedule['review'] = [[remap(position), due, step] for position, due, step in schedule['review'] if remap(position) is not None]
+    last = schedule['last'] and remap(schedule['last'][0])
+    schedule['last'] = [last, schedule['last'][1]] if last is not None else None
+    state['schedule'] = schedule
+
+def _next_topic_question(state, persona: str):
+    """
+    The scheduler's pick from the bank, else a warm dynamic question, else one generated now.
+    `state` (the session, or a copy of its TOPIC_STATE keys) gets the updated `asked` and schedule.
+    The topic's dynamic questions start warming up when only a few bank questions are left.
+    """
+    topic, bank = state['topic'], question_router.bank
+    _sync_bank_version(state, bank)
+    asked, schedule = Bitset.from_bytes(state.get('asked')), state.get('schedule') or new_state()
+    with metrics.span('select_question'):
+        picked = question_router.scheduler.next_question(bank, topic, asked, schedule)
+    if picked:
+        question_data, position, _ = picked
+        asked.add(position)
+        if bank.topic_size(topic) - len(asked) <= WARM_THRESHOLD: dynamic_pool.refill(topic, persona)
+    else:
+        schedule['last'] = None
+        question_data = dynamic_pool.take(topic, persona) or _get_dynamic_question(topic, persona)
+    state['asked'], state['schedule'] = asked.to_bytes(), schedule
+    return question_data
+
+def _prefetch_question(state, persona: str):
+    """Background half of /ask for a topic session; returns (question, topic state) for /ask to commit."""
+    question_data = _next_topic_question(state, persona)
+    return question_data, state
+
+def _prefetch_key(session_data):
+    """What a prefetched question was picked for; /ask only uses it if the session still matches."""
+    return session_data.get('topic'), (session_data.get('schedule') or {}).get('turn'), session_data.get('persona', 'Neutral')
+
+def _prefetch_next(sid, session_data):
+    """Starts picking, and if needed generating, the next question of a topic session right after an answer."""
+    if not sid or session_data.get('interview_mode') == 'custom' or not session_data.get('topic'): return
+    state = copy.deepcopy({key: session_data.get(key) for key in TOPIC_STATE})
+    prefetcher.submit(sid, 'question', _prefetch_key(session_data), _prefetch_question, state, session_data.get('persona', 'Neutral'))
+
+def _prefetch_hint(sid, question: str, persona: str):
+    """Starts generating the hint for a question that was just asked, if hint prefetching is on."""
+    if sid and _prefetch_hints: prefetcher.submit(sid, 'hint', (question, persona), _get_ai_hint, question, persona)
+
 # --- ROUTES ---
 
-@app.route('/topics', methods=['GET'])
+@routes.after_app_request
+def _issue_progress_cookie(response):
+    if 'new_progress_user' in g:
+        response.set_cookie(PROGRESS_COOKIE, g.new_progress_user, max_age=PROGRESS_TTL, httponly=True,
+                            secure=current_app.config['SESSION_COOKIE_SECURE'], samesite=current_app.config['SESSION_COOKIE_SAMESITE'])
+    return response
+
+@routes.route('/topics', methods=['GET'])
 def list_topics():
-    topics = get_available_topics('../data/questions')
-    return jsonify(list(topics.keys()))
+    # Served from the loaded snapshot; the watcher keeps it current.
+    return jsonify(question_router.available_topics())
+
+@routes.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+@routes.route('/bank-stats', methods=['GET'])
+def bank_stats():
+    return jsonify(question_router.load_report)
+
+@routes.route('/evaluation-stats', methods=['GET'])
+def evaluation_stats():
+    return jsonify(evaluator.tier_stats())
 
-@app.route('/start', methods=['POST'])
+@routes.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    # Per process: with several workers, each one is scraped (or reports) separately.
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@routes.route('/prefetch-stats', methods=['GET'])
+def prefetch_stats():
+    return jsonify({**prefetcher.stats(), "warm_pool": dynamic_pool.stats()})
+
+@routes.route('/start', methods=['POST'])
 def start_interview():
     data = request.json
-    session.pop('interview_mode', None)
+    for key in ('interview_mode', 'custom_questions', 'custom_question_index', 'current', 'bank_version'): session.pop(key, None)
     session['persona'] = data.get('persona', 'Neutral') # Store persona
     session['topic'] = data.get('topic')
-    session['globally_answered_ids'] = data.get('globally_answered_ids', [])
-    session['asked_ids'] = []
-    return jsonify({"message": f"Interview started for topic: {session['topic']}"})
+    user, bank = _progress_user(), question_router.bank
+    # Older clients post their whole local history; it is merged into the server-side progress once.
+    legacy_ids = data.get('globally_answered_ids') or []
+    if legacy_ids: progress_store.merge(user, legacy_ids, bank)
+    session['asked'] = progress_store.answered(user, session['topic'], bank).to_bytes()
+    session['schedule'] = new_state()
+    _sync_bank_version(session, bank)
+    prefetcher.discard(getattr(session, 'sid', None))
+    return jsonify({"message": f"Interview started for topic: {session['topic']}", "progress_merged": bool(legacy_ids)})
 
-@app.route('/start-custom-interview', methods=['POST'])
+@routes.route('/start-custom-interview', methods=['POST'])
 def start_custom_interview():
     data = request.json
     session['persona'] = data.get('persona', 'Neutral') # Store persona
     jd_text = data.get('jd_text')
     if not jd_text: return jsonify({"error": "Job description not provided"}), 400
+    if not isinstance(jd_text, str): return jsonify({"error": "Job description must be text"}), 400
     skills = _extract_skills_from_jd(jd_text)
     if not skills: return jsonify({"error": "Could not extract skills from the job description."}), 400
-    custom_questions = []
-    for skill in skills:
-        question = question_router.find_question_by_tag(skill, excluded_ids=[q['id'] for q in custom_questions])
-        if question: custom_questions.append(question)
-    while len(custom_questions) < 5 and len(custom_questions) < len(skills):
-        skill_to_use = random.choice(skills); dyn_question = _get_dynamic_question(skill_to_use, session['persona'])
-        if dyn_question: custom_questions.append(dyn_question)
+    custom_questions = question_router.find_questions_by_tags(skills)
+    missing = min(CUSTOM_INTERVIEW_SIZE, len(skills)) - len(custom_questions)
+    if missing > 0: custom_questions.extend(_get_dynamic_questions(random.sample(skills, missing), session['persona']))
     if not custom_questions: return jsonify({"error": "Could not generate a custom interview."}), 400
-    session['interview_mode'] = 'custom'; session['custom_questions'] = custom_questions; session['custom_question_index'] = 0
+    # Bank questions are stored by id; only dynamic questions are kept whole.
+    session['interview_mode'] = 'custom'; session['custom_questions'] = [q['id'] if question_router.bank.get(q['id']) is not None else q for q in custom_questions]; session['custom_question_index'] = 0
+    session.pop('current', None)
     return jsonify({"message": f"Custom interview created based on skills: {', '.join(skills)}"})
 
-@app.route('/hint', methods=['POST'])
+@routes.route('/hint', methods=['POST'])
 def get_hint():
     data = request.get_json(); question = data.get('question')
     if not question: return jsonify({"error": "Question not provided"}), 400
-    hint = _get_ai_hint(question, session.get('persona', 'Neutral'))
+    persona = session.get('persona', 'Neutral')
+    hint = prefetcher.take(getattr(session, 'sid', None), 'hint', (question, persona), PREFETCH_WAIT) or _get_ai_hint(question, persona)
     return jsonify({"hint": hint})
 
-@app.route('/explain', methods=['POST'])
+@routes.route('/explain', methods=['POST'])
 def get_explanation():
     data = request.get_json(); question = data.get('question'); answer = data.get('answer')
     if not question or not answer: return jsonify({"error": "Question and answer not provided"}), 400
     explanation = _get_ai_explanation(question, answer, session.get('persona', 'Neutral'))
     return jsonify({"explanation": explanation})
 
-@app.route('/ask', methods=['GET'])
+@routes.route('/hint-stream', methods=['POST'])
+def stream_hint():
+    data = request.get_json(); question = data.get('question')
+    if not question: return jsonify({"error": "Question not provided"}), 400
+    persona = session.get('persona', 'Neutral')
+    prefetched = prefetcher.take(getattr(session, 'sid', None), 'hint', (question, persona), PREFETCH_WAIT)
+    chunks = [prefetched] if prefetched else _stream_assist(response_cache.key('hint', question, persona), build_hint_prompt(question, persona), "Sorry, I couldn't generate a hint at this time.")
+    return _sse_response(('chunk', {"text": chunk}) for chunk in chunks)
+
+@routes.route('/explain-stream', methods=['POST'])
+def stream_explanation():
+    data = request.get_json(); question = data.get('question'); answer = data.get('answer')
+    if not question or not answer: return jsonify({"error": "Question and answer not provided"}), 400
+    persona = session.get('persona', 'Neutral')
+    chunks = _stream_assist(response_cache.key('explanation', question, answer, persona), build_explanation_prompt(question, answer, persona), "Sorry, I couldn't generate an explanation at this time.")
+    return _sse_response(('chunk', {"text": chunk}) for chunk in chunks)
+
+@routes.route('/ask', methods=['GET'])
 def ask_question():
     if 'topic' not in session and 'interview_mode' not in session: return jsonify({"error": "Session not started"}), 400
-    persona = session.get('persona', 'Neutral')
+    persona = session.get('persona', 'Neutral'); sid = getattr(session, 'sid', None)
     if session.get('interview_mode') == 'custom':
         q_index = session.get('custom_question_index', 0); q_list = session.get('custom_questions', [])
         if q_index >= len(q_list): return jsonify({"status": "complete", "message": "Congratulations! You've finished your custom interview."})
         question_data = q_list[q_index]; session['custom_question_index'] = q_index + 1
+        if isinstance(question_data, str): question_data = question_router.bank.get(question_data)
+        if not question_data: return jsonify({"error": "Question is no longer available"}), 410
     else:
-        topic = session['topic']; all_excluded_ids = list(set(session.get('asked_ids', [])).union(set(session.get('globally_answered_ids', []))))
-        question_data = question_router.get_question(topic, all_excluded_ids)
-        if not question_data: question_data = _get_dynamic_question(topic, persona)
+        topic = session['topic']
+        # Usually the question was already picked in the background after the last answer.
+        prefetched = prefetcher.take(sid, 'question', _prefetch_key(session), PREFETCH_WAIT)
+        if prefetched: question_data, state = prefetched; session.update(state)
+        # The scheduler adapts difficulty to the running score, avoids recent tags and brings back weak answers.
+        else: question_data = _next_topic_question(session, persona)
         if not question_data: return jsonify({"status": "complete", "message": f"Congratulations! You've finished all available questions for the {topic.upper()} topic."})
-    
-    session['asked_ids'].append(question_data['id']); session['current_answer'] = question_data['answer']; session['current_question'] = question_data['question']; session.modified = True
+
+    _set_current_question(question_data)
+    _prefetch_hint(sid, question_data['question'], persona)
     return jsonify({"status": "question", "id": question_data['id'], "question": question_data['question'], "difficulty": question_data['difficulty']})
 
-@app.route('/answer', methods=['POST'])
+@routes.route('/answer', methods=['POST'])
 def handle_answer():
-    if 'current_answer' not in session: return jsonify({"error": "No active question"}), 400
-    data = request.json; user_answer = data.get('answer'); model_answer = session['current_answer']; question = session['current_question']
+    current = _get_current_question()
+    if not current: return jsonify({"error": "No active question"}), 400
+    data = request.json; user_answer = data.get('answer'); question, model_answer = current
     persona = session.get('persona', 'Neutral')
     if not user_answer: return jsonify({"error": "No answer provided"}), 400
-    feedback, score = evaluator.evaluate(user_answer, model_answer, question, use_llm=True, persona=persona)
-    del session['current_answer']; del session['current_question']; session.modified = True
-    return jsonify({"feedback": feedback, "score": score, "model_answer": model_answer})
+    with metrics.span('evaluate'):
+        feedback, score, tier = evaluator.evaluate_with_tier(user_answer, model_answer, question, use_llm=True, persona=persona)
+    _record_progress(session.pop('current', None))
+    _record_scheduled_score(session, score)
+    _prefetch_next(getattr(session, 'sid', None), session)
+    return jsonify({"feedback": feedback, "score": score, "model_answer": model_answer, "tier": tier})
     
-@app.route('/generate-report', methods=['POST'])
-def generate_report():
-    data = request.get_json(); history = data.get('history', []); summary = data.get('summary', {})
-    question_blocks_html = ""
-    for i, item in enumerate(history): question_blocks_html += f"""<div class="question-block"><h3>Question {i+1}:</h3><p>{item.get('question', 'N/A')}</p><p><strong>Your Score:</strong> {item.get('score', 'N/A')}%</p><p><strong>Feedback:</strong> {item.get('feedback', 'N/A')}</p><div class="model-answer"><strong>Model Answer:</strong> {item.get('modelAnswer', 'N/A')}</div></div>"""
-    html_string = f"""
-    <html><head><style>body {{ font-family: sans-serif; color: #333; }} h1 {{ color: #2b6cb0; border-bottom: 2px solid #2b6cb0; padding-bottom: 10px; }} h2 {{ color: #2c5282; border-bottom: 1px solid #e2e8f0; padding-bottom: 5px;}} .summary-card {{ background-color: #edf2f7; padding: 20px; border-radius: 8px; margin-bottom: 30px; text-align: center; }} .question-block {{ margin-bottom: 25px; border-left: 3px solid #cbd5e0; padding-left: 15px; page-break-inside: avoid; }} .model-answer {{ background-color: #f7fafc; border: 1px solid #e2e8f0; padding: 10px; border-radius: 5px; margin-top: 10px; }} p {{ line-height: 1.6; }} strong {{ color: #4a5568; }}</style></head>
-    <body><h1>Interview Report Card</h1> <p>Date: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p><div class="summary-card"><h2>Performance Summary</h2><p><strong>Questions Answered:</strong> {summary.get('count', 'N/A')}</p><p><strong>Average Score:</strong> {summary.get('average_score', 'N/A')}%</p></div><h2>Detailed Breakdown</h2>{question_blocks_html}</body></html>
+@routes.route('/answer-stream', methods=['POST'])
+def handle_answer_stream():
+    """Like /answer, but streams 'feedback' events as they are generated and a final 'result' event with the score."""
+    current = _get_current_question()
+    if not current: return jsonify({"error": "No active question"}), 400
+    data = request.json; user_answer = data.get('answer'); question, model_answer = current
+    persona = session.get('persona', 'Neutral')
+    if not user_answer: return jsonify({"error": "No answer provided"}), 400
+    # The session is saved before the body streams, so clear the active question now.
+    question_id = session.pop('current', None)
+    user = _progress_user() if isinstance(question_id, str) else None  # read now: the stream runs outside the request
+    scheduled, sid, interface = bool(session.get('schedule')), getattr(session, 'sid', None), current_app.session_interface
+    def events():
+        for kind, payload in evaluator.evaluate_stream(user_answer, model_answer, question, persona=persona):
+            if kind == 'feedback': yield 'feedback', {"text": payload}
+            else:
+                _record_progress(question_id, user)
+                # The score arrives after the session was saved, so it is written to the store directly.
+                data = interface.update(sid, lambda data: _record_scheduled_score(data, payload['score'])) if scheduled and sid else None
+                if data is not None: _prefetch_next(sid, data)
+                yield 'result', {**payload, "model_answer": model_answer}
+    return _sse_response(events())
+
+@routes.route('/answer-batch', methods=['POST'])
+def handle_answer_batch():
+    """
+    Grades many answers in one request, e.g. a whole timed interview or a regrade.
+    Items are {"question_id", "answer"} for bank questions or {"question", "model_answer", "answer"};
+    a 'result' event with the item's index is streamed as each one is graded.
     """
-    pdf = HTML(string=html_string).write_pdf()
-    return send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True, download_name='MockView_Report.pdf')
+    data = request.get_json(); items = data.get('items')
+    if not isinstance(items, list) or not items: return jsonify({"error": "No items provided"}), 400
+    persona = data.get('persona', session.get('persona', 'Neutral'))
+    resolved = []
+    for item in items:
+        question_data = question_router.bank.get(item.get('question_id')) if isinstance(item, dict) and item.get('question_id') else None
+        if question_data: item = {**item, "question": question_data['question'], "model_answer": question_data['answer']}
+        resolved.append(item)
+    results = evaluator.evaluate_batch(resolved, use_llm=data.get('use_llm', True), persona=persona)
+    return _sse_response(('result', {"index": i, **result}) for i, result in results)
+
+def _send_report(job):
+    return send_file(io.BytesIO(job.pdf), mimetype='application/pdf', as_attachment=True, download_name='MockView_Report.pdf')
+
+@routes.route('/reports', methods=['POST'])
+def submit_report():
+    """Queues a PDF report and returns its job id; identical histories share one job."""
+    data = request.get_json()
+    job_id = report_queue.submit(data.get('history', []), data.get('summary', {}))
+    return jsonify(report_queue.get(job_id).to_dict()), 202
+
+@routes.route('/reports/bulk', methods=['POST'])
+def submit_reports_bulk():
+    """Queues many reports at once; they are rendered in batches per worker call."""
+    reports = request.get_json().get('reports', [])
+    if not isinstance(reports, list): return jsonify({"error": "reports must be a list"}), 400
+    if not all(isinstance(r, dict) for r in reports): return jsonify({"error": "each report must be an object"}), 400
+    job_ids = report_queue.submit_many([(r.get('history', []), r.get('summary', {})) for r in reports])
+    return jsonify({"job_ids": job_ids}), 202
+
+@routes.route('/reports/<job_id>', methods=['GET'])
+def report_status(job_id):
+    job = report_queue.get(job_id)
+    if not job: return jsonify({"error": "Unknown report"}), 404
+    return jsonify(job.to_dict())
+
+@routes.route('/reports/<job_id>/pdf', methods=['GET'])
+def download_report(job_id):
+    job = report_queue.get(job_id)
+    if not job: return jsonify({"error": "Unknown report"}), 404
+    if job.status != 'done': return jsonify(job.to_dict()), (500 if job.status == 'failed' else 202)
+    return _send_report(job)
+
+@routes.route('/generate-report', methods=['POST'])
+def generate_report():
+    """Synchronous wrapper kept for older clients: queues the report and waits for it."""
+    data = request.get_json()
+    with metrics.span('report_wait'):
+        job = report_queue.wait(report_queue.submit(data.get('history', []), data.get('summary', {})), REPORT_WAIT_TIMEOUT)
+    if job.status == 'failed': return jsonify({"error": "Report generation failed."}), 500
+    if job.status != 'done': return jsonify(job.to_dict()), 202
+    return _send_report(job)
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    # Development server with the reloader; use serve.py for anything with more than one user.
+    create_app().run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,56 @@
+# backend/assist_store.py
+import os
+import json
+import threading
+
+
+class AssistStore:
+    """
+    Sidecar store of precomputed hints and explanations, written by
+    `notebooks/generate.py --precompute-assists` and read by the server.
+
+    The file is JSON Lines, one record per line:
+        {"key": ..., "kind": "hint" | "explanation", "persona": ..., "question_id": ..., "text": ...}
+    where `key` is the same content hash the ResponseCache uses for that prompt.
+    Appending one line per result doubles as the checkpoint for resumable runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._needs_newline = False
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                self._needs_newline = not line.endswith('\n')
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run; it will be regenerated
+                self.entries[record['key']] = record['text']
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, record):
+        """Adds one record and flushes it to disk immediately."""
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if self._needs_newline:
+                    f.write('\n')
+                    self._needs_newline = False
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.entries[record['key']] = record['text']
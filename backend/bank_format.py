@@ -0,0 +1,242 @@
+# backend/bank_format.py
+import os
+import json
+import mmap
+import bisect
+import struct
+from functools import lru_cache
+from question_bank import Question
+from tag_index import normalize_tag
+
+MAGIC = b'MVQB'
+VERSION = 1
+HEADER = struct.Struct('<4sIQI')         # magic, version, metadata offset, metadata length
+RECORD = struct.Struct('<QIQIQIHHI')     # id, question, answer as (blob offset, length); difficulty; tag count; first tag ref
+ID_REF = struct.Struct('<QI')            # the id part of a record
+POSTING = struct.Struct('<II')           # first slot in the posting list array, count
+U32 = struct.Struct('<I')
+DECODED_CACHE_SIZE = 4096                # decoded Question objects kept per open bank
+
+
+def source_signature(path):
+    """Size and mtime of a topic file, stored at compile time to spot topics edited since; None if missing."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _pad(f):
+    f.write(bytes(-f.tell() % 8))
+    return f.tell()
+
+
+def compile_bank(questions_by_topic, path, sources=None, scorer=None):
+    """
+    Writes a validated bank ({topic: [questions]}) to `path`. Layout:
+        header | fixed-size question records | id index (record numbers sorted by id)
+        | tag refs | tag posting table | posting lists | UTF-8 string blob | JSON metadata
+    Records are grouped by topic in file order, so a question's position in its topic is
+    its record number minus the topic's first record. `sources` maps topic -> file stat
+    used to detect stale topics; `scorer` holds precomputed SemanticScorer statistics.
+    The file is written next to `path` and renamed into place, so readers never see half a bank.
+    """
+    blob, strings = bytearray(), {}
+    def ref(text):
+        data = text.encode('utf-8')
+        if data not in strings:
+            strings[data] = len(blob)
+            blob.extend(data)
+        return strings[data], len(data)
+
+    records, tag_refs, topics, ids = [], [], {}, []
+    difficulties, tags, postings = {}, {}, {}
+    for topic, questions in questions_by_topic.items():
+        topics[topic] = [len(records), len(questions)]
+        for q in questions:
+            number = len(records)
+            q_tags = list(q.get('tags') or ())
+            difficulty = difficulties.setdefault(q.get('difficulty') or 'medium', len(difficulties))
+            records.append((*ref(q['id']), *ref(q['question']), *ref(q['answer']), difficulty, len(q_tags), len(tag_refs)))
+            tag_refs.extend(tags.setdefault(tag, len(tags)) for tag in q_tags)
+            ids.append((q['id'].encode('utf-8'), number))
+            # Same keys TagIndex.from_bank would build, so lookups need no decoding at startup.
+            for key in dict.fromkeys(normalize_tag(tag) for tag in [topic] + q_tags):
+                postings.setdefault(key, []).append(number)
+    ids.sort()
+    tag_keys = sorted(postings)
+
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        sections = {"records": _pad(f)}
+        for record in records: f.write(RECORD.pack(*record))
+        sections["id_index"] = _pad(f)
+        for _, number in ids: f.write(U32.pack(number))
+        sections["tag_refs"] = _pad(f)
+        for tag in tag_refs: f.write(U32.pack(tag))
+        sections["postings"] = _pad(f)
+        slot = 0
+        for key in tag_keys:
+            f.write(POSTING.pack(slot, len(postings[key])))
+            slot += len(postings[key])
+        sections["posting_lists"] = _pad(f)
+        for key in tag_keys:
+            for number in postings[key]: f.write(U32.pack(number))
+        sections["blob"] = _pad(f)
+        f.write(blob)
+        meta = json.dumps({
+            "question_count": len(records), "topics": topics, "sections": sections,
+            "difficulties": list(difficulties), "tags": list(tags), "tag_keys": tag_keys,
+            "sources": sources or {}, "scorer": scorer,
+        }, ensure_ascii=False).encode('utf-8')
+        meta_offset = _pad(f)
+        f.write(meta)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, meta_offset, len(meta)))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class _LazySequence:
+    """Read-only sequence whose items are decoded from the mapped file on access."""
+    __slots__ = ('_length', '_item')
+
+    def __init__(self, length, item):
+        self._length = length
+        self._item = item
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0: index += self._length
+        if not 0 <= index < self._length: raise IndexError(index)
+        return self._item(index)
+
+    def __iter__(self):
+        return (self._item(i) for i in range(self._length))
+
+
+class _MappedPositions:
+    """id -> position lookup for one topic, answered by binary search over the id index."""
+    __slots__ = ('_bank', '_first', '_count')
+
+    def __init__(self, bank, first, count):
+        self._bank, self._first, self._count = bank, first, count
+
+    def get(self, question_id, default=None):
+        number = self._bank.find(question_id)
+        if number is None or not self._first <= number < self._first + self._count: return default
+        return number - self._first
+
+
+class _MappedTopicPool:
+    """A topic served straight from a compiled bank; same interface as question_bank._TopicPool."""
+    __slots__ = ('ids', 'questions', 'positions', 'source', '_first', '_count', '_by_difficulty')
+
+    def __init__(self, bank, first, count):
+        self.ids = _LazySequence(count, lambda i: bank.id_at(first + i))
+        self.questions = _LazySequence(count, lambda i: bank.question_at(first + i))
+        self.positions = _MappedPositions(bank, first, count)
+        self.source = bank
+        self._first, self._count = first, count
+        self._by_difficulty = None
+
+    def by_difficulty(self):
+        """{difficulty: [positions]}, read from the fixed-size records without decoding any strings."""
+        if self._by_difficulty is None:
+            self._by_difficulty = self.source.difficulty_positions(self._first, self._count)
+        return self._by_difficulty
+
+
+class CompiledBank:
+    """
+    Read-only, memory-mapped view of a bank written by compile_bank.
+    Opening it only parses the metadata; questions are decoded on access, and the
+    mapping is shared through the page cache by every worker process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = source_signature(path)
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_offset, meta_length = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled question bank")
+        self.meta = json.loads(self._mm[meta_offset:meta_offset + meta_length].decode('utf-8'))
+        self.topics = {topic: tuple(span) for topic, span in self.meta["topics"].items()}
+        spans = sorted((first, topic) for topic, (first, count) in self.topics.items() if count)
+        self._topic_firsts, self._topic_names = [first for first, _ in spans], [topic for _, topic in spans]
+        self._sections = self.meta["sections"]
+        self._blob = self._sections["blob"]
+        self.question_at = lru_cache(maxsize=DECODED_CACHE_SIZE)(self._decode_question)
+
+    def __len__(self):
+        return self.meta["question_count"]
+
+    @property
+    def sources(self):
+        return self.meta["sources"]
+
+    @property
+    def scorer_statistics(self):
+        return self.meta["scorer"]
+
+    def _record_offset(self, number):
+        return self._sections["records"] + number * RECORD.size
+
+    def _text(self, offset, length):
+        start = self._blob + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def id_at(self, number):
+        return self._text(*ID_REF.unpack_from(self._mm, self._record_offset(number)))
+
+    def _decode_question(self, number):
+        id_off, id_len, q_off, q_len, a_off, a_len, difficulty, tag_count, first_tag = RECORD.unpack_from(self._mm, self._record_offset(number))
+        tag_numbers = struct.unpack_from(f'<{tag_count}I', self._mm, self._sections["tag_refs"] + first_tag * U32.size)
+        tags = self.meta["tags"]
+        return Question(self._text(id_off, id_len), self._text(q_off, q_len), self._text(a_off, a_len), self.meta["difficulties"][difficulty], [tags[t] for t in tag_numbers])
+
+    def difficulty_positions(self, first, count):
+        start = self._record_offset(first)
+        names, pools = self.meta["difficulties"], {}
+        for position, record in enumerate(RECORD.iter_unpack(self._mm[start:start + count * RECORD.size])):
+            pools.setdefault(names[record[6]], []).append(position)
+        return pools
+
+    def find(self, question_id):
+        """Returns the record number of a question id, or None."""
+        if not isinstance(question_id, str): return None
+        key = question_id.encode('utf-8')
+        index, lo, hi = self._sections["id_index"], 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            number = U32.unpack_from(self._mm, index + mid * U32.size)[0]
+            offset, length = ID_REF.unpack_from(self._mm, self._record_offset(number))
+            candidate = self._mm[self._blob + offset:self._blob + offset + length]
+            if candidate == key: return number
+            if candidate < key: lo = mid + 1
+            else: hi = mid
+        return None
+
+    def topic_of(self, number):
+        i = bisect.bisect_right(self._topic_firsts, number) - 1
+        return self._topic_names[i] if i >= 0 else None
+
+    def pool(self, topic):
+        first, count = self.topics[topic]
+        return _MappedTopicPool(self, first, count)
+
+    def tag_postings(self):
+        """{normalized tag: lazy sequence of question ids}, matching TagIndex.postings."""
+        postings = {}
+        for i, key in enumerate(self.meta["tag_keys"]):
+            slot, count = POSTING.unpack_from(self._mm, self._sections["postings"] + i * POSTING.size)
+            base = self._sections["posting_lists"] + slot * U32.size
+            postings[key] = _LazySequence(count, lambda j, base=base: self.id_at(U32.unpack_from(self._mm, base + j * U32.size)[0]))
+        return postings
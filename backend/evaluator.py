@@ -1,16 +1,21 @@
 # backend/evaluator.py
-import os
-import json
-import google.generativeai as genai
-from utils import normalize_text
-
-# Configure Gemini API key when the module is loaded
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if api_key:
-        genai.configure(api_key=api_key)
-except Exception as e:
-    print(f"Could not configure Gemini API: {e}")
+import re
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_client import get_client
+from keyword_scorer import KeywordScorer
+from semantic_scorer import SemanticScorer
+from metrics import span
+
+# Local scores inside this band (inclusive) are too ambiguous to trust and go to Gemini.
+DEFAULT_ESCALATION_BAND = (30, 80)
+
+BATCH_PACK_SIZE = 8      # answers graded by one Gemini prompt in evaluate_batch
+BATCH_PARALLEL_PACKS = 4  # packed prompts in flight at once
+
+SCORE_LINE = re.compile(r'^\s*SCORE:\s*(\d+)', re.IGNORECASE | re.MULTILINE)
 
 # NEW: Helper function to get persona instructions
 def _get_persona_prompt(persona: str):
@@ -23,24 +28,47 @@ def _get_persona_prompt(persona: str):
         return "You are an AI interviewer. Your tone should be professional, neutral, and objective."
 
 class Evaluator:
-    # No changes to __init__ needed
+    def __init__(self, llm_client=None, cache=None, semantic_scorer=None, escalation_band=DEFAULT_ESCALATION_BAND):
+        # Defaults to the shared client so every call site reuses one model and one concurrency limit.
+        self.llm_client = llm_client
+        # Optional ResponseCache for LLM evaluations; keyword scores are cheap and never cached.
+        self.cache = cache
+        self.keyword_scorer = KeywordScorer()
+        self.semantic_scorer = semantic_scorer or SemanticScorer()
+        # (low, high) local-score band that escalates to Gemini; None always escalates.
+        self.escalation_band = escalation_band
+        self.tier_counts = Counter()
+        self.tier_seconds = Counter()
+        self._stats_lock = threading.Lock()
 
-    def _evaluate_with_keywords(self, user_answer, model_answer):
-        # This function is unchanged
-        user_words = set(normalize_text(user_answer).split())
-        model_words = set(normalize_text(model_answer).split())
-        if not model_words: return "Cannot evaluate as model answer is empty.", 0
-        common_words = user_words.intersection(model_words)
-        score = (len(common_words) / len(model_words)) * 100
+    def _llm(self):
+        return self.llm_client or get_client()
+
+    @staticmethod
+    def _keyword_result(score):
+        """Turns a keyword-overlap percentage (None for an empty model answer) into (feedback, score)."""
+        if score is None: return "Cannot evaluate as model answer is empty.", 0
         if score >= 80: feedback = "Excellent! Your answer is very comprehensive."
         elif score >= 50: feedback = "Good start. You've covered the main points, but you could add more detail."
         else: feedback = "Your answer seems to be missing some key concepts. Compare it with the model answer."
         return feedback, round(score)
 
+    def _evaluate_with_keywords(self, user_answer, model_answer):
+        with span('keyword_scoring'):
+            score = self.keyword_scorer.score(user_answer, model_answer)
+        return self._keyword_result(score)
+
+    def evaluate_many(self, user_answers, model_answers):
+        """
+        Keyword-grades many answers at once (bulk regrading, or every request while Gemini is down).
+        Returns a list of (feedback, score) tuples in input order.
+        """
+        with span('keyword_scoring'):
+            scores = self.keyword_scorer.score_many(user_answers, model_answers)
+        return [self._keyword_result(None if score != score else float(score)) for score in scores]
+
     def _evaluate_with_gemini(self, user_answer, model_answer, question, persona):
         """Evaluates the user's answer using the Gemini API and a specific persona."""
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
         # Get the persona-specific instructions
         persona_instruction = _get_persona_prompt(persona)
         
@@ -65,27 +93,221 @@ class Evaluator:
         **Return your response as a valid JSON object with two keys: "score" (an integer) and "feedback" (a string).**
         """
         
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                response_mime_type="application/json"
-            )
-        )
-        
-        result = json.loads(response.text)
+        result = self._llm().generate_json(prompt)
         print(f"Gemini evaluation successful (Persona: {persona}).")
         return result["feedback"], result["score"]
 
-    def evaluate(self, user_answer, model_answer, question, use_llm=False, persona='Neutral'):
+    def _build_stream_prompt(self, user_answer, model_answer, question, persona):
+        """Like the JSON prompt, but plain text so feedback can be shown while it is generated."""
+        persona_instruction = _get_persona_prompt(persona)
+        return f"""
+        {persona_instruction}
+
+        You are evaluating a user's answer to a technical interview question.
+
+        **The Question:**
+        "{question}"
+
+        **The Ideal Model Answer:**
+        "{model_answer}"
+
+        **The User's Answer:**
+        "{user_answer}"
+
+        Write concise, constructive feedback based on your assigned persona as plain text. Explain what was good and what could be improved.
+        Then, on its own final line, write "SCORE: " followed by an integer from 0 to 100 for the technical accuracy, completeness, and clarity of the user's answer.
         """
-        Evaluates the user's answer, now accepting a persona.
+
+    def _build_batch_prompt(self, items, persona):
+        """One prompt grading several (user_answer, model_answer, question) items, answered as a JSON list."""
+        persona_instruction = _get_persona_prompt(persona)
+        blocks = "\n".join(f"""
+        **Answer {i + 1}**
+        Question: "{question}"
+        Ideal Model Answer: "{model_answer}"
+        User's Answer: "{user_answer}"
+        """ for i, (user_answer, model_answer, question) in enumerate(items))
+        return f"""
+        {persona_instruction}
+
+        You are evaluating exactly {len(items)} user answers to technical interview questions. Grade each one independently.
+        {blocks}
+        For each answer, provide a numerical score from 0 to 100 based on the technical accuracy, completeness, and clarity of the user's answer compared to the model answer,
+        and concise, constructive feedback based on your assigned persona.
+
+        **Return your response as a valid JSON object with a single key "evaluations" holding a list of objects with three keys: "id" (the answer number), "score" (an integer) and "feedback" (a string).**
         """
-        if use_llm:
+
+    def _evaluate_pack_with_gemini(self, items, persona):
+        """Grades a pack of items with one Gemini call. Returns {item position: (feedback, score)} for the items it graded."""
+        data = self._llm().generate_json(self._build_batch_prompt(items, persona))
+        evaluations = data.get("evaluations", []) if isinstance(data, dict) else data
+        graded = {}
+        for evaluation in evaluations if isinstance(evaluations, list) else []:
             try:
-                # Pass the persona to the Gemini evaluation method
-                return self._evaluate_with_gemini(user_answer, model_answer, question, persona)
+                position = int(evaluation["id"]) - 1
+                if 0 <= position < len(items): graded[position] = (str(evaluation["feedback"]), max(0, min(100, int(evaluation["score"]))))
+            except (KeyError, TypeError, ValueError):
+                continue  # a malformed entry only costs that item its LLM grade
+        print(f"Gemini batch evaluation graded {len(graded)}/{len(items)} answers (Persona: {persona}).")
+        return graded
+
+    def _record_tier(self, tier, started):
+        with self._stats_lock:
+            self.tier_counts[tier] += 1
+            self.tier_seconds[tier] += time.perf_counter() - started
+
+    def tier_stats(self):
+        """Per-tier decision counts and average latency, to measure how much LLM traffic the local tier saves."""
+        with self._stats_lock:
+            return {tier: {"count": count, "avg_ms": round(self.tier_seconds[tier] / count * 1000, 2)} for tier, count in self.tier_counts.items()}
+
+    def _fast_tiers(self, user_answer, model_answer, question, persona, started):
+        """
+        Tries the local scorer and then the cache. Returns (cache_key, result) where
+        result is (feedback, score, tier) if one of them decided, otherwise None.
+        """
+        if self.escalation_band:
+            with span('semantic_scoring'):
+                local_score = self.semantic_scorer.score(user_answer, model_answer)
+            low, high = self.escalation_band
+            if local_score is not None and not low <= local_score <= high:
+                feedback, score = self._keyword_result(local_score)
+                self._record_tier('local', started)
+                return None, (feedback, score, 'local')
+
+        cache_key = self.cache.key('evaluation', user_answer, model_answer, question, persona) if self.cache else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            self._record_tier('cache', started)
+            return cache_key, (cached[0], cached[1], 'cache')
+        return cache_key, None
+
+    def evaluate_with_tier(self, user_answer, model_answer, question=None, use_llm=False, persona='Neutral'):
+        """
+        Evaluates the user's answer and reports which tier decided it:
+        'keyword' (use_llm=False), 'local' (confident TF-IDF score), 'cache' or 'llm'
+        (ambiguous local score sent to Gemini), or 'fallback' (Gemini failed, keyword score).
+        Returns (feedback, score, tier).
+        """
+        started = time.perf_counter()
+        if not use_llm:
+            feedback, score = self._evaluate_with_keywords(user_answer, model_answer)
+            self._record_tier('keyword', started)
+            return feedback, score, 'keyword'
+
+        cache_key, decided = self._fast_tiers(user_answer, model_answer, question, persona, started)
+        if decided: return decided
+        try:
+            # Pass the persona to the Gemini evaluation method
+            feedback, score = self._evaluate_with_gemini(user_answer, model_answer, question, persona)
+            if cache_key: self.cache.set(cache_key, [feedback, score])
+            self._record_tier('llm', started)
+            return feedback, score, 'llm'
+        except Exception as e:
+            print(f"Gemini evaluation failed: {e}. Falling back to keyword matching.")
+            feedback, score = self._evaluate_with_keywords(user_answer, model_answer)
+            self._record_tier('fallback', started)
+            return feedback, score, 'fallback'
+
+    def evaluate(self, user_answer, model_answer, question=None, use_llm=False, persona='Neutral'):
+        """
+        Evaluates the user's answer, now accepting a persona. Returns (feedback, score).
+        """
+        feedback, score, _ = self.evaluate_with_tier(user_answer, model_answer, question, use_llm, persona)
+        return feedback, score
+
+    def evaluate_stream(self, user_answer, model_answer, question=None, persona='Neutral'):
+        """
+        Streaming version of evaluate_with_tier(use_llm=True). Yields ('feedback', text)
+        chunks as they are generated, then one ('result', {...}) with the final feedback,
+        score and tier. Fast tiers yield their whole feedback as a single chunk.
+        """
+        started = time.perf_counter()
+        cache_key, decided = self._fast_tiers(user_answer, model_answer, question, persona, started)
+        if not decided:
+            feedback = buffer = ''
+            score = None
+            try:
+                for chunk in self._llm().stream(self._build_stream_prompt(user_answer, model_answer, question, persona)):
+                    buffer += chunk
+                    # Hold back the last line while it could still turn into the "SCORE:" line.
+                    cut = buffer.rfind('\n') + 1
+                    tail = buffer[cut:].lstrip().upper()
+                    ready = buffer[:cut] if 'SCORE:'.startswith(tail[:6]) else buffer
+                    buffer = buffer[len(ready):]
+                    # Complete score lines are taken out of what is streamed, whatever whitespace follows them.
+                    lines = []
+                    for line in ready.splitlines(keepends=True):
+                        match = SCORE_LINE.match(line)
+                        if match: score = int(match.group(1))
+                        else: lines.append(line)
+                    ready = ''.join(lines)
+                    if ready:
+                        feedback += ready
+                        yield 'feedback', ready
+                match = SCORE_LINE.search(buffer)
+                if match: score = int(match.group(1))
+                if score is None: raise ValueError("Streamed evaluation did not include a score")
+                feedback = (feedback + SCORE_LINE.sub('', buffer)).strip()
+                decided = (feedback, min(100, score), 'llm')
+                if cache_key: self.cache.set(cache_key, [decided[0], decided[1]])
+                self._record_tier('llm', started)
             except Exception as e:
-                print(f"Gemini evaluation failed: {e}. Falling back to keyword matching.")
-                return self._evaluate_with_keywords(user_answer, model_answer)
-        
-        return self._evaluate_with_keywords(user_answer, model_answer)
\ No newline at end of file
+                print(f"Streaming Gemini evaluation failed: {e}. Falling back to keyword matching.")
+                fallback_feedback, score = self._evaluate_with_keywords(user_answer, model_answer)
+                # Keep whatever feedback was already streamed; only the score falls back.
+                rest = buffer if feedback else fallback_feedback
+                if rest: yield 'feedback', rest
+                decided = ((feedback + rest).strip(), score, 'fallback')
+                self._record_tier('fallback', started)
+        else:
+            yield 'feedback', decided[0]
+        yield 'result', {"feedback": decided[0], "score": decided[1], "tier": decided[2]}
+
+    def evaluate_batch(self, items, use_llm=True, persona='Neutral', pack_size=BATCH_PACK_SIZE, max_parallel_packs=BATCH_PARALLEL_PACKS):
+        """
+        Grades many {"question", "answer", "model_answer"} items together (whole interviews, regrading).
+        Yields (index, result) pairs as items complete, where result is {"feedback", "score", "tier"},
+        or {"error"} for an invalid item. Keyword scores for all items come from one vectorized pass;
+        with use_llm, items the local tier and cache cannot decide are packed `pack_size` per Gemini
+        prompt, and any item a pack fails to grade falls back to its keyword score.
+        """
+        started = time.perf_counter()
+        valid = []
+        for i, item in enumerate(items):
+            # Non-strings are rejected here, as they would fail the vectorized keyword pass for the whole batch.
+            if isinstance(item, dict) and all(isinstance(item.get(key), str) and item[key] for key in ('answer', 'model_answer')): valid.append(i)
+            else: yield i, {"error": "Each item needs an answer and a model_answer"}
+        keyword = dict(zip(valid, self.evaluate_many([items[i]['answer'] for i in valid], [items[i]['model_answer'] for i in valid])))
+        if not use_llm:
+            for i in valid:
+                self._record_tier('keyword', started)
+                yield i, {"feedback": keyword[i][0], "score": keyword[i][1], "tier": 'keyword'}
+            return
+
+        pending = []
+        for i in valid:
+            cache_key, decided = self._fast_tiers(items[i]['answer'], items[i]['model_answer'], items[i].get('question'), persona, started)
+            if decided: yield i, {"feedback": decided[0], "score": decided[1], "tier": decided[2]}
+            else: pending.append((i, cache_key))
+        packs = [pending[start:start + pack_size] for start in range(0, len(pending), pack_size)]
+        if not packs: return
+
+        with ThreadPoolExecutor(max_workers=min(len(packs), max_parallel_packs)) as pool:
+            futures = {pool.submit(self._evaluate_pack_with_gemini, [(items[i]['answer'], items[i]['model_answer'], items[i].get('question')) for i, _ in pack], persona): pack for pack in packs}
+            for future in as_completed(futures):
+                pack = futures[future]
+                try:
+                    graded = future.result()
+                except Exception as e:
+                    print(f"Gemini batch evaluation failed: {e}. Falling back to keyword matching for {len(pack)} answers.")
+                    graded = {}
+                for position, (i, cache_key) in enumerate(pack):
+                    if position in graded:
+                        (feedback, score), tier = graded[position], 'llm'
+                        if cache_key: self.cache.set(cache_key, [feedback, score])
+                    else:
+                        (feedback, score), tier = keyword[i], 'fallback'
+                    self._record_tier(tier, started)
+                    yield i, {"feedback": feedback, "score": score, "tier": tier}
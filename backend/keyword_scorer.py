@@ -0,0 +1,122 @@
+# backend/keyword_scorer.py
+import re
+import threading
+from collections import ChainMap, OrderedDict
+import numpy as np
+from utils import normalize_text
+
+_PUNCTUATION = re.compile(r'[^\w\s]')  # what normalize_text removes
+
+
+class KeywordScorer:
+    """
+    Word-overlap scoring with interned vocabularies.
+    Each model answer is tokenized once into a sorted array of unique vocabulary ids;
+    user answers are mapped onto the same ids, so a score is a set intersection
+    and a batch of scores is a single sort/searchsorted/bincount over all pairs.
+    """
+
+    def __init__(self, max_cached_answers=100_000, max_vocab=1_000_000):
+        self.vocab = {}
+        self.max_cached_answers = max_cached_answers
+        # Model answers may come from clients (/answer-batch), so the vocabulary stops growing at
+        # max_vocab words; once full it never changes, and newer words get per-call ids past it.
+        self.max_vocab = max_vocab
+        self._models = OrderedDict()  # model answer -> (sorted unique id array, frozenset of the same ids)
+        self._lock = threading.Lock()
+
+    def _model(self, model_answer, extra):
+        """
+        (ids, id set) of a model answer, interning new words; call with the lock held. Words a full
+        vocabulary cannot take get ids from `extra`, valid for one call, and their answer is not cached.
+        """
+        entry = self._models.get(model_answer)
+        if entry is not None:
+            self._models.move_to_end(model_answer)
+            return entry
+        vocab, ids = self.vocab, []
+        for token in normalize_text(model_answer).split():
+            index = vocab.get(token)
+            if index is None:
+                if len(vocab) < self.max_vocab: index = vocab[token] = len(vocab)
+                else: index = extra.setdefault(token, len(vocab) + len(extra))
+            ids.append(index)
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        entry = (ids, frozenset(ids.tolist()))
+        if ids.size and ids[-1] >= len(vocab): return entry
+        self._models[model_answer] = entry
+        if len(self._models) > self.max_cached_answers:
+            self._models.popitem(last=False)
+        return entry
+
+    def model_ids(self, model_answer):
+        """Returns the (cached) unique token ids of a model answer, interning new tokens while the vocabulary has room."""
+        with self._lock:
+            return self._model(model_answer, {})[0]
+
+    def preload(self, model_answers):
+        """Pre-tokenizes model answers (e.g. the whole question bank) ahead of scoring."""
+        for model_answer in model_answers:
+            self.model_ids(model_answer)
+
+    def user_ids(self, user_answer, extra=None):
+        """Maps a user answer onto known token ids (and those in `extra`); unknown words can never match and are dropped."""
+        vocab = ChainMap(self.vocab, extra) if extra else self.vocab
+        return [vocab[t] for t in normalize_text(user_answer or '').split() if t in vocab]
+
+    def score(self, user_answer, model_answer):
+        """Percentage of model-answer words found in the user answer, or None if the model answer is empty."""
+        extra = {}
+        with self._lock:
+            ids, id_set = self._model(model_answer, extra)
+        if not ids.size: return None
+        return len(id_set.intersection(self.user_ids(user_answer, extra))) / ids.size * 100
+
+    def score_many(self, user_answers, model_answers):
+        """
+        Scores many (user answer, model answer) pairs at once.
+        Returns a float array of percentages with NaN where the model answer is empty.
+        """
+        count = len(model_answers)
+        if not count: return np.zeros(0)
+
+        # Each distinct model answer gets a slot; its ids are offset into their own range
+        # of a single sorted key array, so membership for every pair is one searchsorted.
+        # The ids and the stride come from one locked snapshot: every model id is below the stride,
+        # and user words interned by other threads afterwards are dropped rather than colliding.
+        slots, model_arrays, pair_slots, extra = {}, [], np.empty(count, dtype=np.int64), {}
+        with self._lock:
+            for i, model_answer in enumerate(model_answers):
+                slot = slots.get(model_answer)
+                if slot is None:
+                    slot = slots[model_answer] = len(model_arrays)
+                    model_arrays.append(self._model(model_answer, extra)[0])
+                pair_slots[i] = slot
+            stride = max(len(self.vocab) + len(extra), 1)
+        slot_lengths = np.fromiter((ids.size for ids in model_arrays), dtype=np.int64, count=len(model_arrays))
+        model_keys = np.concatenate(model_arrays) + np.repeat(np.arange(len(model_arrays), dtype=np.int64) * stride, slot_lengths)
+
+        # Normalize all user answers in one pass, as normalize_text does but without its strip(),
+        # which would drop the separators around blank or punctuation-only first and last answers.
+        texts = [(u or '').replace('\x1e', ' ') for u in user_answers]
+        vocab = ChainMap(self.vocab, extra) if extra else self.vocab
+        user_ids, user_lengths = [], np.zeros(count, dtype=np.int64)
+        for i, text in enumerate(_PUNCTUATION.sub('', '\x1e'.join(texts).lower()).split('\x1e')):
+            ids = [vocab[t] for t in text.split() if t in vocab]
+            user_ids.extend(ids)
+            user_lengths[i] = len(ids)
+
+        pairs, user_ids = np.repeat(np.arange(count, dtype=np.int64), user_lengths), np.asarray(user_ids, dtype=np.int64)
+        known = user_ids < stride  # words interned after the snapshot are in no model answer here
+        pair_keys = np.sort(pairs[known] * stride + user_ids[known])
+        if pair_keys.size:  # dedupe repeated words within an answer
+            pair_keys = pair_keys[np.concatenate(([True], pair_keys[1:] != pair_keys[:-1]))]
+        pairs, words = np.divmod(pair_keys, stride)
+        lookup = pair_slots[pairs] * stride + words
+        positions = np.minimum(np.searchsorted(model_keys, lookup), max(model_keys.size - 1, 0))
+        found = model_keys[positions] == lookup if model_keys.size else np.zeros(lookup.size, dtype=bool)
+        matched = np.bincount(pairs[found], minlength=count)
+
+        model_lengths = slot_lengths[pair_slots]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(model_lengths > 0, matched / model_lengths * 100, np.nan)
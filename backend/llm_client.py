@@ -0,0 +1,425 @@
+# backend/llm_client.py
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from metrics import record
+
+DEFAULT_MODEL = 'gemini-1.5-flash'
+HEDGE_MIN_SAMPLES = 20  # successful calls needed before the p95 used for hedging is trusted
+LATENCY_SAMPLES = 200   # recent call latencies kept for the p95
+ASYNC_SLOT_POLL = (0.005, 0.05)  # first and longest wait, in seconds, between an async caller's tries for a busy slot
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails or returns something unusable."""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when an LLM call (or the wait for a free slot) exceeds its timeout."""
+
+
+class LLMUnavailableError(LLMError):
+    """Raised without calling the backend while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing or very slow LLM provider so callers get their fallback at once.
+    Closed: calls go through, and the last `window` outcomes are tracked; errors, timeouts
+    and calls slower than `slow_call_seconds` count as failures. Once at least `min_calls`
+    outcomes are known and `failure_ratio` of them failed, the breaker opens and rejects
+    calls for `open_seconds`. Then it is half-open: `probes` calls are let through, and
+    their outcome closes the breaker again or reopens it.
+    """
+
+    def __init__(self, window=20, min_calls=5, failure_ratio=0.5, slow_call_seconds=None, open_seconds=30.0, probes=1, clock=time.monotonic):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.clock = clock
+        self.state = 'closed'
+        self.rejected = 0
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)  # True for a failed call
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now; a True in the half-open state reserves a probe."""
+        with self._lock:
+            if self.state == 'open' and self.clock() - self._opened_at >= self.open_seconds:
+                self.state, self._probes_in_flight = 'half_open', 0
+            if self.state == 'closed': return True
+            if self.state == 'half_open' and self._probes_in_flight < self.probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok, seconds=0.0):
+        """Reports the outcome of an allowed call."""
+        failed = not ok or (self.slow_call_seconds is not None and seconds > self.slow_call_seconds)
+        with self._lock:
+            if self.state == 'half_open':
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed: self._open()
+                else: self.state = 'closed'; self._outcomes.clear()
+                return
+            if self.state != 'closed': return  # a call that started before the breaker opened
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) >= self.failure_ratio * len(self._outcomes):
+                self._open()
+
+    def skip(self):
+        """Reports an allowed call whose outcome says nothing about the provider, e.g. one cut short by its caller."""
+        with self._lock:
+            if self.state == 'half_open': self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _open(self):
+        if self.state != 'open': print(f"LLM circuit breaker opened; serving fallbacks for {self.open_seconds:.0f}s.")
+        self.state, self._opened_at = 'open', self.clock()
+        self.opened += 1
+        self._outcomes.clear()
+
+
+def parse_json_response(text):
+    """Parses a JSON response, tolerating ```json fences the model sometimes adds."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        fixed_text = text.strip().replace('```json', '').replace('```', '')
+        try:
+            return json.loads(fixed_text)
+        except json.JSONDecodeError as e:
+            raise LLMError(f"Model returned invalid JSON: {e}") from e
+
+
+class GeminiBackend:
+    """Talks to the Gemini API through a single, reused GenerativeModel."""
+
+    def __init__(self, model_name=DEFAULT_MODEL, api_key=None):
+        import google.generativeai as genai
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+        self._json_config = genai.types.GenerationConfig(response_mime_type="application/json")
+
+    def generate(self, prompt, json_mode=False):
+        config = self._json_config if json_mode else None
+        return self._model.generate_content(prompt, generation_config=config).text
+
+    async def agenerate(self, prompt, json_mode=False):
+        config = self._json_config if json_mode else None
+        response = await self._model.generate_content_async(prompt, generation_config=config)
+        return response.text
+
+    def stream(self, prompt):
+        for chunk in self._model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend:
+    """
+    Offline stand-in for Gemini, used by tests and load tests.
+    Replies are produced by `responder(prompt, json_mode)` if given, otherwise by
+    a canned reply shaped after what each prompt in the app asks for.
+    Delays are `latency` ± `jitter` seconds ('uniform'), or log-normal with median
+    `latency` and shape `jitter` ('lognormal'), which has the long tail of a real API.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, responder=None, failure_rate=0.0, seed=None, distribution='uniform'):
+        if distribution not in ('uniform', 'lognormal'): raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.responder = responder
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next_delay(self):
+        with self._lock:
+            self.calls += 1
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                raise LLMError("Simulated LLM failure.")
+            if self.distribution == 'lognormal': return self.latency * self._rng.lognormvariate(0.0, self.jitter)
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _reply(self, prompt, json_mode):
+        if self.responder:
+            return self.responder(prompt, json_mode)
+        if not json_mode:
+            if 'SCORE:' in prompt:
+                return "Fake feedback: reasonable answer.\nSCORE: 70"
+            return "This is a placeholder response from the fake LLM backend."
+        if '"evaluations"' in prompt:
+            match = re.search(r'exactly (\d+)', prompt)
+            count = int(match.group(1)) if match else 1
+            return json.dumps({"evaluations": [{"id": i + 1, "score": 70, "feedback": "Fake feedback: reasonable answer."} for i in range(count)]})
+        if '"score"' in prompt:
+            return json.dumps({"score": 70, "feedback": "Fake feedback: reasonable answer."})
+        if '"questions"' in prompt:
+            match = re.search(r'exactly (\d+)', prompt)
+            count = int(match.group(1)) if match else 1
+            return json.dumps({"questions": [{"question": f"What is fake question {i + 1}?", "answer": "A question produced offline."} for i in range(count)]})
+        if '"question"' in prompt:
+            return json.dumps({"question": "What is a fake question?", "answer": "A question produced offline."})
+        return json.dumps(["Python", "SQL", "Data Structures"])
+
+    def generate(self, prompt, json_mode=False):
+        time.sleep(self._next_delay())
+        return self._reply(prompt, json_mode)
+
+    async def agenerate(self, prompt, json_mode=False):
+        await asyncio.sleep(self._next_delay())
+        return self._reply(prompt, json_mode)
+
+    def stream(self, prompt):
+        """Yields the reply word by word, spreading the simulated latency across the words."""
+        delay = self._next_delay()
+        words = self._reply(prompt, False).split(' ')
+        for i, word in enumerate(words):
+            time.sleep(delay / len(words))
+            yield word if i == 0 else ' ' + word
+
+
+class LLMClient:
+    """
+    Shared entry point for every LLM call in the app.
+    At most `max_concurrency` backend calls are in flight at once, blocking, streaming and
+    async ones together; each call has a timeout that also covers the wait for a free slot.
+    With a `breaker`, calls fail fast with LLMUnavailableError while the provider is down,
+    so every call site goes straight to its fallback. With `hedge`, a blocking call that
+    is still running after the recent p95 latency gets a duplicate request (if a slot is
+    free), and whichever answers first wins.
+    """
+
+    def __init__(self, backend, max_concurrency=8, timeout=20.0, breaker=None, hedge=False):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.breaker = breaker
+        self.hedge = hedge
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm')
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._counters = {"hedged": 0, "hedge_wins": 0}
+        self._stats_lock = threading.Lock()
+
+    def _allow(self):
+        if self.breaker is not None and not self.breaker.allow():
+            raise LLMUnavailableError("LLM circuit breaker is open.")
+
+    def _record(self, ok, seconds):
+        if self.breaker is not None: self.breaker.record(ok, seconds)
+        if ok:
+            with self._stats_lock:
+                self._latencies.append(seconds)
+
+    def _record_timeout(self, timeout):
+        # A caller's short deadline (e.g. the retries in _get_dynamic_questions) running out is not a sign
+        # the provider is unhealthy; only timeouts at least as long as a healthy call may take count.
+        if self.breaker is None: return
+        healthy = self.breaker.slow_call_seconds if self.breaker.slow_call_seconds is not None else self.timeout
+        if timeout >= healthy: self.breaker.record(False, timeout)
+        else: self.breaker.skip()
+
+    def _hedge_delay(self):
+        """Seconds after which a call is hedged: the recent p95, or None while too little is known."""
+        if not self.hedge: return None
+        with self._stats_lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES: return None
+            latencies = sorted(self._latencies)
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+    def _submit(self, prompt, json_mode):
+        # The slot is released when the backend call really finishes, so abandoned
+        # calls still count against the concurrency limit.
+        future = self._executor.submit(self.backend.generate, prompt, json_mode)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._counters)
+        if self.breaker is not None:
+            stats.update(circuit=self.breaker.state, rejected=self.breaker.rejected, opened=self.breaker.opened)
+        return stats
+
+    def generate(self, prompt, json_mode=False, timeout=None):
+        """Blocking call; returns the response text or raises LLMError (LLMTimeoutError, LLMUnavailableError)."""
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        self._allow()
+        if not self._acquire(timeout):
+            # Every slot stayed busy for the whole timeout: the provider is not keeping up.
+            self._record_timeout(timeout)
+            raise LLMTimeoutError("Timed out waiting for a free LLM slot.")
+        sent = time.perf_counter()
+        pending, hedge_after, hedge = {self._submit(prompt, json_mode)}, self._hedge_delay(), None
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: raise LLMTimeoutError(f"LLM call timed out after {timeout:.2f}s.")
+                if hedge_after is not None: remaining = min(remaining, max(0.0, hedge_after - (time.perf_counter() - sent)))
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        self._record(True, time.perf_counter() - sent)
+                        if future is hedge: self._count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+                if done and not pending: raise error
+                if hedge_after is not None and time.perf_counter() - sent >= hedge_after:
+                    hedge_after = None
+                    if self._slots.acquire(blocking=False):
+                        hedge = self._submit(prompt, json_mode)
+                        pending.add(hedge)
+                        self._count("hedged")
+        except LLMTimeoutError:
+            self._record_timeout(timeout)
+            raise
+        except Exception:
+            self._record(False, time.perf_counter() - sent)
+            raise
+        finally:
+            record('llm_call', time.perf_counter() - sent)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._counters[name] += 1
+
+    def _acquire(self, timeout):
+        """Waits for a concurrency slot; the wait is recorded separately from the call itself."""
+        started = time.perf_counter()
+        acquired = self._slots.acquire(timeout=timeout)
+        record('llm_queue_wait', time.perf_counter() - started)
+        return acquired
+
+    def generate_json(self, prompt, timeout=None):
+        return parse_json_response(self.generate(prompt, json_mode=True, timeout=timeout))
+
+    def stream(self, prompt, timeout=None):
+        """
+        Yields response text chunks as the model produces them. The call holds one
+        concurrency slot until the stream ends; the timeout is checked between chunks.
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        self._allow()
+        if not self._acquire(timeout):
+            self._record_timeout(timeout)
+            raise LLMTimeoutError("Timed out waiting for a free LLM slot.")
+        sent = time.perf_counter()
+        first_chunk, ok = None, False
+        try:
+            for chunk in self.backend.stream(prompt):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - sent
+                    record('llm_first_chunk', first_chunk)
+                yield chunk
+                if time.monotonic() > deadline:
+                    raise LLMTimeoutError(f"LLM stream timed out after {timeout:.2f}s.")
+            ok = True
+        except GeneratorExit:
+            ok = first_chunk is not None  # the caller stopped reading a stream that was answering
+            raise
+        finally:
+            self._slots.release()
+            record('llm_stream', time.perf_counter() - sent)
+            # A stream's health is judged by its time to first chunk, not by its length.
+            self._record(ok, first_chunk if first_chunk is not None else time.perf_counter() - sent)
+
+    async def _async_acquire(self):
+        """
+        Takes a slot of the same semaphore as blocking calls, so sync and async callers together stay
+        within max_concurrency. The event loop must not block on it, so a busy semaphore is polled.
+        """
+        delay = ASYNC_SLOT_POLL[0]
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ASYNC_SLOT_POLL[1])
+
+    async def agenerate(self, prompt, json_mode=False, timeout=None):
+        """Async version of generate(); waits on the event loop instead of a thread."""
+        timeout = timeout or self.timeout
+        self._allow()
+
+        async def _call():
+            started = time.perf_counter()
+            await self._async_acquire()
+            sent = time.perf_counter()
+            record('llm_queue_wait', sent - started)
+            try:
+                return await self.backend.agenerate(prompt, json_mode)
+            finally:
+                self._slots.release()
+                record('llm_call', time.perf_counter() - sent)
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(_call(), timeout)
+        except asyncio.TimeoutError:
+            self._record_timeout(timeout)
+            raise LLMTimeoutError(f"LLM call timed out after {timeout:.2f}s.") from None
+        except BaseException:  # including cancellation, so a half-open probe is never left reserved
+            self._record(False, time.perf_counter() - started)
+            raise
+        self._record(True, time.perf_counter() - started)
+        return result
+
+    async def agenerate_json(self, prompt, timeout=None):
+        return parse_json_response(await self.agenerate(prompt, json_mode=True, timeout=timeout))
+
+
+def create_client_from_env(max_concurrency=None):
+    """Builds a client from MOCKVIEW_LLM_* environment variables."""
+    if os.getenv("MOCKVIEW_LLM_BACKEND", "gemini").lower() == "fake":
+        backend = FakeBackend(latency=float(os.getenv("MOCKVIEW_FAKE_LLM_LATENCY", "0.05")), jitter=float(os.getenv("MOCKVIEW_FAKE_LLM_JITTER", "0")),
+                              distribution=os.getenv("MOCKVIEW_FAKE_LLM_DISTRIBUTION", "uniform"))
+    else:
+        backend = GeminiBackend(os.getenv("MOCKVIEW_LLM_MODEL", DEFAULT_MODEL))
+    breaker = None
+    if os.getenv("MOCKVIEW_LLM_BREAKER", "1") == "1":
+        breaker = CircuitBreaker(slow_call_seconds=float(os.getenv("MOCKVIEW_LLM_SLOW_CALL", "8")), open_seconds=float(os.getenv("MOCKVIEW_LLM_BREAKER_OPEN", "30")))
+    return LLMClient(
+        backend,
+        max_concurrency=max_concurrency or int(os.getenv("MOCKVIEW_LLM_CONCURRENCY", "8")),
+        timeout=float(os.getenv("MOCKVIEW_LLM_TIMEOUT", "20")),
+        breaker=breaker,
+        hedge=os.getenv("MOCKVIEW_LLM_HEDGE", "0") == "1",
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the process-wide LLM client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client_from_env()
+    return _client
+
+
+def set_client(client):
+    """Replaces the process-wide LLM client (e.g. with a FakeBackend in tests)."""
+    global _client
+    _client = client
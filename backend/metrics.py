@@ -0,0 +1,244 @@
+# backend/metrics.py
+import os
+import json
+import time
+import random
+import bisect
+import cProfile
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from sub-millisecond local work up to slow LLM calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra: pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, tuple(labelnames), tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None: series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets): series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {values[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {values[-1]}")
+        return lines
+
+
+class Registry:
+    """
+    The histograms of this process, plus collectors that report other components' counters
+    (e.g. evaluator tiers) at scrape time. Each worker process has its own registry.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            if name not in self._histograms: self._histograms[name] = Histogram(name, help, labelnames, buckets)
+            return self._histograms[name]
+
+    def register_collector(self, collect):
+        """collect() returns [(name, type, help, [({label: value}, number)])], called on every scrape."""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for histogram in list(self._histograms.values()):
+            lines.extend(histogram.render())
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_labels(labels, labels.values())} {value}" for labels, value in samples]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.histogram('mockview_request_duration_seconds', 'Requests from arrival to the last byte of the body.', ('endpoint', 'method', 'status'))
+SPAN_SECONDS = REGISTRY.histogram('mockview_span_duration_seconds', 'Time spent in instrumented steps of a request or background job.', ('span',))
+
+
+class Trace:
+    """The spans recorded while serving one request, summed per span name."""
+    __slots__ = ('started', 'endpoint', 'spans')
+
+    def __init__(self, endpoint):
+        self.started = time.perf_counter()
+        self.endpoint = endpoint
+        self.spans = {}
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self):
+        """Value for the Server-Timing header, which browser dev tools show per request."""
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans.items())
+
+
+_current = contextvars.ContextVar('mockview_trace', default=None)
+
+
+def current_trace():
+    return _current.get()
+
+
+def record(name, seconds):
+    """Adds a timing to the span histogram and, inside a request, to its trace."""
+    SPAN_SECONDS.observe(seconds, name)
+    trace = _current.get()
+    if trace is not None: trace.add(name, seconds)
+
+
+@contextmanager
+def span(name):
+    """Times the block as span `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+class TracingMiddleware:
+    """
+    WSGI middleware that times every request until its body has been sent, so streamed
+    responses are measured in full. Requests slower than `slow_ms` are logged with their
+    span breakdown as one JSON line. With `profile_rate` > 0, that share of requests runs
+    under cProfile (one at a time), and profiles of the slow ones are saved to `profile_dir`.
+    """
+
+    def __init__(self, app, slow_ms=None, profile_rate=0.0, profile_dir=None, rng=None):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.profile_rate = profile_rate
+        self.profile_dir = profile_dir
+        self._rng = rng or random.Random()
+        self._profiling = threading.Lock()
+
+    def _start_profiler(self):
+        if not self.profile_rate or self._rng.random() >= self.profile_rate: return None
+        if not self._profiling.acquire(blocking=False): return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is already active in this interpreter
+            self._profiling.release()
+            return None
+        return profiler
+
+    def __call__(self, environ, start_response):
+        trace = Trace(environ.get('PATH_INFO', ''))
+        status = []
+        def traced_start_response(status_line, headers, exc_info=None):
+            status.append(status_line.split(' ', 1)[0])
+            # Called once the response is built, so the session save is included.
+            if trace.spans: headers = [*headers, ('Server-Timing', trace.server_timing())]
+            return start_response(status_line, headers, exc_info)
+        profiler = self._start_profiler()
+        token = _current.set(trace)
+        try:
+            body = self.app(environ, traced_start_response)
+        except BaseException:
+            self._finish(trace, environ, ['500'], profiler)
+            raise
+        finally:
+            _current.reset(token)
+        return _TracedBody(self, body, trace, environ, status, profiler)
+
+    def _finish(self, trace, environ, status, profiler):
+        seconds = time.perf_counter() - trace.started
+        if profiler is not None:
+            profiler.disable()
+            self._profiling.release()
+        REQUEST_SECONDS.observe(seconds, trace.endpoint, environ.get('REQUEST_METHOD', ''), status[0] if status else '500')
+        if self.slow_ms is None or seconds * 1000 < self.slow_ms: return
+        spans = {name: round(value * 1000, 2) for name, value in trace.spans.items()}
+        print(json.dumps({"slow_request": trace.endpoint, "method": environ.get('REQUEST_METHOD'), "status": status[0] if status else '500', "ms": round(seconds * 1000, 2), "spans_ms": spans}))
+        if profiler is not None and self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{trace.endpoint.strip('/').replace('/', '_') or 'root'}-{round(seconds * 1000)}ms.prof")
+            profiler.dump_stats(path)
+            print(f"Saved profile of slow request to {path} (view with: python -m pstats {path})")
+
+
+class _TracedBody:
+    """
+    A response body as TracingMiddleware returns it. The request is finished (timed, logged, its
+    profiler released) when the body is exhausted or closed, whichever comes first: WSGI servers
+    call close() even for a body they never iterate, e.g. after the client disconnected.
+    """
+
+    def __init__(self, middleware, body, trace, environ, status, profiler):
+        self.middleware, self.body, self.trace = middleware, body, trace
+        self.environ, self.status, self.profiler = environ, status, profiler
+        self._finished = False
+
+    def __iter__(self):
+        _current.set(self.trace)  # spans recorded while streaming still belong to this request
+        try:
+            yield from self.body
+        finally:
+            _current.set(None)
+        self.close()
+
+    def close(self):
+        if self._finished: return
+        self._finished = True
+        try:
+            if hasattr(self.body, 'close'): self.body.close()
+        finally:
+            self.middleware._finish(self.trace, self.environ, self.status, self.profiler)
+
+
+def instrument(app, slow_ms=None, profile_rate=0.0, profile_dir=None):
+    """Wraps a Flask app in TracingMiddleware and labels requests by route instead of raw path."""
+    from flask import request
+
+    @app.after_request
+    def label_request(response):
+        trace = _current.get()
+        if trace is not None: trace.endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        return response
+
+    app.wsgi_app = TracingMiddleware(app.wsgi_app, slow_ms, profile_rate, profile_dir)
+    return app
@@ -0,0 +1,114 @@
+# backend/prefetch.py
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class Prefetcher:
+    """
+    Speculative work done between requests of a session, e.g. picking the next question
+    while the user reads their feedback. Each session has one slot per kind of work; a slot
+    holds the future and the key it was computed for, and take() only hands the result
+    over if the key still matches what the request needs. Slots live in this process, so
+    a request served by another worker simply misses and does the work itself.
+    """
+
+    def __init__(self, max_workers=4, max_sessions=1024):
+        self.max_sessions = max_sessions
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._slots = OrderedDict()  # session id -> {kind: (key, future)}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "hits": 0, "misses": 0, "stale": 0, "failed": 0}
+
+    def submit(self, sid, kind, key, fn, *args):
+        """Runs fn(*args) in the background for the session's `kind` slot, unless it already holds `key`."""
+        with self._lock:
+            slots = self._slots.setdefault(sid, {})
+            self._slots.move_to_end(sid)
+            if kind in slots and slots[kind][0] == key: return slots[kind][1]
+            future = self._executor.submit(fn, *args)
+            slots[kind] = (key, future)
+            self._stats["submitted"] += 1
+            while len(self._slots) > self.max_sessions:
+                self._slots.popitem(last=False)
+        return future
+
+    def take(self, sid, kind, key, timeout=None):
+        """
+        Empties the slot and returns its result, waiting up to `timeout` seconds if it is still
+        running. Returns None if there is nothing for `key` or the work failed or timed out.
+        """
+        with self._lock:
+            entry = self._slots.get(sid, {}).pop(kind, None)
+        if entry is None or entry[0] != key:
+            self._count("stale" if entry else "misses")
+            return None
+        try:
+            result = entry[1].result(timeout)
+        except FutureTimeout:
+            self._count("misses")
+            return None
+        except Exception as e:
+            print(f"Error in prefetched {kind}: {e}")
+            self._count("failed")
+            return None
+        self._count("hits" if result is not None else "misses")
+        return result
+
+    def discard(self, sid):
+        """Drops every slot of a session, e.g. when it starts a new interview."""
+        with self._lock:
+            self._slots.pop(sid, None)
+
+    def _count(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "sessions": len(self._slots)}
+
+
+class WarmPool:
+    """
+    A few pre-generated items per key (e.g. dynamic questions per topic and persona), refilled
+    in the background. take() never blocks: it returns a ready item or None and tops the pool
+    up, so callers only wait on generation when the pool was never warmed.
+    """
+
+    def __init__(self, generate, size=2, max_workers=2):
+        self.generate = generate
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='warm-pool')
+        self._ready = {}    # key -> deque of items
+        self._pending = {}  # key -> generations in flight
+        self._lock = threading.Lock()
+
+    def take(self, *key):
+        with self._lock:
+            ready = self._ready.get(key)
+            item = ready.popleft() if ready else None
+        self.refill(*key)
+        return item
+
+    def refill(self, *key):
+        """Starts enough generations to bring the pool for `key` back to `size`; returns their futures."""
+        with self._lock:
+            missing = self.size - len(self._ready.get(key, ())) - self._pending.get(key, 0)
+            if missing <= 0: return []
+            self._pending[key] = self._pending.get(key, 0) + missing
+        return [self._executor.submit(self._generate, key) for _ in range(missing)]
+
+    def _generate(self, key):
+        item = None
+        try:
+            item = self.generate(*key)
+        finally:
+            with self._lock:
+                self._pending[key] -= 1
+                if item is not None: self._ready.setdefault(key, deque()).append(item)
+        return item
+
+    def stats(self):
+        with self._lock:
+            return {"ready": sum(map(len, self._ready.values())), "pending": sum(self._pending.values())}
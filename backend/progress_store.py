@@ -0,0 +1,156 @@
+# backend/progress_store.py
+import os
+import sys
+import base64
+import hashlib
+import threading
+from question_bank import Bitset
+from session_store import MemorySessionStore, SQLiteSessionStore, RedisSessionStore
+
+PROGRESS_TTL = 365 * 24 * 3600  # seconds a user's progress is kept after their last answer
+
+
+def encode_runs(bitset):
+    """
+    Run-length encodes a bitset as LEB128 varints of alternating run lengths, starting with
+    a (possibly empty) run of zeros. Answered questions cluster, so a topic answered from
+    start to end costs a few bytes however many questions it has.
+    """
+    value, out = int.from_bytes(bitset.bits, 'little'), bytearray()
+    while value:
+        zeros = (value & -value).bit_length() - 1
+        value >>= zeros
+        ones = ((value ^ (value + 1)) >> 1).bit_length()
+        value >>= ones
+        for run in (zeros, ones):
+            while run >= 0x80:
+                out.append(run & 0x7F | 0x80)
+                run >>= 7
+            out.append(run)
+    return bytes(out)
+
+
+def decode_runs(data):
+    """Inverse of encode_runs."""
+    value, position, runs, run, shift = 0, 0, [], 0, 0
+    for byte in data:
+        run |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80: continue
+        runs.append(run)
+        run, shift = 0, 0
+    for zeros, ones in zip(runs[::2], runs[1::2]):
+        value |= ((1 << ones) - 1) << (position + zeros)
+        position += zeros + ones
+    return Bitset(value.to_bytes((value.bit_length() + 7) // 8, 'little'))
+
+
+class ProgressStore:
+    """
+    Answered bank questions per user, kept server-side instead of in the browser.
+    Each (user, topic) record is the topic's version fingerprint plus a run-length encoded
+    bitmap over the question positions of that version, so reading or updating progress
+    costs the same however many questions a user has answered. The id order of every
+    version that progress was saved against is stored once in `versions` (by default an
+    unbounded in-process store), so bitmaps written before a topic file was edited are
+    mapped onto the new positions by id when next read. `versions` must not be `store`
+    itself: records are updated atomically by the store while the versions are read.
+    """
+
+    def __init__(self, store, versions=None):
+        self.store = store
+        self.versions = versions or MemorySessionStore(max_sessions=sys.maxsize, ttl=float('inf'))
+        self._fingerprints = {}  # topic -> (ids sequence it was computed from, fingerprint)
+        self._saved_versions = set()
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, bank, topic):
+        ids = bank.topic_ids(topic)
+        with self._lock:
+            cached = self._fingerprints.get(topic)
+            if cached and cached[0] is ids: return cached[1]
+        fingerprint = hashlib.blake2b('\n'.join(ids).encode('utf-8'), digest_size=8).hexdigest()
+        with self._lock:
+            self._fingerprints[topic] = (ids, fingerprint)
+        return fingerprint
+
+    def _save_version(self, fingerprint, bank, topic):
+        if fingerprint in self._saved_versions: return
+        if self.versions.get(f"version:{fingerprint}") is None:
+            self.versions.set(f"version:{fingerprint}", '\n'.join(bank.topic_ids(topic)).encode('utf-8'))
+        self._saved_versions.add(fingerprint)
+
+    def version(self, bank, topic):
+        """The topic's current version fingerprint; its id order is saved, so positions recorded against it can be remapped later."""
+        fingerprint = self._fingerprint(bank, topic)
+        self._save_version(fingerprint, bank, topic)
+        return fingerprint
+
+    def remapper(self, fingerprint, topic, bank):
+        """position -> current position (or None if the question is gone) for version `fingerprint`; None if that version is unknown."""
+        old_ids = self.versions.get(f"version:{fingerprint}")
+        if old_ids is None: return None
+        old_ids = bytes(old_ids).decode('utf-8').split('\n')
+        return lambda position: bank.position_of(topic, old_ids[position]) if position < len(old_ids) else None
+
+    def _decode(self, record, topic, bank):
+        """Bitset of the current positions in a stored record, remapped by id if the topic changed since."""
+        if record is None: return Bitset()
+        fingerprint, _, encoded = bytes(record).decode('ascii').partition(':')
+        bits = decode_runs(base64.b64decode(encoded))
+        if fingerprint == self._fingerprint(bank, topic): return bits
+        remap, remapped = self.remapper(fingerprint, topic, bank), Bitset()
+        if remap is None: return remapped
+        for position in bits:
+            new_position = remap(position)
+            if new_position is not None: remapped.add(new_position)
+        return remapped
+
+    def answered(self, user, topic, bank):
+        """Bitset of the current positions of the questions `user` answered in `topic`."""
+        if not bank.has_topic(topic): return Bitset()
+        return self._decode(self.store.get(f"{user}:{topic}"), topic, bank)
+
+    def mark(self, user, topic, positions, bank):
+        """Records answered positions of `topic` (a delta); returns how many were new."""
+        fingerprint = self._fingerprint(bank, topic)
+        self._save_version(fingerprint, bank, topic)
+        new = []
+        def add(record):
+            # An atomic read-modify-write, so answers saved at the same time (e.g. from two tabs) are all kept.
+            bits = self._decode(record, topic, bank)
+            new[:] = [position for position in positions if position not in bits]
+            if not new: return None
+            for position in new: bits.add(position)
+            return f"{fingerprint}:{base64.b64encode(encode_runs(bits)).decode('ascii')}".encode('ascii')
+        self.store.update(f"{user}:{topic}", add)
+        return len(new)
+
+    def mark_question(self, user, question_id, bank):
+        """Records one answered bank question; unknown (e.g. dynamic) ids are ignored."""
+        return self.merge(user, [question_id], bank)
+
+    def merge(self, user, question_ids, bank):
+        """Folds a list of answered ids (e.g. a browser's old local history) into the user's progress."""
+        by_topic = {}
+        for question_id in question_ids:
+            topic = bank.topic_for(question_id) if isinstance(question_id, str) else None
+            if topic is not None: by_topic.setdefault(topic, []).append(bank.position_of(topic, question_id))
+        return sum(self.mark(user, topic, positions, bank) for topic, positions in by_topic.items())
+
+
+def create_progress_store_from_env(default_sqlite_path):
+    """
+    Uses the session backend (MOCKVIEW_SESSION_BACKEND) with a year-long TTL; SQLite progress gets its own file.
+    Versions never expire: one is written once per topic edit, and records of users who keep answering refer to it for years.
+    """
+    backend = os.getenv("MOCKVIEW_SESSION_BACKEND", "sqlite").lower()
+    if backend == "memory":
+        # Versions stay out of the LRU, where evicting one would silently drop the progress saved against it.
+        return ProgressStore(MemorySessionStore(max_sessions=100_000, ttl=PROGRESS_TTL))
+    # Versions get their own connection to the same database, as `store` is busy during an update.
+    if backend == "redis":
+        url = os.getenv("MOCKVIEW_SESSION_URL", "redis://localhost:6379/0")
+        return ProgressStore(*(RedisSessionStore(url, ttl=ttl, prefix='mockview:progress:') for ttl in (PROGRESS_TTL, float('inf'))))
+    path = os.getenv("MOCKVIEW_PROGRESS_URL", default_sqlite_path)
+    return ProgressStore(*(SQLiteSessionStore(path, ttl=ttl) for ttl in (PROGRESS_TTL, float('inf'))))
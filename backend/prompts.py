@@ -0,0 +1,31 @@
+# backend/prompts.py
+# Prompt builders shared by the live server (app.py) and the offline precompute job
+# (notebooks/generate.py), so precomputed hints/explanations match live ones exactly.
+
+PERSONAS = ['Friendly', 'Strict', 'Neutral']
+
+def get_persona_prompt(persona: str):
+    """Returns the system prompt instruction based on the selected persona."""
+    if persona == 'Friendly':
+        return "You are an AI assistant acting as a friendly and encouraging teammate. Your tone should be collaborative and positive."
+    elif persona == 'Strict':
+        return "You are an AI assistant acting as a strict, direct senior engineer. You value accuracy and conciseness. Your response should be technical and to-the-point."
+    else: # Neutral
+        return "You are a helpful AI assistant. Your tone should be professional and neutral."
+
+def build_hint_prompt(question: str, persona: str = 'Neutral'):
+    persona_instruction = get_persona_prompt(persona)
+    return f"""
+        {persona_instruction}
+        The user is stuck on the following technical interview question: "{question}"
+        Your task is to provide a single, concise, one-sentence hint that guides the user toward the main concept, but does NOT give away the answer.
+        """
+
+def build_explanation_prompt(question: str, answer: str, persona: str = 'Neutral'):
+    return f"""
+        Act as a patient and knowledgeable computer science tutor, with the personality of a {persona} interviewer.
+        A user has just seen the answer to an interview question and wants to understand the core concept better.
+        The question was: "{question}"
+        The correct answer provided was: "{answer}"
+        Your task is to explain the underlying concept in a simple, easy-to-understand way, matching your persona. Use an analogy if it helps.
+        """
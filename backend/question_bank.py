@@ -0,0 +1,307 @@
+# backend/question_bank.py
+import sys
+import random
+
+# How many random draws the sampler attempts before falling back to a scan.
+# With k of n questions excluded the expected number of draws is n / (n - k),
+# so this only gives up when almost the whole topic has been asked.
+MAX_REJECTION_TRIES = 32
+
+
+class Bitset:
+    """A growable bitset over small integer indices, backed by a bytearray."""
+    __slots__ = ('bits',)
+
+    def __init__(self, bits=None):
+        self.bits = bytearray(bits) if bits is not None else bytearray()
+
+    def add(self, index):
+        byte = index >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (index & 7)
+
+    def __contains__(self, index):
+        byte = index >> 3
+        return 0 <= byte < len(self.bits) and bool(self.bits[byte] >> (index & 7) & 1)
+
+    def __len__(self):
+        return int.from_bytes(self.bits, 'little').bit_count()
+
+    def __iter__(self):
+        for byte_index, byte in enumerate(self.bits):
+            while byte:
+                low = byte & -byte
+                yield (byte_index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def union(self, other):
+        """Returns a new bitset holding the indices of both bitsets."""
+        size = max(len(self.bits), len(other.bits))
+        merged = int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little')
+        return Bitset(merged.to_bytes(size, 'little'))
+
+    def to_bytes(self):
+        return bytes(self.bits.rstrip(b'\x00'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data or b'')
+
+
+# Identical tag lists (very common within a topic) share one interned tuple.
+_interned_tags = {}
+
+
+class Question:
+    """
+    A bank question. Slots plus interned difficulty and tags keep the bank compact;
+    read-only dict-style access lets call sites use it like the JSON record.
+    """
+    __slots__ = ('id', 'question', 'answer', 'difficulty', 'tags')
+    FIELDS = __slots__
+
+    def __init__(self, id, question, answer, difficulty='medium', tags=()):
+        self.id = id
+        self.question = question
+        self.answer = answer
+        self.difficulty = sys.intern(difficulty)
+        tags = tuple(sys.intern(tag) for tag in tags)
+        self.tags = _interned_tags.setdefault(tags, tags)
+
+    @classmethod
+    def from_dict(cls, record):
+        if isinstance(record, cls): return record
+        return cls(record['id'], record.get('question', ''), record.get('answer', ''), record.get('difficulty') or 'medium', record.get('tags') or ())
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS: raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        return {"id": self.id, "question": self.question, "answer": self.answer, "difficulty": self.difficulty, "tags": list(self.tags)}
+
+    def __repr__(self):
+        return f"Question({self.id!r})"
+
+    def approx_size(self):
+        """Bytes held by this record; interned difficulty and tags are shared and not counted."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(value) for value in (self.id, self.question, self.answer))
+
+
+def positions_mask(positions):
+    """An int with the bit of every position set, for counting what is left of a pool with one popcount."""
+    bits = Bitset()
+    for position in positions: bits.add(position)
+    return int.from_bytes(bits.bits, 'little')
+
+
+def nth_set_bit(value, rank):
+    """Index of the `rank`-th (from 0) set bit of `value`; whole blocks of bits are skipped by their popcount."""
+    data = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+    start, end = 0, len(data)
+    for size in (512, 8, 1):
+        for block in range(start, end, size):
+            count = int.from_bytes(data[block:block + size], 'little').bit_count()
+            if rank < count:
+                start, end = block, min(block + size, end)
+                break
+            rank -= count
+    byte = data[start]
+    for bit in range(8):
+        if byte >> bit & 1:
+            if rank == 0: return start * 8 + bit
+            rank -= 1
+    raise ValueError("rank is not below the number of set bits")
+
+
+def sample_position(candidates, excluded, rng=random, mask=None):
+    """
+    Picks a random element of `candidates` (a sequence of topic positions) that is not in
+    the `excluded` Bitset, or None. Expected O(1) until almost every candidate is excluded.
+    Past that, `mask` (the int bitmask of the candidates) turns the leftovers into one
+    popcount: an exhausted pool is known at once and the rest is drawn from by rank.
+    """
+    n = len(candidates)
+    if not n:
+        return None
+    for _ in range(MAX_REJECTION_TRIES):
+        position = candidates[rng.randrange(n)]
+        if position not in excluded:
+            return position
+    if mask is not None:
+        free = mask & ~int.from_bytes(excluded.bits, 'little')
+        left = free.bit_count()
+        return nth_set_bit(free, rng.randrange(left)) if left else None
+
+    # Dense exclusion: pick the r-th free candidate without copying the list.
+    free = sum(1 for position in candidates if position not in excluded)
+    if free <= 0:
+        return None
+    target = rng.randrange(free)
+    for position in candidates:
+        if position not in excluded:
+            if target == 0:
+                return position
+            target -= 1
+    return None
+
+
+class _TopicPool:
+    """The questions of one topic, stored in file order with an id -> position map."""
+    __slots__ = ('ids', 'questions', 'positions', 'source', '_by_difficulty')
+
+    def __init__(self, questions):
+        self.questions = [Question.from_dict(q) for q in questions if q.get('id') is not None]
+        self.ids = [q['id'] for q in self.questions]
+        self.positions = {qid: i for i, qid in enumerate(self.ids)}
+        self.source = None  # in memory; pools served from a compiled bank point at it
+        self._by_difficulty = None
+
+    def by_difficulty(self):
+        """{difficulty: [positions]}, built on first use."""
+        if self._by_difficulty is None:
+            pools = {}
+            for position, question in enumerate(self.questions):
+                pools.setdefault(question.difficulty, []).append(position)
+            self._by_difficulty = pools
+        return self._by_difficulty
+
+
+class QuestionBank:
+    """
+    In-memory question store that is indexed once at load time.
+    Questions are addressed by id globally and by a small integer position within
+    their topic, which lets callers track asked questions as a compact Bitset.
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        self.topic_of = {}
+        self.compiled = None
+        self._pools = {}
+        self._masks = {}  # topic -> (pool, {difficulty: positions_mask})
+
+    def add_compiled(self, compiled, topics=None):
+        """Serves `topics` (default: all) from a memory-mapped CompiledBank instead of memory."""
+        self.compiled = compiled
+        for topic in compiled.topics if topics is None else topics:
+            self._pools[topic] = compiled.pool(topic)
+
+    def add_topic(self, topic, questions):
+        """Indexes (or re-indexes) all questions of a topic."""
+        old_pool = self._pools.get(topic)
+        if old_pool and old_pool.source is None:
+            for qid in old_pool.ids:
+                self.by_id.pop(qid, None)
+                self.topic_of.pop(qid, None)
+        pool = _TopicPool(questions or [])
+        self._pools[topic] = pool
+        for question in pool.questions:
+            self.by_id[question['id']] = question
+            self.topic_of[question['id']] = topic
+
+    def has_topic(self, topic):
+        return topic in self._pools
+
+    def topics(self):
+        return list(self._pools)
+
+    def _compiled_lookup(self, question_id):
+        """Returns (record number, topic) for an id served from the compiled bank, else (None, None)."""
+        if self.compiled is None: return None, None
+        number = self.compiled.find(question_id)
+        topic = self.compiled.topic_of(number) if number is not None else None
+        pool = self._pools.get(topic)
+        return (number, topic) if pool is not None and pool.source is self.compiled else (None, None)
+
+    def get(self, question_id):
+        question = self.by_id.get(question_id)
+        if question is None:
+            number, _ = self._compiled_lookup(question_id)
+            if number is not None: question = self.compiled.question_at(number)
+        return question
+
+    def topic_for(self, question_id):
+        """Returns the topic holding a question id, or None."""
+        return self.topic_of.get(question_id) or self._compiled_lookup(question_id)[1]
+
+    def questions(self):
+        """Iterates over every question, topic by topic."""
+        for pool in self._pools.values():
+            yield from pool.questions
+
+    def __len__(self):
+        return sum(len(pool.ids) for pool in self._pools.values())
+
+    def topic_questions(self, topic):
+        pool = self._pools.get(topic)
+        return pool.questions if pool else []
+
+    def topic_ids(self, topic):
+        pool = self._pools.get(topic)
+        return pool.ids if pool else []
+
+    def topic_size(self, topic):
+        pool = self._pools.get(topic)
+        return len(pool.ids) if pool else 0
+
+    def position_of(self, topic, question_id):
+        """Returns the index of a question within its topic, or None if unknown."""
+        pool = self._pools.get(topic)
+        return pool.positions.get(question_id) if pool else None
+
+    def exclusion_set(self, topic, question_ids):
+        """Converts an iterable of question ids into a Bitset of positions for the topic."""
+        excluded = Bitset()
+        pool = self._pools.get(topic)
+        if pool:
+            for qid in question_ids:
+                position = pool.positions.get(qid)
+                if position is not None:
+                    excluded.add(position)
+        return excluded
+
+    def sample(self, topic, excluded=None, rng=random):
+        """
+        Picks a random question from the topic whose position is not in `excluded`.
+        `excluded` may be a Bitset of positions or any iterable of question ids.
+        Returns None when the topic is unknown or every question is excluded.
+        """
+        pool = self._pools.get(topic)
+        if not pool or not pool.ids:
+            return None
+        if excluded is None:
+            excluded = Bitset()
+        elif not isinstance(excluded, Bitset):
+            excluded = self.exclusion_set(topic, excluded)
+
+        position = sample_position(range(len(pool.ids)), excluded, rng, (1 << len(pool.ids)) - 1)
+        return pool.questions[position] if position is not None else None
+
+    def question_at(self, topic, position):
+        pool = self._pools.get(topic)
+        return pool.questions[position] if pool and 0 <= position < len(pool.ids) else None
+
+    def difficulty_positions(self, topic):
+        """{difficulty: [positions]} for a topic, so callers can sample one difficulty in O(1)."""
+        pool = self._pools.get(topic)
+        return pool.by_difficulty() if pool else {}
+
+    def difficulty_masks(self, topic):
+        """{difficulty: int bitmask of its positions}, matching difficulty_positions; built once per pool."""
+        pool = self._pools.get(topic)
+        if pool is None: return {}
+        cached = self._masks.get(topic)
+        if cached is None or cached[0] is not pool:
+            cached = self._masks[topic] = (pool, {difficulty: positions_mask(positions) for difficulty, positions in pool.by_difficulty().items()})
+        return cached[1]
@@ -0,0 +1,156 @@
+# backend/question_loader.py
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from question_bank import Question
+from bank_format import source_signature
+
+REQUIRED_FIELDS = ('id', 'question', 'answer')
+
+
+class KnownIds(dict):
+    """
+    The `seen_ids` for validate_questions when a bank already holds questions (e.g. from a
+    compiled bank): ids are checked against the bank without listing all of them up front.
+    Topics in `replacing` are being reloaded, so their current ids don't count.
+    """
+
+    def __init__(self, bank, replacing=()):
+        super().__init__()
+        self.bank = bank
+        self.replacing = set(replacing)
+
+    def _bank_topic(self, question_id):
+        topic = self.bank.topic_for(question_id)
+        return topic if topic not in self.replacing else None
+
+    def __contains__(self, question_id):
+        return super().__contains__(question_id) or self._bank_topic(question_id) is not None
+
+    def __missing__(self, question_id):
+        topic = self._bank_topic(question_id)
+        if topic is None: raise KeyError(question_id)
+        return topic
+
+
+def validate_questions(topic, records, seen_ids):
+    """
+    Checks a topic's records against the question schema. Returns (questions, errors):
+    Question objects for valid records, and one message per skipped record.
+    `seen_ids` is shared across topics so ids are unique bank-wide.
+    """
+    if records == {}:
+        return [], []  # placeholder file for a topic with no questions yet
+    if not isinstance(records, list):
+        return [], [f"{topic}: expected a list of questions, got {type(records).__name__}"]
+    questions, errors = [], []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"{topic}[{i}]: not an object")
+            continue
+        missing = [field for field in REQUIRED_FIELDS if not isinstance(record.get(field), str) or not record[field].strip()]
+        if missing:
+            errors.append(f"{topic}[{i}]: missing or empty {', '.join(missing)}")
+            continue
+        tags = record.get('tags', [])
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            errors.append(f"{topic}[{i}] ({record['id']}): tags must be a list of strings")
+            continue
+        if not isinstance(record.get('difficulty') or '', str):
+            errors.append(f"{topic}[{i}] ({record['id']}): difficulty must be a string")
+            continue
+        if record['id'] in seen_ids:
+            errors.append(f"{topic}[{i}]: duplicate id {record['id']!r} (first seen in {seen_ids[record['id']]})")
+            continue
+        seen_ids[record['id']] = topic
+        questions.append(Question.from_dict(record))
+    return questions, errors
+
+
+def overlay_path(filepath):
+    """The append-only JSON Lines file next to a topic file, holding questions added since it was last compacted."""
+    return (filepath[:-len('.json')] if filepath.endswith('.json') else filepath) + '.jsonl'
+
+
+def read_overlay(filepath):
+    """
+    Records appended to a topic file's overlay, [] if it has none. An unterminated last
+    line is a write still in progress and is left for the next read.
+    """
+    try:
+        with open(overlay_path(filepath), 'r', encoding='utf-8') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in data.split('\n')[:-1]:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue  # a line cut short by an interrupted append
+    return records
+
+
+def merge_overlay(records, overlay):
+    """
+    A topic file's records followed by its overlay's. Overlay records whose id the file
+    already holds were left behind by an interrupted compaction and are dropped.
+    """
+    records = records if isinstance(records, list) else []
+    if not overlay: return records
+    ids = {record.get('id') for record in records if isinstance(record, dict)}
+    return records + [record for record in overlay if not isinstance(record, dict) or record.get('id') not in ids]
+
+
+def topic_signature(filepath):
+    """source_signature of a topic file, extended with its overlay's so appends count as changes."""
+    signature, overlay = source_signature(filepath), source_signature(overlay_path(filepath))
+    return signature if overlay is None else {**(signature or {}), "overlay": overlay}
+
+
+def _read_topic(load, filepath):
+    """Returns (records or None if the file is missing, error message, seconds). Includes the topic's overlay."""
+    started = time.perf_counter()
+    try:
+        records, error = load(filepath), None
+        overlay = read_overlay(filepath)
+        if overlay: records = merge_overlay(records, overlay)
+    except FileNotFoundError:
+        records, error = None, None
+    except ValueError as e:
+        records, error = None, str(e)
+    return records, error, time.perf_counter() - started
+
+
+def load_topics(topic_files, load, max_workers=8, seen_ids=None):
+    """
+    Reads every topic file in parallel with `load` (the JSON reader) and validates the results.
+    Returns (questions by topic, report); missing or unreadable topics are absent from the
+    questions and listed in the report, whose per-topic entries hold counts, load time and memory.
+    """
+    started = time.perf_counter()
+    topics = list(topic_files)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(topics) or 1))) as pool:
+        results = list(pool.map(lambda topic: _read_topic(load, topic_files[topic]), topics))
+
+    questions, report = {}, {"topics": {}, "missing": [], "errors": []}
+    seen_ids = {} if seen_ids is None else seen_ids
+    for topic, (records, error, seconds) in zip(topics, results):
+        if error:
+            report["errors"].append(f"{topic}: {error}")
+            continue
+        if records is None:
+            report["missing"].append(topic)
+            continue
+        questions[topic], errors = validate_questions(topic, records, seen_ids)
+        report["errors"].extend(errors)
+        report["topics"][topic] = {
+            "source": "json",
+            "questions": len(questions[topic]),
+            "skipped": len(errors),
+            "load_ms": round(seconds * 1000, 2),
+            "bytes": sum(q.approx_size() for q in questions[topic]),
+        }
+    report["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    report["total_bytes"] = sum(entry["bytes"] for entry in report["topics"].values())
+    return questions, report
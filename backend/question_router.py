@@ -1,40 +1,245 @@
 # backend/question_router.py
-import random
+import os
+import time
+import threading
 from utils import load_json
+from question_bank import QuestionBank
+from question_loader import KnownIds, load_topics, topic_signature
+from bank_format import CompiledBank, source_signature
+from tag_index import TagIndex
+from skill_extractor import SkillExtractor
+from scheduler import AdaptiveScheduler
+
+TOPICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topics.json')
+
+
+def _list_topic_files(data_path):
+    """Topic name -> path for every JSON file in the data directory (empty if it does not exist)."""
+    try:
+        with os.scandir(data_path) as entries:
+            return {entry.name[:-len('.json')]: f"{data_path}/{entry.name}" for entry in entries if entry.name.endswith('.json')}
+    except FileNotFoundError:
+        return {}
+
+
+class BankSnapshot:
+    """
+    One loaded version of the question bank: topic list, files, questions, indexes and load report.
+    A snapshot is never modified once published; reloads build a new one and swap it in,
+    so a request that grabbed a snapshot sees a consistent bank however long it runs.
+    """
+
+    def __init__(self, topics, topic_files, signatures):
+        self.topics = topics
+        self.subtopics = {}  # topic -> subtopic names, from topics.json
+        self.topic_files = topic_files
+        self.signatures = signatures
+        self.questions = {}
+        self.missing_topics = set()
+        self.bank = QuestionBank()
+        self.compiled = None
+        self.compiled_topics = []
+        self.load_report = None
+        self._tag_index = None
+        self._skill_extractor = None
+
+    def available_topics(self):
+        """Topics that loaded (possibly with no questions yet), in topics.json order."""
+        return [topic for topic in self.topics if topic in self.questions]
+
+    def tag_index(self):
+        """Builds the tag index the first time it is needed; a racing duplicate build is harmless."""
+        if self._tag_index is None:
+            # The compiled postings are only complete if nothing is served from JSON.
+            from_json = [topic for topic, questions in self.questions.items() if questions and topic not in self.compiled_topics]
+            if self.compiled is not None and not from_json and len(self.compiled_topics) == len(self.compiled.topics):
+                self._tag_index = TagIndex.from_compiled(self.compiled)
+            else:
+                self._tag_index = TagIndex.from_bank(self.bank)
+        return self._tag_index
+
+    def skill_extractor(self):
+        """Builds the matcher for skills named in job descriptions the first time it is needed."""
+        if self._skill_extractor is None:
+            self._skill_extractor = SkillExtractor.from_bank(self.tag_index().postings, self.subtopics)
+        return self._skill_extractor
+
 
 class QuestionRouter:
-    def __init__(self, data_path):
-        self.data_path = data_path 
-        self.topics = list(load_json('topics.json').keys())
-        self.loaded_questions = {}
-
-    def _load_topic(self, topic):
-        if topic not in self.loaded_questions:
-            try:
-                filepath = f"{self.data_path}/{topic}.json"
-                self.loaded_questions[topic] = load_json(filepath)
-            except FileNotFoundError:
-                print(f"ERROR: Could not find question file for topic '{topic}' at path: {filepath}")
-                return None
-        return self.loaded_questions[topic]
+    def __init__(self, data_path, max_workers=8, compiled_path=None):
+        self.data_path = data_path
+        self.compiled_path = compiled_path
+        self.max_workers = max_workers
+        self._reload_lock = threading.Lock()  # serializes reloads; readers never take it
+        self._listeners = []
+        self._stop_watching = threading.Event()
+        self._watcher = None
+        self.scheduler = AdaptiveScheduler()
+        self.snapshot = self._build_snapshot()
+
+    # Read-only views of the current snapshot.
+    topics = property(lambda self: self.snapshot.topics)
+    topic_files = property(lambda self: self.snapshot.topic_files)
+    questions = property(lambda self: self.snapshot.questions)
+    missing_topics = property(lambda self: self.snapshot.missing_topics)
+    bank = property(lambda self: self.snapshot.bank)
+    compiled = property(lambda self: self.snapshot.compiled)
+    compiled_topics = property(lambda self: self.snapshot.compiled_topics)
+    load_report = property(lambda self: self.snapshot.load_report)
+
+    def _build_snapshot(self, previous=None):
+        """
+        Loads the bank from disk into a new snapshot. Topics come from topics.json plus any other
+        JSON file in the data directory. Up-to-date compiled topics are memory-mapped, topics whose
+        file is unchanged since `previous` are reused without re-parsing, and a topic that fails
+        to parse (e.g. caught mid-write) keeps its previous version.
+        """
+        started = time.perf_counter()
+        subtopics = load_json(TOPICS_FILE) or {}
+        topics = list(subtopics)
+        listed = _list_topic_files(self.data_path)
+        topics += sorted(topic for topic in listed if topic not in topics)
+        topic_files = {topic: f"{self.data_path}/{topic}.json" for topic in topics}
+        snapshot = BankSnapshot(topics, topic_files, {topic: topic_signature(path) for topic, path in topic_files.items()})
+        snapshot.subtopics = subtopics
+
+        if self.compiled_path and os.path.exists(self.compiled_path): self._attach_compiled(snapshot, previous)
+        reused = {}
+        if previous is not None:
+            for topic in topics:
+                if topic in previous.questions and topic not in previous.compiled_topics and topic not in snapshot.compiled_topics \
+                        and snapshot.signatures[topic] is not None and snapshot.signatures[topic] == previous.signatures.get(topic):
+                    reused[topic] = previous.questions[topic]
+        for topic, topic_questions in reused.items():
+            snapshot.questions[topic] = topic_questions
+            snapshot.bank.add_topic(topic, topic_questions)
+
+        pending = {topic: path for topic, path in topic_files.items() if topic not in snapshot.questions}
+        questions, report = load_topics(pending, load_json, self.max_workers, KnownIds(snapshot.bank))
+        for topic, topic_questions in questions.items():
+            snapshot.questions[topic] = topic_questions
+            snapshot.bank.add_topic(topic, topic_questions)
+        for topic in snapshot.compiled_topics:
+            report["topics"][topic] = {"source": "compiled", "questions": len(snapshot.questions[topic]), "skipped": 0, "load_ms": 0.0, "bytes": 0}
+        for topic in reused:
+            report["topics"][topic] = previous.load_report["topics"][topic]
+        if previous is not None:
+            for topic in pending:
+                if topic not in snapshot.questions and topic in previous.questions and topic not in report["missing"]:
+                    print(f"WARNING: Keeping the previous version of topic '{topic}' until its file loads again.")
+                    snapshot.questions[topic] = previous.questions[topic]
+                    snapshot.bank.add_topic(topic, previous.questions[topic])
+                    report["topics"][topic] = previous.load_report["topics"][topic]
+        report["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        report["total_bytes"] = sum(entry["bytes"] for entry in report["topics"].values())
+        snapshot.missing_topics.update(report["missing"])
+        snapshot.load_report = report
+
+        for error in report["errors"]:
+            print(f"WARNING: {error}")
+        for topic in report["missing"]:
+            print(f"ERROR: Could not find question file for topic '{topic}' at path: {topic_files[topic]}")
+        print(f"Loaded {len(snapshot.bank)} questions from {len(snapshot.questions)} topics ({len(snapshot.compiled_topics)} memory-mapped, {len(reused)} unchanged) in {report['total_ms']} ms (~{report['total_bytes'] // 1024} KiB on the heap).")
+        return snapshot
+
+    def _attach_compiled(self, snapshot, previous):
+        """Serves every topic the compiled bank has an up-to-date copy of straight from the memory map."""
+        try:
+            same_file = previous is not None and previous.compiled is not None and previous.compiled.signature == source_signature(self.compiled_path)
+            snapshot.compiled = previous.compiled if same_file else CompiledBank(self.compiled_path)
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Ignoring compiled question bank {self.compiled_path}: {e}")
+            return
+        for topic in snapshot.topics:
+            if topic not in snapshot.compiled.topics: continue
+            signature = snapshot.signatures[topic]
+            if signature is not None and signature != snapshot.compiled.sources.get(topic):
+                print(f"WARNING: {snapshot.topic_files[topic]} changed since {self.compiled_path} was compiled; loading it from JSON.")
+                continue
+            snapshot.compiled_topics.append(topic)
+        snapshot.bank.add_compiled(snapshot.compiled, snapshot.compiled_topics)
+        for topic in snapshot.compiled_topics:
+            snapshot.questions[topic] = snapshot.bank.topic_questions(topic)
+
+    def reload(self):
+        """Builds a fresh snapshot in the calling thread and swaps it in; requests keep using the old one meanwhile."""
+        with self._reload_lock:
+            snapshot = self._build_snapshot(previous=self.snapshot)
+            snapshot.skill_extractor()  # warm it and the tag index before requests can see the snapshot
+            self.snapshot = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+        return snapshot
+
+    def on_reload(self, listener):
+        """Registers listener(snapshot), called after every reload."""
+        self._listeners.append(listener)
+
+    def _watch_signature(self):
+        """Size/mtime of topics.json, every topic file and its overlay in the data directory, and the compiled bank."""
+        signature = {path: topic_signature(path) for path in _list_topic_files(self.data_path).values()}
+        for path in (TOPICS_FILE, self.compiled_path):
+            if path: signature[path] = source_signature(path)
+        return signature
+
+    def start_watching(self, interval=2.0):
+        """Polls the bank files every `interval` seconds in a daemon thread and reloads when any of them changes."""
+        if self._watcher is not None: return
+        def watch():
+            seen = self._watch_signature()
+            while not self._stop_watching.wait(interval):
+                current = self._watch_signature()
+                if current == seen: continue
+                seen = current
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"ERROR: Question bank reload failed, keeping the current bank: {e}")
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=watch, name='question-bank-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None: self._watcher.join()
+        self._watcher = None
+
+    def available_topics(self):
+        return self.snapshot.available_topics()
 
     def get_question(self, topic, asked_ids=[]):
-        questions_for_topic = self._load_topic(topic)
-        if not questions_for_topic: return None
-        available_questions = [q for q in questions_for_topic if q.get('id') not in asked_ids]
-        if not available_questions: return None 
-        return random.choice(available_questions)
+        """Returns a random unseen question. `asked_ids` may be a list of ids or a Bitset of positions."""
+        snapshot = self.snapshot
+        if not snapshot.questions.get(topic): return None
+        return snapshot.bank.sample(topic, asked_ids)
+
+    def next_question(self, topic, asked, state):
+        """Adaptive pick for a topic session; see AdaptiveScheduler.next_question."""
+        return self.scheduler.next_question(self.snapshot.bank, topic, asked, state)
+
+    def exclusion_set(self, topic, question_ids):
+        """Returns a Bitset of the topic positions of `question_ids`; ids from other topics are ignored."""
+        return self.snapshot.bank.exclusion_set(topic, question_ids)
+
+    def all_questions(self):
+        """Returns all questions in the bank."""
+        return list(self.snapshot.bank.questions())
 
     def find_question_by_tag(self, tag: str, excluded_ids=[]):
-        """NEW: Searches all topics for a question matching a specific tag/skill."""
-        tag = tag.lower()
-        # Search topics in a random order to get variety
-        random.shuffle(self.topics)
-        for topic in self.topics:
-            all_questions = self._load_topic(topic)
-            if all_questions:
-                for question in all_questions:
-                    # Check if tag is in the question's tags and not already excluded
-                    if tag in [t.lower() for t in question.get('tags', [])] and question.get('id') not in excluded_ids:
-                        return question
-        return None # Return None if no matching question is found
\ No newline at end of file
+        """Returns a random question matching a tag/skill across all topics, or None."""
+        snapshot = self.snapshot
+        candidates = snapshot.tag_index().lookup(tag)
+        qid = TagIndex.pick(candidates, set(excluded_ids))
+        return snapshot.bank.get(qid) if qid else None
+
+    def find_questions_by_tags(self, tags, excluded_ids=()):
+        """Batch version of find_question_by_tag: at most one distinct question per tag."""
+        snapshot = self.snapshot
+        excluded = set(excluded_ids)
+        questions = []
+        for candidates in snapshot.tag_index().lookup_many(tags).values():
+            qid = TagIndex.pick(candidates, excluded)
+            if qid:
+                excluded.add(qid)
+                questions.append(snapshot.bank.get(qid))
+        return questions
@@ -0,0 +1,238 @@
+# backend/question_store.py
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+from utils import normalize_text
+from question_loader import validate_questions, overlay_path, read_overlay, merge_overlay
+
+NEAR_DUPLICATE_THRESHOLD = 0.5  # estimated shingle similarity at which a new question counts as a repeat
+COMPACT_RATIO = 0.5             # a topic is compacted once its overlay holds this share of its file's questions...
+COMPACT_MIN = 200               # ...and at least this many
+_MERSENNE = (1 << 31) - 1
+
+
+# Words that only phrase a question; without them "What is X?" and "Explain X." share all their shingles.
+QUESTION_WORDS = frozenset("""
+    a an the is are was were be been of in on for to and or with by from at as it its this that these those
+    what whats which who how why when where do does did can could would should will you your we our i
+    explain describe define give some few common main key between difference differences vs versus
+    briefly example examples use used using about into their there any all each other
+""".split())
+
+
+def shingles(text):
+    """Content words of a question (crudely singularized) and each adjacent pair of them."""
+    words = [word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+             for word in normalize_text(text).split() if word not in QUESTION_WORDS]
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+class MinHashIndex:
+    """
+    Finds near-duplicate texts without comparing against every stored one. A text's MinHash
+    signature estimates the Jaccard similarity of its shingles with another text's as the share
+    of positions where the signatures agree. Signatures are bucketed by LSH bands, so a query
+    only compares against texts sharing at least one band with it.
+    """
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=60, bands=20, seed=1):
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, _MERSENNE, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE, num_perm, dtype=np.uint64)
+        self._bands = [{} for _ in range(bands)]  # band hash -> row, or list of rows
+        self._matrix = np.empty((1024, num_perm), dtype=np.uint32)
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def signature(self, text):
+        """The MinHash signature of a text, or None if it has no content words: such texts are neither indexed nor matched."""
+        words = shingles(text)
+        if not words: return None
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in words), dtype=np.uint64, count=len(words))
+        return ((hashes[:, None] * self._a + self._b) % _MERSENNE).min(axis=0).astype(np.uint32)
+
+    def _band_hashes(self, signature):
+        return [hash(signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(len(self._bands))]
+
+    def query(self, signature):
+        """(key, estimated similarity) of the most similar stored text at or above the threshold, else None."""
+        if signature is None: return None
+        rows = set()
+        for band, band_hash in zip(self._bands, self._band_hashes(signature)):
+            found = band.get(band_hash)
+            if found is None: continue
+            if isinstance(found, list): rows.update(found)
+            else: rows.add(found)
+        if not rows: return None
+        rows = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        similarity = (self._matrix[rows] == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        return (self._keys[rows[best]], float(similarity[best])) if similarity[best] >= self.threshold else None
+
+    def add(self, key, signature):
+        if signature is None: return
+        row = len(self._keys)
+        if row == len(self._matrix): self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+        self._matrix[row] = signature
+        self._keys.append(key)
+        for band, band_hash in zip(self._bands, self._band_hashes(signature)):
+            found = band.get(band_hash)
+            if found is None: band[band_hash] = row
+            elif isinstance(found, list): found.append(row)
+            else: band[band_hash] = [found, row]
+
+
+def _write_json(path, records):
+    # Write to a temporary file and rename it, so a running server never reloads a half-written file.
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+class QuestionStore:
+    """
+    The question bank on disk for writers (notebooks/generate.py). New questions are appended to
+    a JSON Lines overlay next to each topic file (`cpp.jsonl` beside `cpp.json`), which the
+    server's loader and watcher read as part of the topic, so a save costs O(new questions).
+    Once a topic's overlay grows past COMPACT_RATIO of its file, it is folded back into the file.
+
+    Opening the store indexes every question id, so appends rename colliding ids bank-wide. The
+    MinHash signatures that near-duplicates are rejected with are indexed per topic when it is first
+    written, so a save costs the topics it writes to, not the whole bank. One process should write
+    to a data directory at a time; threads may share a store.
+    """
+
+    def __init__(self, questions_dir, threshold=NEAR_DUPLICATE_THRESHOLD, compact_ratio=COMPACT_RATIO, compact_min=COMPACT_MIN):
+        self.questions_dir = questions_dir
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.index = MinHashIndex(threshold)
+        self._ids = {}          # question id -> topic
+        self._counts = {}       # topic -> [questions in the topic file, questions in its overlay]
+        self._next_number = {}  # id prefix -> next number to try when renaming
+        self._indexed = set()   # topics whose stored questions are in the MinHash index
+        self._lock = threading.Lock()
+        os.makedirs(questions_dir, exist_ok=True)
+        for name in sorted(os.listdir(questions_dir)):
+            if name.endswith('.json'): self._index_topic(name[:-len('.json')])
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, question_id):
+        return question_id in self._ids
+
+    def path(self, topic):
+        return os.path.join(self.questions_dir, f"{topic}.json")
+
+    def _read(self, topic):
+        """(records in the topic file, records in its overlay that are not in the file yet)."""
+        try:
+            with open(self.path(topic), 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            records = []
+        records = records if isinstance(records, list) else []
+        return records, merge_overlay(records, read_overlay(self.path(topic)))[len(records):]
+
+    def _index_topic(self, topic):
+        records, overlay = self._read(topic)
+        for record in records + overlay:
+            if isinstance(record, dict) and isinstance(record.get('id'), str): self._ids.setdefault(record['id'], topic)
+        self._counts[topic] = [len(records), len(overlay)]
+
+    def _index_signatures(self, topic):
+        """Adds the topic's stored questions to the MinHash index, once."""
+        if topic in self._indexed: return
+        self._indexed.add(topic)
+        records, overlay = self._read(topic)
+        for record in records + overlay:
+            if isinstance(record, dict) and isinstance(record.get('id'), str) and isinstance(record.get('question'), str):
+                self.index.add(record['id'], self.index.signature(record['question']))
+
+    def _free_id(self, question_id, taken):
+        """The next unused id with the same prefix, e.g. cpp-004 for a colliding cpp-001."""
+        prefix = re.sub(r'\d+$', '', question_id)
+        if prefix == question_id: prefix += '-'
+        number = self._next_number.get(prefix)
+        if number is None:
+            pattern = re.compile(re.escape(prefix) + r'(\d+)')
+            number = max((int(m.group(1)) for m in map(pattern.fullmatch, self._ids) if m), default=0) + 1
+        while f"{prefix}{number:03d}" in self._ids or f"{prefix}{number:03d}" in taken:
+            number += 1
+        self._next_number[prefix] = number + 1
+        return f"{prefix}{number:03d}"
+
+    def append(self, topic, records):
+        """
+        Validates `records` and appends the new ones to the topic's overlay in one write. Ids that
+        are already taken are renamed to the next free number with the same prefix; questions too
+        similar to one stored in the topic (or in another topic written through this store) are
+        rejected. Returns (appended records, rejection messages).
+        """
+        with self._lock:
+            self._index_signatures(topic)
+            renamed, taken = [], set()
+            for record in records:
+                if isinstance(record, dict) and isinstance(record.get('id'), str):
+                    if record['id'] in self._ids or record['id'] in taken: record = {**record, 'id': self._free_id(record['id'], taken)}
+                    taken.add(record['id'])
+                renamed.append(record)
+            questions, rejected = validate_questions(topic, renamed, {})
+            added = []
+            for question in questions:
+                signature = self.index.signature(question.question)
+                match = self.index.query(signature)
+                if match:
+                    rejected.append(f"{topic} ({question.id}): near-duplicate of {match[0]} ({match[1]:.0%} similar)")
+                    continue
+                self.index.add(question.id, signature)
+                self._ids[question.id] = topic
+                added.append(question.to_dict())
+            if not added: return added, rejected
+            self._write_overlay(topic, added)
+            counts = self._counts.setdefault(topic, [0, 0])
+            counts[1] += len(added)
+            if counts[1] >= max(self.compact_min, self.compact_ratio * counts[0]): self._compact(topic)
+        return added, rejected
+
+    def _write_overlay(self, topic, records):
+        path = self.path(topic)
+        if not os.path.exists(path): _write_json(path, [])  # the server finds topics by their JSON file
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+        try:
+            with open(overlay_path(path), 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n': data = b'\n' + data  # finish a line cut short by an interrupted append
+        except OSError:
+            pass  # no overlay yet, or an empty one
+        with open(overlay_path(path), 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self, topic):
+        """Folds the topic's overlay into its JSON file; returns how many questions were moved."""
+        with self._lock:
+            return self._compact(topic)
+
+    def _compact(self, topic):
+        records, overlay = self._read(topic)
+        if overlay: _write_json(self.path(topic), records + overlay)
+        # Removed after the file is replaced: a reader in between sees both, and drops the overlay copies.
+        try:
+            os.remove(overlay_path(self.path(topic)))
+        except FileNotFoundError:
+            pass
+        self._counts[topic] = [len(records) + len(overlay), 0]
+        return len(overlay)
+
+    def compact_all(self):
+        return {topic: self.compact(topic) for topic in list(self._counts)}
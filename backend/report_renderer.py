@@ -0,0 +1,181 @@
+# backend/report_renderer.py
+import html
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from response_cache import make_key
+from metrics import record
+
+REPORT_CSS = """
+body { font-family: sans-serif; color: #333; }
+h1 { color: #2b6cb0; border-bottom: 2px solid #2b6cb0; padding-bottom: 10px; }
+h2 { color: #2c5282; border-bottom: 1px solid #e2e8f0; padding-bottom: 5px; }
+.summary-card { background-color: #edf2f7; padding: 20px; border-radius: 8px; margin-bottom: 30px; text-align: center; }
+.question-block { margin-bottom: 25px; border-left: 3px solid #cbd5e0; padding-left: 15px; page-break-inside: avoid; }
+.model-answer { background-color: #f7fafc; border: 1px solid #e2e8f0; padding: 10px; border-radius: 5px; margin-top: 10px; }
+p { line-height: 1.6; }
+strong { color: #4a5568; }
+"""
+
+REPORT_TEMPLATE = """<html><head><meta charset="utf-8"></head>
+<body><h1>Interview Report Card</h1><p>Date: {date}</p><div class="summary-card"><h2>Performance Summary</h2><p><strong>Questions Answered:</strong> {count}</p><p><strong>Average Score:</strong> {average_score}%</p></div><h2>Detailed Breakdown</h2>{blocks}</body></html>"""
+
+QUESTION_TEMPLATE = """<div class="question-block"><h3>Question {number}:</h3><p>{question}</p><p><strong>Your Score:</strong> {score}%</p><p><strong>Feedback:</strong> {feedback}</p><div class="model-answer"><strong>Model Answer:</strong> {model_answer}</div></div>"""
+
+BULK_BATCH_SIZE = 16  # reports rendered by one worker call in bulk mode
+
+# Per-worker state, set up once by _init_worker so every render reuses the parsed stylesheet.
+_HTML = None
+_stylesheet = None
+
+
+def _field(item, key):
+    return html.escape(str(item.get(key, 'N/A')))
+
+
+def build_report_html(history, summary, generated_at):
+    """Fills the report template. All user-provided text is escaped."""
+    blocks = "".join(QUESTION_TEMPLATE.format(number=i + 1, question=_field(item, 'question'), score=_field(item, 'score'), feedback=_field(item, 'feedback'), model_answer=_field(item, 'modelAnswer')) for i, item in enumerate(history))
+    return REPORT_TEMPLATE.format(date=generated_at, count=_field(summary, 'count'), average_score=_field(summary, 'average_score'), blocks=blocks)
+
+
+def report_key(history, summary):
+    """Content hash of a report; identical histories map to the same job."""
+    return make_key('report', history, summary)
+
+
+def _init_worker():
+    """Imports WeasyPrint and parses the report CSS once per worker process."""
+    global _HTML, _stylesheet
+    from weasyprint import HTML, CSS
+    _HTML = HTML
+    _stylesheet = CSS(string=REPORT_CSS)
+
+
+def render_pdf_batch(reports):
+    """Renders a list of (history, summary, generated_at) tuples to PDF bytes, in order."""
+    if _stylesheet is None: _init_worker()
+    return [_HTML(string=build_report_html(*report)).write_pdf(stylesheets=[_stylesheet]) for report in reports]
+
+
+def _process_context():
+    """
+    Render workers are started by a forkserver (or spawned), never forked from the server itself:
+    a fork of a multithreaded process can inherit a lock another thread holds and deadlock on it.
+    The forkserver preloads only this module; WeasyPrint is still only loaded in the workers.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods(): return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class ReportJob:
+    """Status of one report: 'pending', 'done' or 'failed'."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = 'pending'
+        self.pdf = None
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {"job_id": self.job_id, "status": self.status, "error": self.error}
+
+
+class ReportQueue:
+    """
+    Renders PDF reports off the request thread.
+    Jobs are keyed by the report's content hash, so resubmitting an identical history
+    returns the existing job. Rendering runs in a process pool whose workers keep the
+    parsed stylesheet; finished PDFs are kept in a bounded LRU of jobs.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=256, batch_size=BULK_BATCH_SIZE, renderer=render_pdf_batch, executor=None):
+        self.max_jobs = max_jobs
+        self.batch_size = batch_size
+        self.renderer = renderer
+        self._executor = executor
+        self._max_workers = max_workers
+        self._jobs = OrderedDict()  # job id -> ReportJob
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=_process_context(), initializer=_init_worker)
+        return self._executor
+
+    def shutdown(self):
+        """Cancels queued batches and waits for the ones being rendered; used when a server worker exits."""
+        if self._executor is not None: self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _new_jobs(self, reports):
+        """Returns (job ids, [(job, report)] that still need rendering)."""
+        job_ids, to_render = [], []
+        with self._lock:
+            for history, summary in reports:
+                job_id = report_key(history, summary)
+                job_ids.append(job_id)
+                job = self._jobs.get(job_id)
+                if job is not None and job.status != 'failed':
+                    self._jobs.move_to_end(job_id)
+                    continue
+                job = self._jobs[job_id] = ReportJob(job_id)
+                to_render.append((job, (history, summary, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))))
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status == 'pending': break
+                self._jobs.popitem(last=False)
+        return job_ids, to_render
+
+    def _dispatch(self, batch):
+        jobs = [job for job, _ in batch]
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(self.renderer, [report for _, report in batch])
+        except Exception as e:
+            self._finish(jobs, error=e)
+            return
+        def done(f):
+            # Includes time queued behind other batches in the worker pool.
+            record('pdf_render', time.perf_counter() - started)
+            if f.exception(): self._finish(jobs, error=f.exception())
+            else: self._finish(jobs, pdfs=f.result())
+        future.add_done_callback(done)
+
+    def _finish(self, jobs, pdfs=None, error=None):
+        if error is not None: print(f"Error rendering {len(jobs)} report(s): {error}")
+        for i, job in enumerate(jobs):
+            if error is None: job.pdf, job.status = pdfs[i], 'done'
+            else: job.error, job.status = str(error) or type(error).__name__, 'failed'
+            job.done.set()
+
+    def submit(self, history, summary):
+        """Queues one report and returns its job id."""
+        return self.submit_many([(history, summary)])[0]
+
+    def submit_many(self, reports):
+        """Queues many (history, summary) reports; new ones are rendered `batch_size` per worker call."""
+        job_ids, to_render = self._new_jobs(reports)
+        for start in range(0, len(to_render), self.batch_size):
+            self._dispatch(to_render[start:start + self.batch_size])
+        return job_ids
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until the job finishes (or the timeout passes) and returns it."""
+        job = self.get(job_id)
+        if job is not None: job.done.wait(timeout)
+        return job
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('pending', 'done', 'failed')}
@@ -0,0 +1,101 @@
+# backend/response_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+
+
+def make_key(namespace, *parts):
+    """Content-addressed key: a SHA-256 of the namespace and every prompt input."""
+    payload = json.dumps([namespace, *parts], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Caches LLM outputs in two tiers: an in-process LRU in front of an SQLite file
+    that survives restarts and is shared by every worker on the machine.
+    Values must be JSON-serializable. Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path=None, max_memory_items=1024, max_disk_items=100_000, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+            self._db.commit()
+
+    key = staticmethod(make_key)
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.counters["disk_hits"] += 1
+                    return value
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (ttl or self.ttl)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self.counters["sets"] += 1
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)", (key, json.dumps(value), time.time(), expires_at))
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune_disk()
+                self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _prune_disk(self):
+        """Drops expired rows, then the oldest rows beyond max_disk_items."""
+        self._writes_since_prune = 0
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_disk_items:
+            self._db.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY created_at LIMIT ?)", (count - self.max_disk_items,))
+            self.counters["evictions"] += count - self.max_disk_items
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
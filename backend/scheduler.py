@@ -0,0 +1,104 @@
+# backend/scheduler.py
+import random
+from question_bank import sample_position
+from tag_index import normalize_tag
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+START_LEVEL = 1            # index into DIFFICULTIES for the first question
+SCORE_SMOOTHING = 0.5      # weight of the newest score in the running average
+LEVEL_UP_SCORE = 75        # running average at or above which questions get harder
+LEVEL_DOWN_SCORE = 45      # running average below which questions get easier
+WEAK_SCORE = 50            # answers scoring below this come back for review
+REVIEW_GAPS = (3, 6, 12)   # questions until each successive review of a weak answer
+MAX_REVIEWS = 20           # bound on the review queue, which lives in the session
+RECENT_TAGS = 6            # tags of the last questions that the next pick tries to avoid
+TAG_AVOID_TRIES = 8        # random draws spent looking for a question with fresh tags
+
+
+def new_state(level=START_LEVEL):
+    """
+    Per-session scheduler state. It is a small JSON-friendly dict that is updated in place
+    and stays the same size however long the session runs:
+        level        current difficulty index, moved by the running average score
+        average      running average of answer scores (None before the first answer)
+        turn         questions asked so far
+        recent_tags  normalized tags of the last few questions
+        review       [position, due turn, step] for weakly answered questions
+        last         [position, step] of the question awaiting an answer
+    """
+    return {"level": level, "average": None, "turn": 0, "recent_tags": [], "review": [], "last": None}
+
+
+class AdaptiveScheduler:
+    """
+    Picks the next bank question for a topic session: due reviews of weak answers first,
+    then an unseen question at the current difficulty (falling back to the nearest other
+    difficulties), preferring questions that share no tags with the last few asked.
+    Sampling draws from the bank's per-difficulty position lists, so a pick costs a handful
+    of random draws regardless of bank size; once the draws keep hitting asked questions, a
+    popcount over the pool's bitmask skips an exhausted pool or draws from what is left by rank.
+    """
+
+    def __init__(self, rng=random):
+        self.rng = rng
+
+    @staticmethod
+    def _difficulty_order(level, pools):
+        """The target difficulty first, then the others by distance; unknown labels go last."""
+        order = sorted(range(len(DIFFICULTIES)), key=lambda i: abs(i - level))
+        return [DIFFICULTIES[i] for i in order] + [d for d in pools if d not in DIFFICULTIES]
+
+    def _pick_fresh(self, bank, topic, candidates, asked, recent, mask):
+        """A random unasked candidate, preferring one whose tags were not seen recently. `mask` is the candidates' bitmask."""
+        if recent:
+            for _ in range(TAG_AVOID_TRIES):
+                position = candidates[self.rng.randrange(len(candidates))]
+                if position in asked: continue
+                if recent.isdisjoint(normalize_tag(tag) for tag in bank.question_at(topic, position).tags): return position
+        return sample_position(candidates, asked, self.rng, mask)
+
+    def next_question(self, bank, topic, asked, state):
+        """
+        Returns (question, position, is_review), or None when every question of the topic
+        has been asked and no review is due. Updates `state`; the caller marks the position asked.
+        """
+        state["turn"] += 1
+        for i, (position, due, step) in enumerate(state["review"]):
+            if due > state["turn"]: continue
+            del state["review"][i]
+            question = bank.question_at(topic, position)
+            if question is not None: return self._asked(state, question, position, step), position, True
+            break  # the question left the bank in a reload; fall through to a fresh one
+
+        pools, masks = bank.difficulty_positions(topic), bank.difficulty_masks(topic)
+        recent = set(state["recent_tags"])
+        for difficulty in self._difficulty_order(state["level"], pools):
+            candidates = pools.get(difficulty)
+            if not candidates: continue
+            position = self._pick_fresh(bank, topic, candidates, asked, recent, masks[difficulty])
+            if position is not None:
+                return self._asked(state, bank.question_at(topic, position), position, 0), position, False
+        state["turn"] -= 1
+        return None
+
+    @staticmethod
+    def _asked(state, question, position, step):
+        state["recent_tags"] = (state["recent_tags"] + [normalize_tag(tag) for tag in question.tags])[-RECENT_TAGS:]
+        state["last"] = [position, step]
+        return question
+
+    @staticmethod
+    def record_answer(state, score):
+        """Folds the score of the last asked question into the running average, level and review queue."""
+        average = state["average"]
+        average = score if average is None else (1 - SCORE_SMOOTHING) * average + SCORE_SMOOTHING * score
+        state["average"] = round(average, 2)
+        if average >= LEVEL_UP_SCORE: state["level"] = min(state["level"] + 1, len(DIFFICULTIES) - 1)
+        elif average < LEVEL_DOWN_SCORE: state["level"] = max(state["level"] - 1, 0)
+
+        if state["last"] is not None:
+            position, step = state["last"]
+            if score < WEAK_SCORE and step < len(REVIEW_GAPS) and len(state["review"]) < MAX_REVIEWS:
+                state["review"].append([position, state["turn"] + REVIEW_GAPS[step], step + 1])
+            state["last"] = None
+        return state
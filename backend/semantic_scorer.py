@@ -0,0 +1,90 @@
+# backend/semantic_scorer.py
+import math
+import threading
+from collections import Counter, OrderedDict
+from utils import normalize_text
+
+# Words that carry no meaning for grading; TF-IDF would down-weight them anyway,
+# but dropping them keeps short answers from matching on filler alone.
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its of on or
+so such that the their then there these this to was we what when which while who why will with you your
+""".split())
+
+# Cosine similarity that already counts as a full-marks answer; answers rarely reuse
+# the model answer's exact wording, so raw cosine is scaled up to a 0-100 score.
+FULL_MARKS_SIMILARITY = 0.8
+
+
+def tokenize(text):
+    return [t for t in normalize_text(text or '').split() if t not in STOPWORDS]
+
+
+class SemanticScorer:
+    """
+    Local, network-free answer scorer: TF-IDF cosine similarity between the user
+    answer and the model answer. IDF weights come from the question bank's model
+    answers, and each model answer's vector is computed once and cached.
+    """
+
+    def __init__(self, max_cached_answers=100_000):
+        self.document_frequency = Counter()
+        self.documents = 0
+        self.max_cached_answers = max_cached_answers
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fit(self, model_answers):
+        """Learns IDF weights from a corpus of model answers (normally the whole bank)."""
+        with self._lock:
+            for answer in model_answers:
+                self.document_frequency.update(set(tokenize(answer)))
+                self.documents += 1
+            self._vectors.clear()
+
+    def statistics(self):
+        """The learned corpus statistics, e.g. for storing in a compiled question bank."""
+        with self._lock:
+            return {"documents": self.documents, "document_frequency": dict(self.document_frequency)}
+
+    def load_statistics(self, statistics):
+        """Restores statistics saved by statistics() instead of refitting on the whole bank."""
+        with self._lock:
+            self.documents = statistics["documents"]
+            self.document_frequency = Counter(statistics["document_frequency"])
+            self._vectors.clear()
+
+    def _idf(self, term):
+        return math.log((1 + self.documents) / (1 + self.document_frequency[term])) + 1
+
+    def vector(self, text):
+        """Sublinear-TF x IDF weights, L2-normalized, as a {term: weight} dict."""
+        counts = Counter(tokenize(text))
+        weights = {term: (1 + math.log(count)) * self._idf(term) for term, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return {term: w / norm for term, w in weights.items()} if norm else {}
+
+    def model_vector(self, model_answer):
+        with self._lock:
+            vector = self._vectors.get(model_answer)
+            if vector is not None:
+                self._vectors.move_to_end(model_answer)
+                return vector
+        vector = self.vector(model_answer)
+        with self._lock:
+            self._vectors[model_answer] = vector
+            if len(self._vectors) > self.max_cached_answers:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def similarity(self, user_answer, model_answer):
+        model = self.model_vector(model_answer)
+        if not model: return None
+        user = self.vector(user_answer)
+        return sum(weight * model[term] for term, weight in user.items() if term in model)
+
+    def score(self, user_answer, model_answer):
+        """Returns a 0-100 score, or None if the model answer has no scorable words."""
+        similarity = self.similarity(user_answer, model_answer)
+        if similarity is None: return None
+        return round(min(1.0, similarity / FULL_MARKS_SIMILARITY) * 100)
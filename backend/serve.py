@@ -0,0 +1,204 @@
+# backend/serve.py
+"""
+Production entry point: preforked worker processes, each serving requests from a pool of threads.
+
+The question bank, its indexes and the fitted local scorers are loaded once in the master and
+frozen out of the garbage collector's reach before forking, so every worker shares those pages
+copy-on-write instead of holding its own copy. Each worker then opens its own connections and
+starts its own thread pools and bank watcher. Most requests spend their time waiting on Gemini,
+so each worker runs many request threads; CPU-bound work scales with the number of workers.
+
+Usage:
+    python serve.py                              # one worker per CPU core, 16 threads each
+    python serve.py --workers 4 --threads 32 --host 0.0.0.0 --port 5001
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+BACKLOG = 1024          # connections the kernel queues while every worker is busy
+RESTART_DELAY = 1.0     # seconds before replacing a worker that died right after starting
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # One request per connection: an idle keep-alive client would otherwise hold a pool thread.
+    protocol_version = "HTTP/1.0"
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    Werkzeug's WSGI server with connections handled by a fixed pool of `threads` threads.
+    A worker only accepts a connection when one of its threads is free, so a busy worker
+    leaves new connections in the shared listen queue for its siblings. `timeout` bounds
+    how long a client may stall while sending its request or reading the response.
+    """
+    multithread = True
+
+    def __init__(self, host, port, app, threads=16, timeout=60.0, fd=None):
+        self.timeout_seconds = timeout
+        self._slots = threading.BoundedSemaphore(threads)
+        super().__init__(host, port, app, handler=_RequestHandler, fd=fd)
+        self.socket.setblocking(False)  # a sibling may accept a connection this worker was woken for
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+    def _handle_request_noblock(self):
+        # A thread is taken before accepting, not after, so a saturated worker never takes a connection off the queue.
+        if not self._slots.acquire(timeout=0.5): return  # still busy; serve_forever checks for shutdown and selects again
+        try:
+            request, client_address = self.get_request()
+        except OSError:  # another worker accepted it first
+            self._slots.release()
+            return
+        try:
+            self.process_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            self._slots.release()
+        except BaseException:
+            self.shutdown_request(request)
+            self._slots.release()
+            raise
+
+    def process_request(self, request, client_address):
+        request.settimeout(self.timeout_seconds)
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        """Stops listening and waits for the requests in flight."""
+        super().server_close()
+        if hasattr(self, '_pool'): self._pool.shutdown(wait=True)  # also called while binding, before the pool exists
+
+
+def _stop(signum, frame):
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)  # a second SIGTERM must not interrupt the cleanup
+    raise SystemExit(0)
+
+
+def run_worker(listener, config, preloaded, threads, timeout):
+    """Body of a forked worker: builds its app around the shared state and serves until SIGTERM."""
+    import app as mockview
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master turns Ctrl+C into SIGTERM for every worker
+    signal.signal(signal.SIGTERM, _stop)
+    gc.enable()
+    server = PooledWSGIServer(listener.getsockname()[0], listener.getsockname()[1], mockview.create_app(config, preloaded), threads, timeout, fd=listener.fileno())
+    server.multiprocess = True
+    print(f"Worker {os.getpid()} serving with {threads} threads.")
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+    finally:
+        server.server_close()  # waits for the requests in flight before the worker exits
+        mockview.shutdown()
+
+
+def serve(host='127.0.0.1', port=5001, workers=1, threads=16, timeout=60.0, graceful_timeout=30.0, config=None):
+    """Serves the app on host:port; with workers > 1 the master forks and supervises that many workers."""
+    import app as mockview
+    settings = {**mockview.default_config(), **(config or {})}
+    if workers > 1 and not hasattr(os, 'fork'):
+        print("WARNING: This platform cannot fork; serving from a single process.")
+        workers = 1
+    if workers > 1 and os.getenv("MOCKVIEW_SESSION_BACKEND", "sqlite").lower() == "memory":
+        raise SystemExit("The memory session backend keeps sessions inside one process; use sqlite or redis with several workers.")
+
+    # No collections while the shared state is built, so it is not scattered across pages that get written later.
+    gc.disable()
+    preloaded = mockview.load_bank(settings)
+    if workers == 1:
+        gc.enable()
+        server = PooledWSGIServer(host, port, mockview.create_app(settings, preloaded), threads, timeout)
+        print(f"Serving on http://{host}:{server.port} with {threads} threads.")
+        signal.signal(signal.SIGTERM, _stop)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            mockview.shutdown()
+        return
+
+    # Frozen objects are never traversed by the collector, so workers do not copy their pages by touching GC headers.
+    gc.freeze()
+    listener = socket.create_server((host, port), backlog=BACKLOG)
+    children = {}  # pid -> start time
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(listener, settings, preloaded, threads, timeout)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush(); sys.stderr.flush()
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    stopping = []
+    def stop(signum, frame):
+        if not stopping: stopping.append(time.monotonic())
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Serving on http://{host}:{listener.getsockname()[1]} with {workers} workers x {threads} threads.")
+    for _ in range(workers): spawn()
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping and time.monotonic() - stopping[0] > graceful_timeout:
+                print(f"Workers still busy after {graceful_timeout}s; killing them.")
+                for pid in children:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                stopping[0] = float('inf')
+            time.sleep(0.2)
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping: continue
+        print(f"WARNING: Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; starting a new one.")
+        if time.monotonic() - started < RESTART_DELAY: time.sleep(RESTART_DELAY)
+        spawn()
+    listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve MockView with preforked worker processes, each handling requests in a pool of threads.")
+    parser.add_argument("--host", type=str, default=os.getenv("MOCKVIEW_HOST", "127.0.0.1"), help="Address to listen on; 0.0.0.0 for every interface.")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MOCKVIEW_PORT", 5001)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MOCKVIEW_WORKERS", 0)), help="Worker processes; 0 means one per CPU core. More than one needs the sqlite or redis session backend.")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("MOCKVIEW_THREADS", 16)), help="Requests each worker serves at once. Most of them wait on Gemini, so this can be well above the core count.")
+    parser.add_argument("--timeout", type=float, default=float(os.getenv("MOCKVIEW_REQUEST_TIMEOUT", 60)), help="Seconds a client may stall while sending a request or reading the response.")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("MOCKVIEW_GRACEFUL_TIMEOUT", 30)), help="Seconds workers get to finish their requests on shutdown before they are killed.")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers or os.cpu_count() or 1, args.threads, args.timeout, args.graceful_timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# backend/session_store.py
+import os
+import time
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from werkzeug.datastructures import CallbackDict
+from metrics import span
+
+DEFAULT_TTL = 24 * 3600  # seconds of inactivity before a session is dropped
+
+
+class MemorySessionStore:
+    """In-process LRU of serialized sessions with a sliding TTL. Only suitable for a single worker."""
+
+    def __init__(self, max_sessions=10_000, ttl=DEFAULT_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # sid -> (expires_at, data)
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if not entry: return None
+            if entry[0] <= time.time():
+                del self._sessions[sid]
+                return None
+            self._sessions[sid] = (time.time() + self.ttl, entry[1])
+            self._sessions.move_to_end(sid)
+            return entry[1]
+
+    def set(self, sid, data):
+        with self._lock:
+            self._sessions[sid] = (time.time() + self.ttl, data)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def update(self, sid, updater):
+        """
+        Replaces the data of `sid` with updater(current data, or None) under the store's lock, so no
+        other write lands in between; nothing is written if it returns None. Returns its result.
+        """
+        with self._lock:
+            entry = self._sessions.get(sid)
+            data = updater(entry[1] if entry and entry[0] > time.time() else None)
+            if data is not None:
+                self._sessions[sid] = (time.time() + self.ttl, data)
+                self._sessions.move_to_end(sid)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            return data
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+
+class SQLiteSessionStore:
+    """Sessions in an SQLite file, shared by every worker process on the machine."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    def get(self, sid):
+        with self._lock:
+            row = self._db.execute("SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return bytes(row[0]) if row and row[1] > time.time() else None
+
+    def set(self, sid, data):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)", (sid, data, time.time() + self.ttl))
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 1000:
+                self._writes_since_prune = 0
+                self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def update(self, sid, updater):
+        """Like MemorySessionStore.update; the read and write share one transaction holding the database's write lock."""
+        with self._lock:
+            # IMMEDIATE takes the write lock before reading, so other processes cannot write the row in between.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,)).fetchone()
+                data = updater(bytes(row[0]) if row and row[1] > time.time() else None)
+                if data is not None:
+                    self._db.execute("INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)", (sid, data, time.time() + self.ttl))
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+            return data
+
+    def delete(self, sid):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            self._db.commit()
+
+
+class RedisSessionStore:
+    """
+    Sessions in any Redis-protocol server (Redis, Valkey, KeyDB...). Requires the `redis` package.
+    ttl=float('inf') stores keys without an expiry.
+    """
+
+    def __init__(self, url, ttl=DEFAULT_TTL, prefix='mockview:session:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self.ttl = ttl
+        self._ex = None if ttl == float('inf') else int(ttl)
+        self.prefix = prefix
+
+    def get(self, sid):
+        return self._redis.getex(self.prefix + sid, ex=self._ex)
+
+    def set(self, sid, data):
+        self._redis.set(self.prefix + sid, data, ex=self._ex)
+
+    def update(self, sid, updater):
+        """Like MemorySessionStore.update, as an optimistic WATCH/MULTI transaction; updater reruns if the key changed meanwhile."""
+        key = self.prefix + sid
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    data = updater(pipe.get(key))
+                    if data is None:
+                        pipe.unwatch()
+                        return None
+                    pipe.multi()
+                    pipe.set(key, data, ex=self._ex)
+                    pipe.execute()
+                    return data
+                except self._watch_error:
+                    continue
+
+    def delete(self, sid):
+        self._redis.delete(self.prefix + sid)
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """A session whose data lives in a store; the cookie only carries the random session id."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class CompactSessionInterface(SessionInterface):
+    """
+    Flask session interface backed by one of the stores above.
+    Sessions are serialized as tagged JSON (bytes become base64, not pickles) and
+    written back only when a request modified them.
+    """
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            with span('session_load'):
+                data = self.store.get(sid)
+            if data is not None:
+                try:
+                    with span('session_decode'):
+                        return ServerSession(self.serializer.loads(data), sid=sid)
+                except ValueError:
+                    pass
+        return ServerSession(sid=secrets.token_urlsafe(24), new=True)
+
+    def update(self, sid, updater):
+        """
+        Applies updater(data) to a stored session outside the request cycle, e.g. at the end
+        of a streamed response whose session was already saved. The store applies it atomically,
+        so a concurrent request saving the same session is not overwritten; updater may run more
+        than once and should only change `data`. Returns the updated data, or None if it is gone.
+        """
+        updated = []
+        def apply(data):
+            if data is None: return None
+            updated[:] = [self.serializer.loads(data)]
+            updater(updated[0])
+            return self.serializer.dumps(updated[0]).encode('utf-8')
+        return updated[0] if self.store.update(sid, apply) is not None else None
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if session.modified:
+            with span('session_encode'):
+                data = self.serializer.dumps(dict(session)).encode('utf-8')
+            with span('session_save'):
+                self.store.set(session.sid, data)
+        if session.new or session.modified:
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+
+
+def create_session_store_from_env(default_sqlite_path):
+    """Builds a store from MOCKVIEW_SESSION_BACKEND (memory | sqlite | redis) and MOCKVIEW_SESSION_URL."""
+    backend = os.getenv("MOCKVIEW_SESSION_BACKEND", "sqlite").lower()
+    ttl = float(os.getenv("MOCKVIEW_SESSION_TTL", DEFAULT_TTL))
+    if backend == "memory":
+        return MemorySessionStore(ttl=ttl)
+    if backend == "redis":
+        return RedisSessionStore(os.getenv("MOCKVIEW_SESSION_URL", "redis://localhost:6379/0"), ttl=ttl)
+    return SQLiteSessionStore(os.getenv("MOCKVIEW_SESSION_URL", default_sqlite_path), ttl=ttl)
@@ -0,0 +1,116 @@
+# backend/skill_extractor.py
+from collections import deque
+from tag_index import SYNONYMS, fold_text, normalize_tag
+
+# Phrasings common in job descriptions, for skills the bank has under another name.
+# Only used when the bank has the skill on the right; keys and values are normalized.
+JD_SYNONYMS = {
+    'postgresql': 'sql', 'postgres': 'sql', 'mysql': 'sql', 'sqlite': 'sql', 't sql': 'sql', 'pl sql': 'sql',
+    'relational databases': 'databases', 'relational database': 'databases',
+    'acid': 'transactions', 'database indexes': 'indexing', 'indexes': 'indexing',
+    'multithreading': 'concurrency', 'multi threading': 'concurrency', 'parallel programming': 'concurrency',
+    'smart pointers': 'memory management', 'raii': 'memory management', 'garbage collection': 'memory management',
+    'standard template library': 'stl', 'object oriented': 'object oriented programming', 'oo design': 'object oriented programming',
+    'binary trees': 'trees', 'graph algorithms': 'graphs', 'sorting algorithms': 'sorting',
+    'virtual memory': 'paging', 'cpu scheduling': 'scheduling', 'filesystems': 'file systems',
+    'restful': 'api design', 'rest api': 'api design', 'rest apis': 'api design', 'microservices': 'system design',
+    'redis': 'caching', 'memcached': 'caching', 'load balancing': 'scalability', 'horizontal scaling': 'scalability',
+}
+
+
+def _variants(phrase):
+    """A phrase plus its crude singular or plural, so "pointer" finds the "Pointers" tag."""
+    if len(phrase) <= 3: return {phrase}
+    return {phrase, phrase[:-1] if phrase.endswith('s') and not phrase.endswith('ss') else phrase + 's'}
+
+
+class SkillExtractor:
+    """
+    Finds the bank's skills in free text (a job description) with an Aho-Corasick automaton
+    over every tag, topic and subtopic name and their synonyms, so the cost is one pass over the
+    text however large the vocabulary is. Overlapping mentions count for the longest one, so
+    "operating systems" is not also read as "systems". Matches only start and end at word breaks.
+    """
+
+    def __init__(self, vocabulary):
+        """`vocabulary` maps each phrase (normalized) to the skill it names."""
+        self._goto = [{}]   # state -> {char: next state}
+        self._fail = [0]
+        self._out = [()]    # state -> ((length, skill), ...) of the patterns ending here
+        for phrase, skill in vocabulary.items():
+            self._add(f" {phrase} ", skill)
+        self._link()
+        self.skills = set(vocabulary.values())
+
+    @classmethod
+    def from_bank(cls, tags, subtopics=None):
+        """
+        Vocabulary of a bank: its normalized tags (e.g. the TagIndex postings keys), the topics and
+        subtopics of topics.json under their own names, and every synonym that names one of them.
+        """
+        names = {}
+        for topic, topic_subtopics in (subtopics or {}).items():
+            names.setdefault(normalize_tag(topic), normalize_tag(topic))  # "operating systems" reads better than "os"
+            for name in topic_subtopics if isinstance(topic_subtopics, list) else []:
+                names.setdefault(normalize_tag(name), name)
+        for tag in tags:
+            names.setdefault(tag, tag)
+        vocabulary = {}
+        for key, name in names.items():
+            for phrase in _variants(key): vocabulary.setdefault(phrase, name)
+        for alias, key in [*SYNONYMS.items(), *JD_SYNONYMS.items()]:
+            if key in names:
+                for phrase in _variants(alias): vocabulary.setdefault(phrase, names[key])
+        return cls(vocabulary)
+
+    def _add(self, pattern, skill):
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = self._goto[state][char] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = following
+        self._out[state] += ((len(pattern), skill),)
+
+    def _link(self):
+        """Sets the failure links breadth-first and merges the outputs they lead to."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[following] = self._goto[fail].get(char, 0)
+                self._out[following] += self._out[self._fail[following]]
+
+    def matches(self, text):
+        """(start, end, skill) of every mention in the folded text, overlapping ones included."""
+        goto, fail, out = self._goto, self._fail, self._out
+        text = f" {fold_text(text)} "
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, skill in out[state]:
+                yield i + 1 - length, i + 1, skill
+
+    def rank(self, text):
+        """[(skill, mentions)] for the skills in `text`, most mentioned first, then by first mention."""
+        counts, first, last_end = {}, {}, -1
+        # Longest mention first among those starting at the same place; later overlapping ones are dropped.
+        for start, end, skill in sorted(self.matches(text), key=lambda match: (match[0], -match[1])):
+            if start < last_end - 1: continue  # the separating space is shared by neighbouring matches
+            last_end = end
+            counts[skill] = counts.get(skill, 0) + 1
+            first.setdefault(skill, start)
+        return sorted(counts.items(), key=lambda item: (-item[1], first[item[0]]))
+
+    def extract(self, text, limit=7):
+        """The `limit` most mentioned skills in `text`."""
+        return [skill for skill, _ in self.rank(text)[:limit]]
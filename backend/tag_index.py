@@ -0,0 +1,113 @@
+# backend/tag_index.py
+import re
+import bisect
+import random
+import difflib
+
+# Aliases that should resolve to the same tag. Keys and values are already normalized.
+SYNONYMS = {
+    'c++': 'cpp', 'c plus plus': 'cpp', 'cplusplus': 'cpp',
+    'os': 'operating systems', 'operating system': 'operating systems',
+    'dbms': 'databases', 'database': 'databases', 'rdbms': 'databases',
+    'database management systems': 'databases', 'database management system': 'databases',
+    'dsa': 'data structures and algorithms', 'data structures algorithms': 'data structures and algorithms',
+    'oop': 'object oriented programming', 'oops': 'object oriented programming',
+    'system design': 'system design', 'systems design': 'system design',
+    'js': 'javascript', 'golang': 'go', 'k8s': 'kubernetes',
+}
+
+FUZZY_CUTOFF = 0.8
+
+
+def fold_text(text: str) -> str:
+    """Lowercases text and folds punctuation/underscores (but not # or +) into single spaces."""
+    return ' '.join(re.sub(r'[^\w\s#+]|_', ' ', text.lower()).split())
+
+
+def normalize_tag(tag: str) -> str:
+    """Lowercases a tag, folds punctuation/underscores into spaces and resolves synonyms."""
+    key = ' '.join(tag.lower().split())
+    if key in SYNONYMS:
+        return SYNONYMS[key]
+    key = fold_text(key)
+    return SYNONYMS.get(key, key)
+
+
+class TagIndex:
+    """
+    Inverted index from normalized tag to question ids, covering every topic.
+    Each question is also indexed under its topic name, so "C++" finds cpp questions.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self._sorted_keys = []
+
+    @classmethod
+    def from_bank(cls, bank):
+        index = cls()
+        for topic in bank.topics():
+            for qid in bank.topic_ids(topic):
+                question = bank.get(qid)
+                index.add(qid, [topic] + list(question.get('tags', [])))
+        index.freeze()
+        return index
+
+    @classmethod
+    def from_compiled(cls, compiled):
+        """Uses the postings stored in a compiled bank; ids are decoded only when a lookup hits them."""
+        index = cls()
+        index.postings = compiled.tag_postings()
+        index.freeze()
+        return index
+
+    def add(self, question_id, tags):
+        for tag in tags:
+            ids = self.postings.setdefault(normalize_tag(tag), [])
+            if not ids or ids[-1] != question_id:
+                ids.append(question_id)
+
+    def freeze(self):
+        """Sorts the vocabulary once so prefix lookups can use binary search."""
+        self._sorted_keys = sorted(self.postings)
+
+    def lookup(self, skill: str):
+        """
+        Returns candidate question ids for a skill: exact match first, then tags that
+        start with the skill (or that the skill starts with), then close spellings.
+        """
+        key = normalize_tag(skill)
+        if not key:
+            return []
+        if key in self.postings:
+            return self.postings[key]
+
+        matches = []
+        start = bisect.bisect_left(self._sorted_keys, key)
+        for tag in self._sorted_keys[start:]:
+            if not tag.startswith(key): break
+            matches.extend(self.postings[tag])
+        words = key.split()
+        for i in range(len(words) - 1, 0, -1):
+            matches.extend(self.postings.get(' '.join(words[:i]), []))
+        if matches:
+            return list(dict.fromkeys(matches))
+
+        for tag in difflib.get_close_matches(key, self._sorted_keys, n=3, cutoff=FUZZY_CUTOFF):
+            matches.extend(self.postings[tag])
+        return list(dict.fromkeys(matches))
+
+    def lookup_many(self, skills):
+        """Batch lookup: returns {skill: [question ids]} for every skill in one call."""
+        return {skill: self.lookup(skill) for skill in skills}
+
+    @staticmethod
+    def pick(candidates, excluded, rng=random):
+        """Picks a random candidate not in `excluded`, without copying the candidate list."""
+        if not candidates: return None
+        start = rng.randrange(len(candidates))
+        for offset in range(len(candidates)):
+            qid = candidates[(start + offset) % len(candidates)]
+            if qid not in excluded:
+                return qid
+        return None
@@ -4,16 +4,18 @@ import re
 import os
 
 def load_json(filepath):
-    """Loads a JSON file from the given path."""
+    """
+    Loads a JSON file from the given path. Returns None if the file does not exist;
+    a file that exists but is not valid JSON raises ValueError.
+    """
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         print(f"Error: File not found at {filepath}")
         return None
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {filepath}")
-        return None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Could not decode JSON from {filepath}: {e}") from e
 
 def normalize_text(text):
     """
@@ -0,0 +1,70 @@
+# benchmarks/bench_bank_format.py
+"""
+Cold-start benchmark: parsing the JSON bank vs. opening the compiled, memory-mapped bank.
+
+Usage (from the repo root):
+    python benchmarks/bench_bank_format.py --questions 200000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from bank_format import CompiledBank, compile_bank  # noqa: E402
+from question_bank import QuestionBank  # noqa: E402
+
+
+def make_questions(count):
+    return [{"id": f"bench-{i:07d}", "question": f"Question {i}: explain concept {i % 997} in detail?", "answer": "A fairly typical model answer of a few sentences. " * 4, "difficulty": "medium", "tags": ["Bench", f"Tag{i % 50}"]} for i in range(count)]
+
+
+def measure(label, load, count):
+    tracemalloc.start()
+    started = time.perf_counter()
+    bank = load()
+    elapsed = time.perf_counter() - started
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    probe = time.perf_counter()
+    for _ in range(1000):
+        bank.get(f"bench-{random.randrange(count):07d}")
+    print(f"{label:>10}: open {elapsed * 1000:9.1f} ms, heap {heap / 2**20:8.1f} MiB, 1000 random gets {(time.perf_counter() - probe) * 1000:6.1f} ms")
+
+
+def load_json_bank(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        bank = QuestionBank()
+        bank.add_topic('bench', json.load(f))
+    return bank
+
+
+def load_compiled_bank(path):
+    bank = QuestionBank()
+    bank.add_compiled(CompiledBank(path))
+    return bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=200_000)
+    args = parser.parse_args()
+
+    questions = make_questions(args.questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, bank_path = os.path.join(tmp, 'bench.json'), os.path.join(tmp, 'bench.bank')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(questions, f)
+        compile_bank({'bench': questions}, bank_path)
+        del questions
+        print(f"JSON {os.path.getsize(json_path) / 2**20:.1f} MiB, compiled {os.path.getsize(bank_path) / 2**20:.1f} MiB")
+        measure('json', lambda: load_json_bank(json_path), args.questions)
+        measure('compiled', lambda: load_compiled_bank(bank_path), args.questions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_keyword_scorer.py
+"""
+Micro-benchmark: keyword grading with the old per-call set rebuild vs. KeywordScorer,
+one answer at a time and as a single evaluate_many-style batch.
+
+Usage (from the repo root):
+    python benchmarks/bench_keyword_scorer.py --answers 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from utils import normalize_text  # noqa: E402
+from keyword_scorer import KeywordScorer  # noqa: E402
+
+WORDS = "array list vector memory pointer cache index thread process lock page table tree graph hash queue stack heap".split()
+
+
+def legacy_score(user_answer, model_answer):
+    """The pre-KeywordScorer implementation, kept here for comparison."""
+    user_words = set(normalize_text(user_answer).split())
+    model_words = set(normalize_text(model_answer).split())
+    if not model_words: return None
+    return len(user_words.intersection(model_words)) / len(model_words) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare keyword scoring implementations.")
+    parser.add_argument("--answers", "-a", type=int, default=100000, help="User answers to grade.")
+    parser.add_argument("--models", "-m", type=int, default=200, help="Distinct model answers.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    model_answers = [" ".join(rng.choices(WORDS, k=40)) for _ in range(args.models)]
+    pairs = [(" ".join(rng.choices(WORDS, k=25)), rng.choice(model_answers)) for _ in range(args.answers)]
+    users = [u for u, _ in pairs]
+    models = [m for _, m in pairs]
+
+    scorer = KeywordScorer()
+    scorer.preload(model_answers)
+    cases = [
+        ("legacy set rebuild", lambda: [legacy_score(u, m) for u, m in pairs]),
+        ("KeywordScorer.score", lambda: [scorer.score(u, m) for u, m in pairs]),
+        ("KeywordScorer.score_many", lambda: scorer.score_many(users, models)),
+    ]
+    print(f"{args.answers} answers against {args.models} model answers")
+    for name, fn in cases:
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+        print(f"  {name:<26} {seconds:>8.3f} s  ({args.answers / seconds:,.0f} answers/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_question_bank.py
+"""
+Micro-benchmark: QuestionBank.sample vs. the old list-comprehension path in
+QuestionRouter.get_question.
+
+Usage (from the repo root):
+    python benchmarks/bench_question_bank.py --questions 20000 --asked 500
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from question_bank import QuestionBank  # noqa: E402
+
+
+def make_questions(count):
+    return [{"id": f"bench-{i:06d}", "question": f"Question {i}?", "answer": "...", "difficulty": "medium", "tags": ["Bench"]} for i in range(count)]
+
+
+def legacy_get_question(questions, asked_ids):
+    """The pre-QuestionBank implementation, kept here for comparison."""
+    available_questions = [q for q in questions if q.get('id') not in asked_ids]
+    if not available_questions: return None
+    return random.choice(available_questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare QuestionBank sampling against the legacy list scan.")
+    parser.add_argument("--questions", "-q", type=int, default=20000, help="Questions in the synthetic topic.")
+    parser.add_argument("--asked", "-a", type=int, default=500, help="Number of already-asked question ids.")
+    parser.add_argument("--repeat", "-r", type=int, default=20, help="Calls timed per implementation.")
+    args = parser.parse_args()
+
+    questions = make_questions(args.questions)
+    asked_ids = [q['id'] for q in random.sample(questions, min(args.asked, len(questions)))]
+    bank = QuestionBank()
+    bank.add_topic('bench', questions)
+    asked_bitset = bank.exclusion_set('bench', asked_ids)
+
+    cases = [
+        ("legacy list scan", lambda: legacy_get_question(questions, asked_ids)),
+        ("bank.sample(id list)", lambda: bank.sample('bench', asked_ids)),
+        ("bank.sample(bitset)", lambda: bank.sample('bench', asked_bitset)),
+    ]
+    print(f"{args.questions} questions, {len(asked_ids)} asked, {args.repeat} calls each")
+    for name, fn in cases:
+        seconds = timeit.timeit(fn, number=args.repeat) / args.repeat
+        print(f"  {name:<22} {seconds * 1e6:>12.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_scheduler.py
+"""
+Micro-benchmark: AdaptiveScheduler.next_question on a large topic over a long session.
+
+Usage (from the repo root):
+    python benchmarks/bench_scheduler.py --questions 100000 --session 2000
+    python benchmarks/bench_scheduler.py --exhausted medium  # every medium question already asked
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from question_bank import QuestionBank, Bitset  # noqa: E402
+from scheduler import AdaptiveScheduler, new_state  # noqa: E402
+
+
+def make_questions(count):
+    return [{"id": f"bench-{i:06d}", "question": f"Question {i}?", "answer": "...", "difficulty": ("easy", "medium", "hard")[i % 3], "tags": [f"Tag{i % 200}", "Bench"]} for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time adaptive question picks over a long session.")
+    parser.add_argument("--questions", "-q", type=int, default=100_000, help="Questions in the synthetic topic.")
+    parser.add_argument("--session", "-s", type=int, default=2000, help="Questions asked in the session.")
+    parser.add_argument("--exhausted", "-e", default=None, help="A difficulty whose questions are all asked before the session.")
+    args = parser.parse_args()
+
+    bank = QuestionBank()
+    bank.add_topic('bench', make_questions(args.questions))
+    started = time.perf_counter()
+    bank.difficulty_positions('bench'), bank.difficulty_masks('bench')
+    print(f"{args.questions} questions; per-difficulty pools and masks built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    scheduler, asked, state = AdaptiveScheduler(rng), Bitset(), new_state()
+    for position in bank.difficulty_positions('bench').get(args.exhausted, ()):
+        asked.add(position)
+    timings = []
+    for _ in range(args.session):
+        started = time.perf_counter()
+        _, position, _ = scheduler.next_question(bank, 'bench', asked, state)
+        timings.append(time.perf_counter() - started)
+        asked.add(position)
+        scheduler.record_answer(state, rng.randint(0, 100))
+    timings.sort()
+    print(f"{args.session} picks: median {timings[len(timings) // 2] * 1e6:.1f} us, p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us, max {timings[-1] * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
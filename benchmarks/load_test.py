@@ -0,0 +1,301 @@
+# benchmarks/load_test.py
+"""
+Load test: concurrent simulated users run whole interviews (/start, /ask, /hint, /answer,
+/explain, /generate-report) against the Flask app, with a fake Gemini backend whose
+latency follows a log-normal distribution. Prints throughput and p50/p95/p99 latency per
+endpoint plus micro-benchmarks of QuestionRouter and Evaluator, optionally saves the
+results as JSON, and compares them against a saved baseline (exit code 1 on regression).
+
+Usage (from the repo root):
+    python benchmarks/load_test.py --users 16 --sessions 64 --output baseline.json
+    python benchmarks/load_test.py --users 16 --sessions 64 --baseline baseline.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5001   # a running server and its own LLM backend
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+PERSONAS = ("Friendly", "Strict", "Neutral")
+FILLER = "it uses a hash table with a lock so every thread sees the same memory and the cache stays small".split()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))]
+
+
+class AppClient:
+    """One simulated user talking to the app in this process through Flask's test client."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self._client.open(path, method=method, json=body)
+        data = response.get_data()
+        return response.status_code, (response.get_json(silent=True) or {}) if response.is_json else {"bytes": len(data)}
+
+
+class HttpClient:
+    """One simulated user talking to a running server, with its own cookie jar."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers={"Content-Type": "application/json"})
+        try:
+            with self._opener.open(req, timeout=120) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, {"bytes": len(payload)}
+
+
+class Recorder:
+    """Latencies and errors per endpoint, shared by every simulated user."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, client, name, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            status, payload = client.request(method, path, body)
+        except Exception as e:
+            status, payload = 599, {"error": str(e)}
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if status >= 400: self.errors[name] += 1
+        return status, payload
+
+
+def run_session(make_client, recorder, topics, args, seed):
+    """One interview: start, then ask/hint/answer/explain per question, then the PDF report."""
+    rng = random.Random(seed)
+    client = make_client()
+    recorder.call(client, 'start', 'POST', '/start', {"topic": rng.choice(topics), "persona": rng.choice(PERSONAS)})
+    history = []
+    for _ in range(args.questions):
+        status, asked = recorder.call(client, 'ask', 'GET', '/ask')
+        if status != 200 or asked.get('status') != 'question': break
+        question = asked['question']
+        if rng.random() < args.hint_rate: recorder.call(client, 'hint', 'POST', '/hint', {"question": question})
+        time.sleep(args.think)
+        words = question.lower().split() + rng.choices(FILLER, k=rng.randint(3, 30))
+        answer = " ".join(rng.sample(words, len(words)))
+        status, result = recorder.call(client, 'answer', 'POST', '/answer', {"answer": answer})
+        if status != 200: continue
+        if rng.random() < args.explain_rate: recorder.call(client, 'explain', 'POST', '/explain', {"question": question, "answer": result['model_answer']})
+        history.append({"question": question, "score": result['score'], "feedback": result['feedback'], "modelAnswer": result['model_answer']})
+    if history:
+        summary = {"count": len(history), "average_score": round(sum(h['score'] for h in history) / len(history))}
+        recorder.call(client, 'generate-report', 'POST', '/generate-report', {"history": history, "summary": summary})
+
+
+def load_app(args):
+    """Imports the app with an offline configuration and injects the fake LLM."""
+    os.environ.update({"MOCKVIEW_LLM_BACKEND": "fake", "MOCKVIEW_RELOAD_INTERVAL": "0", "MOCKVIEW_SESSION_BACKEND": args.session_backend})
+    os.environ.setdefault("MOCKVIEW_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix='mockview-load-'), 'responses.sqlite3'))
+    os.environ.setdefault("MOCKVIEW_SESSION_URL", os.path.join(os.path.dirname(os.environ["MOCKVIEW_CACHE_PATH"]), 'sessions.sqlite3'))
+    from llm_client import LLMClient, FakeBackend, set_client
+    set_client(LLMClient(FakeBackend(latency=args.llm_latency, jitter=args.llm_sigma, failure_rate=args.llm_failure_rate, seed=0, distribution='lognormal'), max_concurrency=args.llm_concurrency))
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app
+        return create_app()
+
+
+def run_load(args):
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+        _, topics = HttpClient(args.url).request('GET', '/topics')
+    else:
+        app = load_app(args)
+        make_client = lambda: AppClient(app)
+        topics = app.test_client().get('/topics').get_json()
+    if not topics: raise SystemExit("The app has no topics to interview on.")
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    # The app logs every LLM call; keep the report readable.
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=args.users) as pool:
+        list(pool.map(lambda i: run_session(make_client, recorder, topics, args, i), range(args.sessions)))
+    wall = time.perf_counter() - started
+
+    endpoints = {}
+    for name, values in recorder.latencies.items():
+        values.sort()
+        endpoints[name] = {
+            "requests": len(values), "errors": recorder.errors[name], "rps": round(len(values) / wall, 2),
+            **{f"p{pct}_ms": round(percentile(values, pct) * 1000, 2) for pct in (50, 95, 99)},
+        }
+    total = sum(entry["requests"] for entry in endpoints.values())
+    return {"endpoints": endpoints, "total": {"requests": total, "errors": sum(recorder.errors.values()), "seconds": round(wall, 2), "rps": round(total / wall, 2)}}
+
+
+def _time_per_op(fn, ops, repeat=3):
+    """Best of `repeat` runs of fn() doing `ops` operations, in microseconds per operation."""
+    best = min(_timed(fn) for _ in range(repeat))
+    return round(best / ops * 1e6, 3)
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run_micro(args):
+    """QuestionRouter and Evaluator hot paths on a synthetic bank of args.bank_size questions."""
+    from question_router import QuestionRouter
+    from question_bank import Bitset
+    from scheduler import new_state
+    from evaluator import Evaluator
+
+    rng = random.Random(0)
+    words = "array list vector memory pointer cache index thread process lock page table tree graph hash queue stack heap".split()
+    data_dir = tempfile.mkdtemp(prefix='mockview-bank-')
+    per_topic = args.bank_size // 4
+    for t in range(4):
+        questions = [{"id": f"bench{t}-{i:06d}", "question": f"Question {i} about {rng.choice(words)}?", "answer": " ".join(rng.choices(words, k=40)),
+                      "difficulty": ("easy", "medium", "hard")[i % 3], "tags": [f"Tag{i % 50}", rng.choice(words)]} for i in range(per_topic)]
+        with open(os.path.join(data_dir, f"bench{t}.json"), 'w', encoding='utf-8') as f:
+            json.dump(questions, f)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_seconds = _timed(lambda: QuestionRouter(data_dir))
+        router = QuestionRouter(data_dir)
+    asked = Bitset()
+    for position in rng.sample(range(per_topic), per_topic // 2): asked.add(position)
+    ops = 2000
+    def schedule_picks():
+        state = new_state()
+        for _ in range(ops): router.next_question('bench0', asked, state)
+    micro = {
+        "router_load_ms": round(load_seconds * 1000, 2),
+        "router_get_question_us": _time_per_op(lambda: [router.get_question('bench0', asked) for _ in range(ops)], ops),
+        "router_next_question_us": _time_per_op(schedule_picks, ops),
+        "router_find_by_tag_us": _time_per_op(lambda: [router.find_question_by_tag(f"Tag{i % 50}") for i in range(ops)], ops),
+    }
+
+    answers = [q['answer'] for q in router.all_questions()]
+    evaluator = Evaluator(escalation_band=None)
+    evaluator.semantic_scorer.fit(answers)
+    evaluator.keyword_scorer.preload(answers)
+    users = [" ".join(rng.choices(words, k=25)) for _ in range(ops)]
+    models = [rng.choice(answers) for _ in range(ops)]
+    micro["evaluator_local_us"] = _time_per_op(lambda: [evaluator.evaluate_with_tier(u, m) for u, m in zip(users, models)], ops)
+    micro["evaluator_many_us"] = _time_per_op(lambda: evaluator.evaluate_many(users, models), ops)
+    return micro
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Returns (rows, regressions) comparing results to a baseline. Latencies and per-operation
+    times regress when more than `tolerance` (a fraction) worse and, for endpoint latencies,
+    also more than `min_delta_ms` worse; throughput regresses when that much lower.
+    """
+    rows, regressions = [], []
+    def check(name, old, new, higher_is_worse=True, floor=0.0):
+        if old is None or new is None: return
+        change = (new - old) / old if old else 0.0
+        worse = change > tolerance and new - old > floor if higher_is_worse else -change > tolerance
+        rows.append((name, old, new, change, worse))
+        if worse: regressions.append(name)
+    for endpoint, entry in results.get("endpoints", {}).items():
+        old = baseline.get("endpoints", {}).get(endpoint, {})
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            check(f"{endpoint} {key}", old.get(key), entry[key], floor=min_delta_ms)
+    if "total" in results and "total" in baseline:
+        check("total rps", baseline["total"]["rps"], results["total"]["rps"], higher_is_worse=False)
+    for key, value in results.get("micro", {}).items():
+        check(key, baseline.get("micro", {}).get(key), value)
+    return rows, regressions
+
+
+def print_results(results):
+    if "endpoints" in results:
+        print(f"{'endpoint':<18}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, e in sorted(results["endpoints"].items()):
+            print(f"{name:<18}{e['requests']:>9}{e['errors']:>8}{e['rps']:>9}{e['p50_ms']:>10}{e['p95_ms']:>10}{e['p99_ms']:>10}")
+        t = results["total"]
+        print(f"{'total':<18}{t['requests']:>9}{t['errors']:>8}{t['rps']:>9}   in {t['seconds']} s")
+    if "micro" in results:
+        print()
+        for name, value in results["micro"].items():
+            print(f"{name:<28}{value:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the interview API and compare against a baseline.")
+    parser.add_argument("--url", type=str, help="Test a running server instead of the app in this process.")
+    parser.add_argument("--users", "-u", type=int, default=8, help="Concurrent simulated users.")
+    parser.add_argument("--sessions", "-s", type=int, default=32, help="Interviews to run in total.")
+    parser.add_argument("--questions", "-q", type=int, default=5, help="Questions per interview.")
+    parser.add_argument("--hint-rate", type=float, default=0.5, help="Share of questions a user asks a hint for.")
+    parser.add_argument("--explain-rate", type=float, default=0.3, help="Share of answers a user asks an explanation for.")
+    parser.add_argument("--think", type=float, default=0.0, help="Seconds a user spends answering each question.")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Median fake Gemini latency in seconds.")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Log-normal shape of the fake latency (tail length).")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Share of fake Gemini calls that fail.")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Fake Gemini calls in flight at once.")
+    parser.add_argument("--session-backend", type=str, default="memory", choices=["memory", "sqlite", "redis"])
+    parser.add_argument("--bank-size", type=int, default=20000, help="Questions in the micro-benchmark bank.")
+    parser.add_argument("--skip-load", action="store_true", help="Only run the micro-benchmarks.")
+    parser.add_argument("--skip-micro", action="store_true", help="Only run the load test.")
+    parser.add_argument("--output", "-o", type=str, help="Save the results as JSON (e.g. a new baseline).")
+    parser.add_argument("--baseline", "-b", type=str, help="Compare against results saved with --output.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown as a fraction before failing.")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Endpoint latency changes smaller than this never fail.")
+    args = parser.parse_args()
+
+    results = {"config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}}
+    if not args.skip_micro: results["micro"] = run_micro(args)
+    if not args.skip_load: results.update(run_load(args))
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+    if not args.baseline: return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    changed = {k: (baseline.get("config", {}).get(k), v) for k, v in results["config"].items() if baseline.get("config", {}).get(k) != v and k not in ("tolerance", "min_delta_ms")}
+    if changed: print(f"\nWARNING: settings differ from the baseline: {changed}")
+    rows, regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    print(f"\n{'metric':<30}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, old, new, change, worse in rows:
+        print(f"{name:<30}{old:>12}{new:>12}{change:>+9.0%}{'  REGRESSION' if worse else ''}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -53,19 +53,21 @@ document.addEventListener('DOMContentLoaded', () => {
     const speak = (text) => { if (isMuted || typeof speechSynthesis === "undefined") return; speechSynthesis.cancel(); const cleanText = stripHtml(text); const utterance = new SpeechSynthesisUtterance(cleanText); speechSynthesis.speak(utterance); };
 
     // --- LOCALSTORAGE & UI HELPERS ---
+    // Answered questions are tracked by the server; a history left from older versions is sent once to be merged.
     const getAnsweredIdsFromStorage = () => JSON.parse(localStorage.getItem(ANSWERED_IDS_KEY)) || [];
-    const addAnsweredIdToStorage = (id) => { if (id && id.startsWith('dynamic-')) return; const answeredIds = getAnsweredIdsFromStorage(); if (id && !answeredIds.includes(id)) { answeredIds.push(id); localStorage.setItem(ANSWERED_IDS_KEY, JSON.stringify(answeredIds)); } };
     const addMessage = (text, sender, className = '') => { const messageDiv = document.createElement('div'); messageDiv.classList.add('message', `${sender}-message`); if (className) messageDiv.classList.add(className); messageDiv.innerHTML = text; chatWindow.appendChild(messageDiv); chatWindow.scrollTop = chatWindow.scrollHeight; if (sender === 'bot') speak(text); return messageDiv; };
-    const displaySummary = () => { let averageScore = 0; let finalMessage = "<h1>Interview Ended</h1><p>You didn't answer any questions.</p><button id='restart-interview-btn'>Practice Another Topic</button>"; if (sessionHistory.length > 0) { averageScore = Math.round(sessionHistory.reduce((acc, cur) => acc + cur.score, 0) / sessionHistory.length); finalMessage = `<h1>Interview Complete!</h1><div class="score-circle">${averageScore}%</div><p>You answered ${sessionHistory.length} question(s) with an average score of ${averageScore}%.</p><div><button id="restart-interview-btn">Practice Another Topic</button><button id="download-report-btn" class="download-report-button">Download Report</button></div>`; } summaryView.innerHTML = finalMessage; document.getElementById('restart-interview-btn').addEventListener('click', resetToHome); const downloadBtn = document.getElementById('download-report-btn'); if (downloadBtn) { downloadBtn.addEventListener('click', async () => { downloadBtn.textContent = 'Generating...'; downloadBtn.disabled = true; try { const response = await fetch(`${API_URL}/generate-report`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ history: sessionHistory, summary: { count: sessionHistory.length, average_score: averageScore } }), credentials: 'include' }); if (!response.ok) throw new Error('Report generation failed.'); const blob = await response.blob(); const url = window.URL.createObjectURL(blob); const a = document.createElement('a'); a.style.display = 'none'; a.href = url; a.download = 'MockView_Report.pdf'; document.body.appendChild(a); a.click(); window.URL.revokeObjectURL(url); a.remove(); } catch (error) { console.error('Failed to download report:', error); alert('Could not download report.'); } finally { downloadBtn.textContent = 'Download Report'; downloadBtn.disabled = false; } }); }};
+    const displaySummary = () => { let averageScore = 0; let finalMessage = "<h1>Interview Ended</h1><p>You didn't answer any questions.</p><button id='restart-interview-btn'>Practice Another Topic</button>"; if (sessionHistory.length > 0) { averageScore = Math.round(sessionHistory.reduce((acc, cur) => acc + cur.score, 0) / sessionHistory.length); finalMessage = `<h1>Interview Complete!</h1><div class="score-circle">${averageScore}%</div><p>You answered ${sessionHistory.length} question(s) with an average score of ${averageScore}%.</p><div><button id="restart-interview-btn">Practice Another Topic</button><button id="download-report-btn" class="download-report-button">Download Report</button></div>`; } summaryView.innerHTML = finalMessage; document.getElementById('restart-interview-btn').addEventListener('click', resetToHome); const downloadBtn = document.getElementById('download-report-btn'); if (downloadBtn) { downloadBtn.addEventListener('click', async () => { downloadBtn.textContent = 'Generating...'; downloadBtn.disabled = true; try { const submitted = await fetch(`${API_URL}/reports`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ history: sessionHistory, summary: { count: sessionHistory.length, average_score: averageScore } }), credentials: 'include' }); if (!submitted.ok) throw new Error('Report generation failed.'); const { job_id } = await submitted.json(); let response; for (let attempt = 0; attempt < 120; attempt++) { response = await fetch(`${API_URL}/reports/${job_id}/pdf`, { credentials: 'include' }); if (response.status !== 202) break; await new Promise(resolve => setTimeout(resolve, 500)); } if (!response.ok || response.status === 202) throw new Error('Report generation failed.'); const blob = await response.blob(); const url = window.URL.createObjectURL(blob); const a = document.createElement('a'); a.style.display = 'none'; a.href = url; a.download = 'MockView_Report.pdf'; document.body.appendChild(a); a.click(); window.URL.revokeObjectURL(url); a.remove(); } catch (error) { console.error('Failed to download report:', error); alert('Could not download report.'); } finally { downloadBtn.textContent = 'Download Report'; downloadBtn.disabled = false; } }); }};
     const endTheInterview = () => { isAwaitingAnswer = false; if(isRecording) recognition.stop(); chatView.classList.add('hidden'); displaySummary(); summaryView.classList.remove('hidden'); speak(summaryView.textContent); };
     const resetToHome = () => { summaryView.classList.add('hidden'); chatView.classList.add('hidden'); welcomeView.classList.remove('hidden'); chatWindow.innerHTML = ''; sessionHistory = []; document.querySelectorAll('.topic-item, .persona-btn').forEach(item => item.classList.remove('active')); document.querySelector('.persona-btn[data-persona=\"Neutral\"]').classList.add('active'); selectedPersona = 'Neutral'; };
     
     // --- CORE API FUNCTIONS ---
+    const streamEvents = async (path, payload, onEvent) => { const response = await fetch(`${API_URL}${path}`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(payload),credentials:'include'}); if (!response.ok) throw new Error(`Server responded with ${response.status}`); const reader = response.body.getReader(); const decoder = new TextDecoder(); let buffer = ''; while (true) { const { value, done } = await reader.read(); if (done) break; buffer += decoder.decode(value, { stream: true }); let boundary; while ((boundary = buffer.indexOf('\n\n')) !== -1) { const rawEvent = buffer.slice(0, boundary); buffer = buffer.slice(boundary + 2); const eventName = (rawEvent.match(/^event: (.*)$/m) || [])[1]; const dataLine = (rawEvent.match(/^data: (.*)$/m) || [])[1]; if (eventName) onEvent(eventName, dataLine ? JSON.parse(dataLine) : {}); } } };
+    const streamText = async (path, payload, element, prefix) => { let text = ''; await streamEvents(path, payload, (event, data) => { if (event === 'chunk') { text += data.text; element.innerHTML = `${prefix}${text.replace(/\n/g,'<br>')}`; chatWindow.scrollTop = chatWindow.scrollHeight; } }); speak(text); };
     const fetchTopics = async () => { try { const response = await fetch(`${API_URL}/topics`,{credentials:'include'}); const topics = await response.json(); topicListContainer.innerHTML = ''; topics.forEach(topic => { const topicItem = document.createElement('div'); topicItem.className = 'topic-item'; topicItem.textContent = topic.toUpperCase(); topicItem.addEventListener('click', () => { document.querySelectorAll('.topic-item').forEach(item => item.classList.remove('active')); topicItem.classList.add('active'); startInterview(topic); }); topicListContainer.appendChild(topicItem); }); } catch (error) { console.error('Failed to fetch topics:', error); topicListContainer.innerHTML = '<p class="error">Could not load topics.</p>'; } };
-    const startInterview = async (topic) => { sessionHistory = []; chatWindow.innerHTML = ''; try { const globally_answered_ids = getAnsweredIdsFromStorage(); await fetch(`${API_URL}/start`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({topic, globally_answered_ids, persona: selectedPersona}),credentials:'include'}); welcomeView.classList.add('hidden'); summaryView.classList.add('hidden'); chatView.classList.remove('hidden'); endInterviewBtn.classList.remove('hidden'); addMessage(`Great! Let's start with <strong>${topic.toUpperCase()}</strong>.`,'bot'); askQuestion(); } catch (error) { console.error('Failed to start interview:', error); } };
+    const startInterview = async (topic) => { sessionHistory = []; chatWindow.innerHTML = ''; try { const globally_answered_ids = getAnsweredIdsFromStorage(); const response = await fetch(`${API_URL}/start`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({topic, globally_answered_ids, persona: selectedPersona}),credentials:'include'}); if (response.ok && (await response.json()).progress_merged) localStorage.removeItem(ANSWERED_IDS_KEY); welcomeView.classList.add('hidden'); summaryView.classList.add('hidden'); chatView.classList.remove('hidden'); endInterviewBtn.classList.remove('hidden'); addMessage(`Great! Let's start with <strong>${topic.toUpperCase()}</strong>.`,'bot'); askQuestion(); } catch (error) { console.error('Failed to start interview:', error); } };
     const startCustomInterview = async (jd_text) => { sessionHistory = []; chatWindow.innerHTML = ''; try { const response = await fetch(`${API_URL}/start-custom-interview`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({jd_text, persona: selectedPersona}),credentials:'include'}); const data = await response.json(); if (!response.ok) throw new Error(data.error || 'Failed to start custom interview.'); welcomeView.classList.add('hidden'); summaryView.classList.add('hidden'); chatView.classList.remove('hidden'); endInterviewBtn.classList.remove('hidden'); addMessage(`Excellent! I've analyzed the job description and created a custom interview for you. Let's begin.`,'bot'); askQuestion(); } catch (error) { console.error('Failed to start custom interview:', error); alert(`Error: ${error.message}`); } finally { startCustomBtn.textContent = 'Start Custom Interview'; startCustomBtn.disabled = false; } };
-    const askQuestion = async () => { isAwaitingAnswer = false; currentQuestionId = null; currentQuestionText = ""; try { const response = await fetch(`${API_URL}/ask`,{credentials:'include'}); if (!response.ok) throw new Error(`Server responded with ${response.status}`); const data = await response.json(); if (data.status === 'complete') { endTheInterview(); } else if (data.status === 'question') { currentQuestionId = data.id; currentQuestionText = data.question; const questionHTML = `<div class="question-container"><span><strong>Question:</strong> ${currentQuestionText}</span><button class="hint-button" id="hint-btn-${currentQuestionId}">💡 Get a Hint</button></div>`; const messageElement = addMessage(questionHTML,'bot'); isAwaitingAnswer = true; const hintBtn = messageElement.querySelector(`#hint-btn-${currentQuestionId}`); if (hintBtn) { hintBtn.addEventListener('click', async () => { hintBtn.textContent = 'Getting hint...'; hintBtn.disabled = true; try { const hintResponse = await fetch(`${API_URL}/hint`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({question:currentQuestionText}),credentials:'include'}); const hintData = await hintResponse.json(); addMessage(`<strong>Hint:</strong> ${hintData.hint}`,'bot','hint-message'); } catch (e) { console.error("Hint fetch failed:", e); } }, { once: true }); } } } catch (error) { console.error('Failed to ask question:', error); } };
-    const submitAnswer = async () => { const answer = answerInput.value.trim(); if (!answer || !isAwaitingAnswer) return; if (isRecording) { recognition.stop(); } isAwaitingAnswer = false; addMessage(answer, 'user'); answerInput.value = ''; addMessage('<i>Evaluating your answer...</i>','bot'); try { const response = await fetch(`${API_URL}/answer`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({answer}),credentials:'include'}); const result = await response.json(); addAnsweredIdToStorage(currentQuestionId); sessionHistory.push({question:currentQuestionText,userAnswer:answer,score:result.score,feedback:result.feedback,modelAnswer:result.model_answer}); const feedbackHTML = `<strong>Feedback (Score: ${result.score}%)</strong>: ${result.feedback}<br><br><strong>Model Answer</strong>: ${result.model_answer}<div class="feedback-actions"><button class="explanation-button" id="explain-btn-${currentQuestionId}">🎓 Explain Concept</button><button class="next-question-button" id="next-q-btn-${currentQuestionId}">Next Question →</button></div>`; const feedbackMessageElement = addMessage(feedbackHTML,'bot','feedback-message'); const explainBtn = feedbackMessageElement.querySelector(`#explain-btn-${currentQuestionId}`); if (explainBtn) { explainBtn.addEventListener('click', async () => { explainBtn.textContent = 'Thinking...'; explainBtn.disabled = true; try { const explainResponse = await fetch(`${API_URL}/explain`,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({question:currentQuestionText,answer:result.model_answer}),credentials:'include'}); const explainData = await explainResponse.json(); addMessage(`<strong>Deeper Dive:</strong><br>${explainData.explanation.replace(/\n/g,'<br>')}`,'bot','explanation-message'); } catch(e) { console.error("Explanation fetch failed:", e); } }, { once: true }); } const nextQuestionBtn = feedbackMessageElement.querySelector(`#next-q-btn-${currentQuestionId}`); if(nextQuestionBtn) { nextQuestionBtn.addEventListener('click', () => { askQuestion(); }, { once: true }); } } catch (error) { console.error('Failed to submit answer:', error); } };
+    const askQuestion = async () => { isAwaitingAnswer = false; currentQuestionId = null; currentQuestionText = ""; try { const response = await fetch(`${API_URL}/ask`,{credentials:'include'}); if (!response.ok) throw new Error(`Server responded with ${response.status}`); const data = await response.json(); if (data.status === 'complete') { endTheInterview(); } else if (data.status === 'question') { currentQuestionId = data.id; currentQuestionText = data.question; const questionHTML = `<div class="question-container"><span><strong>Question:</strong> ${currentQuestionText}</span><button class="hint-button" id="hint-btn-${currentQuestionId}">💡 Get a Hint</button></div>`; const messageElement = addMessage(questionHTML,'bot'); isAwaitingAnswer = true; const hintBtn = messageElement.querySelector(`#hint-btn-${currentQuestionId}`); if (hintBtn) { hintBtn.addEventListener('click', async () => { hintBtn.textContent = 'Getting hint...'; hintBtn.disabled = true; try { const hintElement = addMessage('<strong>Hint:</strong> ','bot','hint-message'); await streamText('/hint-stream', {question:currentQuestionText}, hintElement, '<strong>Hint:</strong> '); } catch (e) { console.error("Hint fetch failed:", e); } }, { once: true }); } } } catch (error) { console.error('Failed to ask question:', error); } };
+    const submitAnswer = async () => { const answer = answerInput.value.trim(); if (!answer || !isAwaitingAnswer) return; if (isRecording) { recognition.stop(); } isAwaitingAnswer = false; addMessage(answer, 'user'); answerInput.value = ''; const feedbackMessageElement = addMessage('<i>Evaluating your answer...</i>','bot','feedback-message'); try { let streamedFeedback = ''; let result = null; await streamEvents('/answer-stream', {answer}, (event, data) => { if (event === 'feedback') { streamedFeedback += data.text; feedbackMessageElement.innerHTML = `<strong>Feedback</strong>: ${streamedFeedback.replace(/\n/g,'<br>')}`; chatWindow.scrollTop = chatWindow.scrollHeight; } else if (event === 'result') { result = data; } }); if (!result) throw new Error('Evaluation stream ended without a result.'); sessionHistory.push({question:currentQuestionText,userAnswer:answer,score:result.score,feedback:result.feedback,modelAnswer:result.model_answer}); const feedbackHTML = `<strong>Feedback (Score: ${result.score}%)</strong>: ${result.feedback}<br><br><strong>Model Answer</strong>: ${result.model_answer}<div class="feedback-actions"><button class="explanation-button" id="explain-btn-${currentQuestionId}">🎓 Explain Concept</button><button class="next-question-button" id="next-q-btn-${currentQuestionId}">Next Question →</button></div>`; feedbackMessageElement.innerHTML = feedbackHTML; speak(feedbackHTML); const explainBtn = feedbackMessageElement.querySelector(`#explain-btn-${currentQuestionId}`); if (explainBtn) { explainBtn.addEventListener('click', async () => { explainBtn.textContent = 'Thinking...'; explainBtn.disabled = true; try { const explanationElement = addMessage('<strong>Deeper Dive:</strong><br>','bot','explanation-message'); await streamText('/explain-stream', {question:currentQuestionText,answer:result.model_answer}, explanationElement, '<strong>Deeper Dive:</strong><br>'); } catch(e) { console.error("Explanation fetch failed:", e); } }, { once: true }); } const nextQuestionBtn = feedbackMessageElement.querySelector(`#next-q-btn-${currentQuestionId}`); if(nextQuestionBtn) { nextQuestionBtn.addEventListener('click', () => { askQuestion(); }, { once: true }); } } catch (error) { console.error('Failed to submit answer:', error); } };
 
     // --- EVENT LISTENERS ---
     personaBtns.forEach(btn => { btn.addEventListener('click', () => { personaBtns.forEach(pBtn => pBtn.classList.remove('active')); btn.classList.add('active'); selectedPersona = btn.dataset.persona; }); });
@@ -0,0 +1,43 @@
+# notebooks/compile_bank.py
+import os
+import sys
+import argparse
+
+# Compiling reuses the server's loader and validation, so the binary bank holds exactly what the server would load.
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'backend')
+QUESTIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions')
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions.bank')
+
+
+def compile_questions(questions_dir: str, output: str):
+    """Validates data/questions/*.json (with their .jsonl overlays) and writes the memory-mappable bank the server opens at startup."""
+    sys.path.insert(0, BACKEND_DIR)
+    from question_router import QuestionRouter
+    from semantic_scorer import SemanticScorer
+    from bank_format import compile_bank
+    from question_loader import topic_signature
+
+    router = QuestionRouter(questions_dir)
+    questions = {topic: router.questions[topic] for topic in router.topics if topic in router.questions}
+    scorer = SemanticScorer()
+    scorer.fit(q['answer'] for q in router.all_questions())
+    sources = {topic: topic_signature(router.topic_files[topic]) for topic in questions}
+
+    size = compile_bank(questions, output, sources=sources, scorer=scorer.statistics())
+    print(f"Compiled {len(router.bank)} questions from {len(questions)} topics into {output} ({size / 1024:.1f} KiB).")
+    if router.load_report["errors"]:
+        print(f"{len(router.load_report['errors'])} invalid records were skipped; see the warnings above.")
+    return not router.load_report["errors"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the JSON question bank into the binary, memory-mapped format.")
+    parser.add_argument("--questions_dir", type=str, default=QUESTIONS_DIR, help="Directory holding the topic JSON files.")
+    parser.add_argument("--output", "-o", type=str, default=DEFAULT_OUTPUT, help="Where to write the compiled bank.")
+    parser.add_argument("--strict", action="store_true", help="Exit with an error if any record was skipped.")
+    args = parser.parse_args()
+    if not compile_questions(args.questions_dir, args.output) and args.strict:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
 # notebooks/generate.py
-import google.generativeai as genai
 import os
+import sys
 import json
+import glob
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# Generation and the precompute job reuse the server's LLM client, prompts and cache keys.
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+QUESTIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions')
+DEFAULT_ASSISTS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'assists', 'assists.jsonl')
+GENERATE_TIMEOUT = 120.0  # seconds for one batch of questions; longer than the server's per-call timeout
+
 # --- SETUP ---
 
 def setup_api():
-    """Load environment variables and set up the Gemini API key."""
+    """Load environment variables and check the Gemini API key the LLM client will use."""
     dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
     load_dotenv(dotenv_path=dotenv_path)
     
@@ -16,21 +25,19 @@ def setup_api():
     if not api_key:
         raise ValueError("Gemini API key not found. Make sure it's in a .env file as GEMINI_API_KEY.")
     
-    genai.configure(api_key=api_key)
-    print("Gemini API key configured successfully.")
+    print("Gemini API key found.")
 
 # --- CORE FUNCTIONS ---
 
 def generate_questions(topic: str, num_questions: int, difficulty: str) -> list | None:
     """
-    Generates interview questions for a given topic using the Gemini API.
+    Generates interview questions for a given topic through the shared LLM client, which adds
+    the server's concurrency bound, circuit breaker and metrics (and MOCKVIEW_LLM_BACKEND=fake).
     """
-    print(f"Generating {num_questions} questions for topic: '{topic}' with Gemini...")
+    from llm_client import get_client
+    print(f"Generating {num_questions} questions for topic: '{topic}'...")
 
     topic_prefix = topic.split()[0].lower().replace('+', 'p')
-
-    # Configure the model - gemini-1.5-flash is fast and capable
-    model = genai.GenerativeModel('gemini-1.5-flash')
     
     # Instructions for the model
     prompt = f"""
@@ -49,67 +56,163 @@ def generate_questions(topic: str, num_questions: int, difficulty: str) -> list
     """
 
     try:
-        # Generate content with specific generation config for JSON output
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                response_mime_type="application/json"
-            )
-        )
-        
-        generated_data = json.loads(response.text)
-        return generated_data.get("questions") # Extract the list
+        # JSON mode; the client also strips the ```json fences the model sometimes adds anyway.
+        generated_data = get_client().generate_json(prompt, timeout=GENERATE_TIMEOUT)
+        return generated_data.get("questions") if isinstance(generated_data, dict) else None
     except Exception as e:
-        print(f"An error occurred while calling the Gemini API: {e}")
-        # Sometimes the model might still wrap the JSON in markdown, let's try to fix it
-        try:
-            print("Attempting to fix potential JSON formatting issues...")
-            fixed_text = response.text.strip().replace('```json', '').replace('```', '')
-            generated_data = json.loads(fixed_text)
-            return generated_data.get("questions")
-        except Exception as fix_e:
-            print(f"Could not fix JSON: {fix_e}")
-            return None
-
-
-def save_questions(output_filename: str, new_questions: list):
-    """Saves generated questions to the data directory."""
-    filepath = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions', output_filename)
-    
-    print(f"Preparing to save questions to {filepath}...")
-    try:
-        with open(filepath, 'r') as f:
-            existing_questions = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_questions = []
+        print(f"An error occurred while generating questions: {e}")
+        return None
+
+
+def topic_file_name(topic: str) -> str:
+    """Topic file a generated topic is saved to, e.g. 'C++ STL' -> cpp.json."""
+    return f"{topic.split()[0].lower().replace('+', 'p')}.json"
+
+
+def open_store(questions_dir: str = QUESTIONS_DIR):
+    """The append-only question store over data/questions; a topic's questions are indexed for duplicate checks when it is first written."""
+    from question_store import QuestionStore
+    return QuestionStore(questions_dir)
+
+
+def save_questions(output_filename: str, new_questions: list, store=None) -> list:
+    """
+    Appends generated questions to the topic's overlay file (data/questions/<topic>.jsonl), which the
+    server reads with the topic. Colliding ids are renamed and near-duplicates of stored questions skipped.
+    """
+    store = store or open_store()
+    topic = output_filename[:-len('.json')] if output_filename.endswith('.json') else output_filename
+    added, rejected = store.append(topic, new_questions)
+    for message in rejected:
+        print(f"Skipped {message}")
+    print(f"Successfully saved {len(added)} new questions to {store.path(topic)}" + (f" ({len(rejected)} skipped)" if rejected else ""))
+    return added
 
-    existing_questions.extend(new_questions)
 
-    with open(filepath, 'w') as f:
-        json.dump(existing_questions, f, indent=2)
-        
-    print(f"Successfully saved {len(new_questions)} new questions to {filepath}")
+def generate_bulk(topics: list, num_questions: int, difficulty: str, concurrency: int, batch_size: int):
+    """
+    Non-interactive generation for many topics at once. Each topic's questions are requested in
+    batches of `batch_size` with up to `concurrency` requests in flight, and every batch is saved
+    as soon as it arrives. Returns False if any request failed.
+    """
+    store = open_store()
+    jobs = [(topic, min(batch_size, num_questions - start)) for topic in topics for start in range(0, num_questions, batch_size)]
+    print(f"{len(store)} questions in the bank; generating {num_questions} for each of {len(topics)} topics in {len(jobs)} requests (concurrency {concurrency}).")
+    saved = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(generate_questions, topic, count, difficulty): topic for topic, count in jobs}
+        for future in as_completed(futures):
+            questions = future.result()
+            if not questions:
+                failed += 1
+                continue
+            saved += len(save_questions(topic_file_name(futures[future]), questions, store))
+    print(f"Saved {saved} new questions for {len(topics)} topics; {failed} of {len(jobs)} requests failed (re-run to retry them).")
+    return failed == 0
+
+
+def precompute_assists(personas: list, concurrency: int, assists_file: str):
+    """
+    Precomputes a hint and an explanation per persona for every question in data/questions,
+    writing them to the sidecar store the backend serves /hint and /explain from.
+    Results already in the store are skipped, so an interrupted run can simply be restarted.
+    """
+    from prompts import build_hint_prompt, build_explanation_prompt
+    from response_cache import make_key
+    from assist_store import AssistStore
+    from llm_client import create_client_from_env
+    from question_loader import read_overlay, merge_overlay, validate_questions
+
+    store = AssistStore(assists_file)
+    client = create_client_from_env(max_concurrency=concurrency)
+
+    # Records are checked like the server loads them, so a malformed one is skipped instead of ending the run.
+    jobs, seen_ids = [], {}
+    for filepath in sorted(glob.glob(os.path.join(QUESTIONS_DIR, '*.json'))):
+        topic = os.path.basename(filepath)[:-len('.json')]
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipped {filepath}: {e}")
+            continue
+        questions, errors = validate_questions(topic, merge_overlay(records, read_overlay(filepath)), seen_ids)
+        for message in errors:
+            print(f"Skipped {message}")
+        for q in questions:
+            for persona in personas:
+                hint_key = make_key('hint', q['question'], persona)
+                if hint_key not in store:
+                    jobs.append(({"key": hint_key, "kind": "hint", "persona": persona, "question_id": q['id']}, build_hint_prompt(q['question'], persona)))
+                explanation_key = make_key('explanation', q['question'], q['answer'], persona)
+                if explanation_key not in store:
+                    jobs.append(({"key": explanation_key, "kind": "explanation", "persona": persona, "question_id": q['id']}, build_explanation_prompt(q['question'], q['answer'], persona)))
+
+    print(f"{len(store)} assists already precomputed, {len(jobs)} to generate (concurrency {concurrency}).")
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(client.generate, prompt): record for record, prompt in jobs}
+        for future in as_completed(futures):
+            record = futures[future]
+            try:
+                store.append({**record, "text": future.result()})
+                done += 1
+            except Exception as e:
+                failed += 1
+                print(f"Failed {record['kind']} for {record['question_id']} ({record['persona']}): {e}")
+            if (done + failed) % 50 == 0:
+                print(f"Progress: {done + failed}/{len(jobs)}")
+
+    print(f"Precomputed {done} assists into {assists_file}; {failed} failed (re-run to retry them).")
+    return failed == 0
 
 
 # --- MAIN EXECUTION BLOCK ---
 def main():
     parser = argparse.ArgumentParser(description="Generate interview questions using the Gemini API.")
-    parser.add_argument("topic", type=str, help="The topic for the interview questions.")
+    parser.add_argument("topics", type=str, nargs="*", metavar="topic", help="The topic for the interview questions; several topics are generated concurrently without asking.")
     parser.add_argument("--num_questions", "-n", type=int, default=3, help="Number of questions to generate.")
     parser.add_argument("--difficulty", "-d", type=str, default="medium", choices=["easy", "medium", "hard"])
     parser.add_argument("--output_file", "-o", type=str, help="Output JSON file name.")
+    parser.add_argument("--yes", "-y", action="store_true", help="Save generated questions without asking.")
+    parser.add_argument("--batch_size", type=int, default=10, help="Questions requested per call when generating several topics.")
+    parser.add_argument("--compact", action="store_true", help="Fold every topic's appended questions back into its JSON file.")
+    parser.add_argument("--precompute-assists", action="store_true", help="Precompute hints and explanations for every question in the bank.")
+    parser.add_argument("--personas", nargs="+", default=['Friendly', 'Strict', 'Neutral'], help="Personas to precompute assists for.")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Maximum concurrent LLM calls when precomputing or generating several topics.")
+    parser.add_argument("--assists_file", type=str, default=DEFAULT_ASSISTS_FILE, help="Sidecar store for precomputed assists.")
     args = parser.parse_args()
-    
-    output_file = args.output_file or f"{args.topic.split()[0].lower().replace('+', 'p')}.json"
+    if not args.topics and not args.precompute_assists and not args.compact:
+        parser.error("a topic is required unless --precompute-assists or --compact is given")
+    if args.output_file and len(args.topics) > 1:
+        parser.error("--output_file only applies to a single topic")
+
+    if args.compact:
+        moved = open_store().compact_all()
+        print(f"Compacted {sum(moved.values())} appended questions into {sum(1 for n in moved.values() if n)} topic files.")
+        return
 
     try:
-        setup_api()
-        questions = generate_questions(args.topic, args.num_questions, args.difficulty)
+        if os.getenv("MOCKVIEW_LLM_BACKEND", "gemini").lower() != "fake":
+            setup_api()
+        if args.precompute_assists:
+            if not precompute_assists(args.personas, args.concurrency, args.assists_file):
+                sys.exit(1)
+            return
+
+        if len(args.topics) > 1:
+            if not generate_bulk(args.topics, args.num_questions, args.difficulty, args.concurrency, args.batch_size):
+                sys.exit(1)
+            return
+
+        topic = args.topics[0]
+        output_file = args.output_file or topic_file_name(topic)
+        questions = generate_questions(topic, args.num_questions, args.difficulty)
         if questions:
             print("\n--- Generated Questions ---")
             print(json.dumps(questions, indent=2))
             print("-------------------------\n")
-            if input("Save these questions? (y/n): ").lower() == 'y':
+            if args.yes or input("Save these questions? (y/n): ").lower() == 'y':
                 save_questions(output_file, questions)
         else:
             print("Failed to generate questions.")
@@ -0,0 +1,77 @@
+# notebooks/grade.py
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+# Grading reuses the server's evaluator, scorers, client and question bank.
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'backend')
+QUESTIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions')
+DEFAULT_CACHE_PATH = os.path.join(BACKEND_DIR, 'cache', 'responses.sqlite3')
+
+
+def read_items(path: str) -> list:
+    """
+    Reads answers to grade from a JSON list or a JSON Lines file ('-' for stdin).
+    Each item is {"question_id", "answer"} for bank questions or {"question", "model_answer", "answer"}.
+    """
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    with f:
+        text = f.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def grade(items: list, persona: str, use_llm: bool, pack_size: int, concurrency: int, cache_path: str | None, out=sys.stdout):
+    """Grades every item, writing one JSON line per result as soon as it completes. Returns the number of failed items."""
+    sys.path.insert(0, BACKEND_DIR)
+    from evaluator import Evaluator
+    from question_router import QuestionRouter
+    from response_cache import ResponseCache
+    from llm_client import create_client_from_env
+
+    router = QuestionRouter(QUESTIONS_DIR)
+    bank_answers = [q['answer'] for q in router.all_questions()]
+    evaluator = Evaluator(llm_client=create_client_from_env(max_concurrency=concurrency) if use_llm else None, cache=ResponseCache(cache_path) if cache_path else None)
+    evaluator.semantic_scorer.fit(bank_answers)
+    evaluator.keyword_scorer.preload(bank_answers)
+
+    resolved = []
+    for item in items:
+        question_data = router.bank.get(item.get('question_id')) if isinstance(item, dict) and item.get('question_id') else None
+        if question_data: item = {**item, "question": question_data['question'], "model_answer": question_data['answer']}
+        resolved.append(item)
+
+    failed = 0
+    for index, result in evaluator.evaluate_batch(resolved, use_llm=use_llm, persona=persona, pack_size=pack_size, max_parallel_packs=concurrency):
+        failed += 'error' in result
+        item = resolved[index] if isinstance(resolved[index], dict) else {}
+        out.write(json.dumps({"index": index, "question_id": item.get('question_id'), **result}, ensure_ascii=False) + '\n')
+        out.flush()
+    print(f"Graded {len(items) - failed}/{len(items)} answers. Tiers: {evaluator.tier_stats()}", file=sys.stderr)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a batch of interview answers (a whole interview, or a regrade after a rubric change).")
+    parser.add_argument("input", type=str, help="JSON or JSON Lines file of answers to grade, or '-' for stdin.")
+    parser.add_argument("--output", "-o", type=str, help="Write JSON Lines results here instead of stdout.")
+    parser.add_argument("--persona", type=str, default="Neutral", choices=["Friendly", "Strict", "Neutral"])
+    parser.add_argument("--keyword-only", action="store_true", help="Grade locally with keyword overlap only, without calling the LLM.")
+    parser.add_argument("--pack-size", type=int, default=8, help="Answers packed into one LLM grading prompt.")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Packed LLM prompts in flight at once.")
+    parser.add_argument("--cache_path", type=str, default=DEFAULT_CACHE_PATH, help="Response cache shared with the server ('' to disable).")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        failed = grade(read_items(args.input), args.persona, not args.keyword_only, args.pack_size, args.concurrency, args.cache_path or None, out)
+    finally:
+        if args.output: out.close()
+    if failed: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
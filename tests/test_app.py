@@ -0,0 +1,124 @@
+import re
+import json
+import time
+import pytest
+from backend import app
+from backend.llm_client import LLMClient, FakeBackend
+from backend.scheduler import REVIEW_GAPS
+
+
+def _topics_in(prompt):
+    return re.findall(r'^\s*\d+\. (.+)$', prompt, re.MULTILINE)
+
+
+@pytest.fixture
+def client(tmp_path):
+    flask_app = app.create_app({"CACHE_PATH": str(tmp_path / 'cache.sqlite3'), "SESSION_PATH": str(tmp_path / 'sessions.sqlite3'),
+                                "PROGRESS_PATH": str(tmp_path / 'progress.sqlite3'), "RELOAD_INTERVAL": 0})
+    yield flask_app.test_client()
+    app.shutdown()
+
+
+@pytest.fixture
+def use_backend(monkeypatch):
+    def use(backend):
+        llm = LLMClient(backend)
+        monkeypatch.setattr(app, 'get_client', lambda: llm)
+        return backend
+    return use
+
+
+def test_dynamic_questions_retry_only_the_topics_left_invalid(use_backend):
+    """Test that an invalid item in the middle of a reply is retried for its own topic."""
+    prompts = []
+    def responder(prompt, json_mode):
+        prompts.append(_topics_in(prompt))
+        items = [{"question": f"About {topic}?", "answer": "An answer."} for topic in prompts[-1]]
+        if len(prompts) == 1: items[1] = {"question": "No answer"}
+        return json.dumps({"questions": items})
+    use_backend(FakeBackend(responder=responder))
+
+    questions = app._get_dynamic_questions(['trees', 'graphs', 'heaps'])
+
+    assert prompts == [['trees', 'graphs', 'heaps'], ['graphs']]
+    assert sorted(q['tags'][0] for q in questions) == ['graphs', 'heaps', 'trees']
+    assert all(q['question'] == f"About {q['tags'][0]}?" for q in questions)
+
+
+def test_dynamic_questions_stop_after_the_retry_budget(use_backend):
+    """Test that a model that never fills a slot is asked at most max_attempts times."""
+    backend = use_backend(FakeBackend(responder=lambda prompt, json_mode: json.dumps({"questions": []})))
+    assert app._get_dynamic_questions(['trees', 'graphs'], max_attempts=2) == []
+    assert backend.calls == 2
+
+
+def test_dynamic_questions_return_partial_results_at_the_deadline(use_backend):
+    """Test that what was generated before the deadline is returned and a slow retry is cut short."""
+    def responder(prompt, json_mode):
+        topics = _topics_in(prompt)
+        if len(topics) == 1: time.sleep(1)  # the retry is slower than the time left
+        return json.dumps({"questions": [{"question": f"About {topics[0]}?", "answer": "An answer."}]})
+    use_backend(FakeBackend(responder=responder))
+
+    started = time.monotonic()
+    questions = app._get_dynamic_questions(['trees', 'graphs'], deadline=0.3)
+
+    assert [q['tags'] for q in questions] == [['trees']]
+    assert time.monotonic() - started < 0.8
+
+
+def test_bulk_reports_reject_entries_that_are_not_objects(client):
+    response = client.post('/reports/bulk', json={"reports": [{"history": [], "summary": {}}, ["not", "a", "report"]]})
+    assert response.status_code == 400
+
+
+def test_custom_interview_rejects_a_job_description_that_is_not_text(client):
+    response = client.post('/start-custom-interview', json={"jd_text": ["C++", "SQL"]})
+    assert response.status_code == 400
+
+
+def test_progress_is_recorded_once_an_answer_is_graded(client, monkeypatch, use_backend):
+    use_backend(FakeBackend())
+    client.post('/start', json={"topic": "cpp"})
+    user, question_id = client.get_cookie(app.PROGRESS_COOKIE).value, client.get('/ask').get_json()['id']
+    def answered(): return app.progress_store.answered(user, 'cpp', app.question_router.bank)
+
+    def fail(*args, **kwargs): raise RuntimeError("grading failed")
+    monkeypatch.setattr(app.evaluator, 'evaluate_with_tier', fail)
+    assert client.post('/answer', json={"answer": "An answer."}).status_code == 500
+    assert len(answered()) == 0
+
+    monkeypatch.setattr(app.evaluator, 'evaluate_with_tier', lambda *args, **kwargs: ("Good.", 90, 'local'))
+    assert client.post('/answer', json={"answer": "An answer."}).get_json()['score'] == 90
+    assert list(answered()) == [app.question_router.bank.position_of('cpp', question_id)]
+
+
+def test_session_positions_follow_questions_across_a_bank_reload(tmp_path, monkeypatch, use_backend):
+    """Test that a reload which shifts the positions of a topic neither repeats asked questions nor reviews the wrong one."""
+    def write_topic(ids):
+        questions = [{"id": qid, "question": f"About {qid}?", "answer": "An answer.", "difficulty": "medium", "tags": [qid]} for qid in ids]
+        (tmp_path / 'questions' / 'algo.json').write_text(json.dumps(questions))
+    (tmp_path / 'questions').mkdir()
+    ids = [f"algo-{i}" for i in range(8)]
+    write_topic(ids)
+    flask_app = app.create_app({"QUESTIONS_DIR": str(tmp_path / 'questions'), "COMPILED_BANK": str(tmp_path / 'none.bank'), "CACHE_PATH": str(tmp_path / 'cache.sqlite3'),
+                                "SESSION_PATH": str(tmp_path / 'sessions.sqlite3'), "PROGRESS_PATH": str(tmp_path / 'progress.sqlite3'), "RELOAD_INTERVAL": 0})
+    client = flask_app.test_client()
+    use_backend(FakeBackend())
+    scores = iter([10] + [60] * 10)
+    monkeypatch.setattr(app.evaluator, 'evaluate_with_tier', lambda *args, **kwargs: ("Feedback.", next(scores), 'local'))
+    try:
+        client.post('/start', json={"topic": "algo"})
+        weak = client.get('/ask').get_json()['id']
+        client.post('/answer', json={"answer": "An answer."})
+        write_topic(["algo-new"] + ids)  # every position moves up by one
+        app.question_router.reload()
+
+        asked = [weak]
+        for _ in range(REVIEW_GAPS[0] - 1):
+            asked.append(client.get('/ask').get_json()['id'])
+            client.post('/answer', json={"answer": "An answer."})
+        assert len(set(asked)) == len(asked)
+        assert client.get('/ask').get_json()['id'] == weak
+    finally:
+        app.shutdown()
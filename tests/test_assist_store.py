@@ -0,0 +1,22 @@
+from backend.assist_store import AssistStore
+from backend.response_cache import make_key
+
+def test_records_are_reloaded_from_disk(tmp_path):
+    """Test that appended assists are served by a fresh store reading the same file."""
+    path = str(tmp_path / "assists.jsonl")
+    key = make_key('hint', "What is a deadlock?", 'Neutral')
+    AssistStore(path).append({"key": key, "kind": "hint", "persona": 'Neutral', "question_id": "os-001", "text": "Think about circular waiting."})
+
+    store = AssistStore(path)
+    assert store.get(key) == "Think about circular waiting."
+    assert key in store
+
+def test_truncated_last_line_is_skipped_and_repaired(tmp_path):
+    """Test that a line cut short by an interrupted run is ignored and does not corrupt later appends."""
+    path = tmp_path / "assists.jsonl"
+    path.write_text('{"key": "a", "text": "complete"}\n{"key": "b", "te', encoding='utf-8')
+
+    store = AssistStore(str(path))
+    assert len(store) == 1
+    store.append({"key": "c", "text": "after resume"})
+    assert AssistStore(str(path)).get("c") == "after resume"
@@ -0,0 +1,50 @@
+import random
+import pytest
+from backend.bank_format import CompiledBank, compile_bank
+from backend.question_bank import QuestionBank
+from backend.tag_index import TagIndex
+
+QUESTIONS = {
+    "dsa": [{"id": f"dsa-{i:03d}", "question": f"Question {i}?", "answer": f"Answer {i}.", "difficulty": "easy", "tags": ["Arrays", "Sorting"] if i % 2 else ["Trees"]} for i in range(20)],
+    "cpp": [{"id": "cpp-001", "question": "What is RAII? ✓", "answer": "Scope-bound resources.", "difficulty": "hard", "tags": ["Memory Management"]}],
+    "os": [],
+}
+
+@pytest.fixture
+def compiled(tmp_path):
+    """Returns a CompiledBank built from QUESTIONS."""
+    path = str(tmp_path / "questions.bank")
+    compile_bank(QUESTIONS, path, scorer={"documents": 21, "document_frequency": {"answer": 20}})
+    return CompiledBank(path)
+
+def test_compiled_bank_round_trip(compiled):
+    """Test that every question decodes back to its JSON record and ids resolve by binary search."""
+    assert len(compiled) == 21
+    for topic, questions in QUESTIONS.items():
+        first, count = compiled.topics[topic]
+        assert [compiled.question_at(first + i).to_dict() for i in range(count)] == questions
+    assert compiled.topic_of(compiled.find("cpp-001")) == "cpp"
+    assert compiled.find("missing") is None
+    assert compiled.scorer_statistics["documents"] == 21
+
+def test_question_bank_serves_compiled_topics(compiled):
+    """Test that a bank backed by the memory map answers the same queries as an in-memory one."""
+    bank = QuestionBank()
+    bank.add_compiled(compiled)
+    assert bank.get("dsa-007")["question"] == "Question 7?"
+    assert bank.position_of("dsa", "dsa-007") == 7 and bank.position_of("cpp", "dsa-007") is None
+    excluded = bank.exclusion_set("dsa", [f"dsa-{i:03d}" for i in range(19)])
+    assert bank.sample("dsa", excluded, rng=random.Random(1))["id"] == "dsa-019"
+
+    bank.add_topic("dsa", QUESTIONS["dsa"][:1])  # a reloaded topic shadows its compiled copy
+    assert bank.get("dsa-007") is None and bank.get("dsa-000")["id"] == "dsa-000"
+
+def test_compiled_tag_postings_match_tag_index(compiled):
+    """Test that the stored postings are the ones TagIndex.from_bank would build."""
+    bank = QuestionBank()
+    for topic, questions in QUESTIONS.items():
+        bank.add_topic(topic, questions)
+    expected = TagIndex.from_bank(bank)
+    index = TagIndex.from_compiled(compiled)
+    assert {key: list(ids) for key, ids in index.postings.items()} == expected.postings
+    assert list(index.lookup("c++")) == ["cpp-001"]
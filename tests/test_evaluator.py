@@ -1,6 +1,7 @@
 # tests/test_evaluator.py
 import pytest
 from backend.evaluator import Evaluator
+from backend.keyword_scorer import KeywordScorer
 
 @pytest.fixture
 def evaluator():
@@ -54,4 +55,125 @@ def test_evaluation_with_empty_user_answer(evaluator):
     
     feedback, score = evaluator.evaluate(user_answer, model_answer)
     
-    assert score == 0
\ No newline at end of file
+    assert score == 0
+
+def test_evaluate_many_matches_single_evaluations(evaluator):
+    """Test that bulk keyword grading returns the same results as grading one answer at a time."""
+    pairs = [
+        ("A vector stores elements in contiguous memory, a list is doubly-linked.", "Vector is a dynamic array with contiguous memory. List is a doubly-linked list."),
+        ("Smart pointers are for memory management, like unique_ptr.", "Smart pointers automate memory management, preventing leaks. Examples are unique_ptr and shared_ptr."),
+        ("", "Anything"),
+        ("Whatever the user says", ""),
+    ]
+    user_answers = [user for user, _ in pairs]
+    model_answers = [model for _, model in pairs]
+
+    assert evaluator.evaluate_many(user_answers, model_answers) == [evaluator.evaluate(u, m) for u, m in pairs]
+
+def test_keyword_vocabulary_stops_growing_but_still_scores_new_words():
+    """Test that once the vocabulary is full, new words are scored per call without being interned or cached."""
+    scorer = KeywordScorer(max_vocab=4)
+    scorer.preload(["a vector is contiguous"])
+    pairs = [("a heap is a tree", "a binary heap is a tree"), ("vector of heaps", "a heap stores a vector"), ("", "heap tree")]
+    singles = [scorer.score(user, model) for user, model in pairs]
+
+    assert singles == [80, 25, 0]
+    assert list(scorer.score_many([u for u, _ in pairs], [m for _, m in pairs])) == singles
+    assert len(scorer.vocab) == 4 and len(scorer._models) == 1
+
+def test_evaluate_many_with_blank_or_punctuation_only_answers_at_the_ends(evaluator):
+    """Test that empty or punctuation-only first and last answers keep every answer aligned with its pair."""
+    model_answer = "A vector is a dynamic array in contiguous memory."
+    for user_answers in (['', 'a vector b'], ['vector array', '?'], ['?', 'vector array', '', '...']):
+        model_answers = [model_answer] * len(user_answers)
+        assert evaluator.evaluate_many(user_answers, model_answers) == [evaluator.evaluate(u, model_answer) for u in user_answers]
+
+def test_tiered_evaluation_only_escalates_ambiguous_answers():
+    """Test that confident local scores skip the LLM and ambiguous ones escalate to it."""
+    from backend.llm_client import LLMClient, FakeBackend
+    backend = FakeBackend()
+    evaluator = Evaluator(llm_client=LLMClient(backend), escalation_band=(30, 80))
+    model_answer = "A vector is a dynamic array storing elements in contiguous memory. A list is a doubly-linked list."
+
+    _, _, tier = evaluator.evaluate_with_tier(model_answer, model_answer, "Vector vs list?", use_llm=True)
+    assert tier == 'local'
+    _, _, tier = evaluator.evaluate_with_tier("A vector is an array in contiguous memory.", model_answer, "Vector vs list?", use_llm=True)
+    assert tier == 'llm'
+    _, _, tier = evaluator.evaluate_with_tier("anything", model_answer)
+    assert tier == 'keyword'
+
+    assert backend.calls == 1
+    assert evaluator.tier_stats()['local']['count'] == 1
+
+def test_open_circuit_falls_back_without_waiting_for_the_llm():
+    """Test that during an outage answers get their keyword score at once instead of after a timeout."""
+    import time
+    from backend.llm_client import LLMClient, FakeBackend, CircuitBreaker
+    backend = FakeBackend(latency=0.5, failure_rate=1.0)
+    evaluator = Evaluator(llm_client=LLMClient(backend, breaker=CircuitBreaker(min_calls=2)), escalation_band=None)
+    for _ in range(2): evaluator.evaluate_with_tier("an answer", "a model answer", "question", use_llm=True)
+
+    started = time.monotonic()
+    _, _, tier = evaluator.evaluate_with_tier("an answer", "a model answer", "question", use_llm=True)
+    assert tier == 'fallback' and time.monotonic() - started < 0.1
+    assert backend.calls == 2
+
+def test_evaluate_stream_sends_feedback_then_score():
+    """Test that streamed feedback arrives in chunks, hides the score line and ends with the score."""
+    from backend.llm_client import LLMClient, FakeBackend
+    backend = FakeBackend(responder=lambda prompt, json_mode: "Good structure.\nMention ACID.\nSCORE: 64")
+    evaluator = Evaluator(llm_client=LLMClient(backend), escalation_band=None)
+
+    events = list(evaluator.evaluate_stream("user answer", "model answer", "question"))
+    feedback = "".join(payload for kind, payload in events if kind == 'feedback')
+
+    assert len(events) > 2
+    assert "SCORE" not in feedback
+    assert events[-1] == ('result', {"feedback": "Good structure.\nMention ACID.", "score": 64, "tier": 'llm'})
+
+@pytest.mark.parametrize("chunks", [
+    ['Good answer.\n', 'SCORE: 90', '\n'],
+    ['Good answer.\nSCORE: 90\n', '\n'],
+    ['Good answer.\n', 'SCORE: 90\n\n', 'Thanks.'],
+])
+def test_evaluate_stream_never_streams_a_complete_score_line(chunks):
+    """Test that a score line followed by a newline or blank line is held back and still read."""
+    from backend.llm_client import LLMClient, FakeBackend
+    class ChunkedBackend(FakeBackend):
+        def stream(self, prompt):
+            yield from chunks
+    evaluator = Evaluator(llm_client=LLMClient(ChunkedBackend()), escalation_band=None)
+
+    events = list(evaluator.evaluate_stream("user answer", "model answer", "question"))
+
+    assert not any("SCORE" in payload for kind, payload in events if kind == 'feedback')
+    assert events[-1][1]["score"] == 90 and events[-1][1]["tier"] == 'llm'
+
+def test_evaluate_batch_packs_answers_and_isolates_failures():
+    """Test that a batch is graded with packed prompts and bad items or entries don't fail the batch."""
+    import json
+    from backend.llm_client import LLMClient, FakeBackend
+    # The model only grades answer 1 of each pack; the others fall back to keyword scores.
+    backend = FakeBackend(responder=lambda prompt, json_mode: json.dumps({"evaluations": [{"id": 1, "score": 90, "feedback": "Great."}, {"id": "x"}]}))
+    evaluator = Evaluator(llm_client=LLMClient(backend), escalation_band=None)
+    items = [{"question": f"Q{i}", "answer": "some answer", "model_answer": "the model answer"} for i in range(5)]
+    items.insert(2, {"answer": "no model answer"})
+
+    results = dict(evaluator.evaluate_batch(items, pack_size=2))
+
+    assert sorted(results) == list(range(6))
+    assert "error" in results[2]
+    assert [results[i]["tier"] for i in (0, 1, 3, 4, 5)] == ['llm', 'fallback', 'llm', 'fallback', 'llm']
+    assert results[0]["score"] == 90
+    assert backend.calls == 3
+
+def test_evaluate_batch_with_punctuation_only_answers_at_the_ends(evaluator):
+    """Test that "?" answers at either end of a batch are graded like any other answer."""
+    model_answer = "A vector is a dynamic array in contiguous memory."
+    items = [{"answer": answer, "model_answer": model_answer} for answer in ("?", "a vector is an array", "?")]
+    items.append({"answer": ["not", "a", "string"], "model_answer": model_answer})
+
+    results = dict(evaluator.evaluate_batch(items, use_llm=False))
+
+    assert [results[i]["score"] for i in range(3)] == [0, evaluator.evaluate("a vector is an array", model_answer)[1], 0]
+    assert "error" in results[3]
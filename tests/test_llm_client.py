@@ -0,0 +1,140 @@
+import time
+import asyncio
+import threading
+import pytest
+from backend.llm_client import LLMClient, FakeBackend, CircuitBreaker, LLMError, LLMTimeoutError, LLMUnavailableError
+
+class CountingBackend(FakeBackend):
+    """A FakeBackend that records the peak number of concurrent calls."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+        self._count_lock = threading.Lock()
+
+    def generate(self, prompt, json_mode=False):
+        with self._count_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return super().generate(prompt, json_mode)
+        finally:
+            with self._count_lock:
+                self.active -= 1
+
+    async def agenerate(self, prompt, json_mode=False):
+        with self._count_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return await super().agenerate(prompt, json_mode)
+        finally:
+            with self._count_lock:
+                self.active -= 1
+
+def test_generate_json_parses_fenced_output():
+    """Test that JSON replies wrapped in markdown fences are still parsed."""
+    client = LLMClient(FakeBackend(responder=lambda prompt, json_mode: '```json\n{"score": 90}\n```'))
+    assert client.generate_json("Grade this") == {"score": 90}
+
+def test_concurrency_is_bounded():
+    """Test that no more than max_concurrency backend calls run at the same time."""
+    backend = CountingBackend(latency=0.05)
+    client = LLMClient(backend, max_concurrency=2)
+    threads = [threading.Thread(target=client.generate, args=("hello",)) for _ in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert backend.calls == 6
+    assert backend.peak <= 2
+
+def test_sync_and_async_calls_share_one_bound():
+    """Test that blocking and async callers together never exceed max_concurrency."""
+    backend = CountingBackend(latency=0.05)
+    client = LLMClient(backend, max_concurrency=2)
+    threads = [threading.Thread(target=client.generate, args=("hello",)) for _ in range(4)]
+    for t in threads: t.start()
+
+    async def run():
+        return await asyncio.gather(*(client.agenerate("hi") for _ in range(4)))
+    assert len(asyncio.run(run())) == 4
+    for t in threads: t.join()
+
+    assert backend.calls == 8
+    assert backend.peak <= 2
+
+def test_generate_times_out():
+    """Test that a slow backend raises LLMTimeoutError instead of blocking the caller."""
+    client = LLMClient(FakeBackend(latency=0.5), timeout=0.05)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        client.generate("slow")
+    assert time.monotonic() - start < 0.4
+
+def test_async_calls_run_concurrently():
+    """Test that the async entry point overlaps calls instead of serializing them."""
+    client = LLMClient(FakeBackend(latency=0.1), max_concurrency=5)
+
+    async def run():
+        return await asyncio.gather(*(client.agenerate("hi") for _ in range(5)))
+
+    start = time.monotonic()
+    replies = asyncio.run(run())
+    assert len(replies) == 5
+    assert time.monotonic() - start < 0.35
+
+def test_lognormal_latency_has_the_requested_median_and_a_tail():
+    """Test that the fake backend's log-normal delays center on `latency` with a long upper tail."""
+    backend = FakeBackend(latency=0.2, jitter=0.5, seed=1, distribution='lognormal')
+    delays = sorted(backend._next_delay() for _ in range(2000))
+    assert 0.18 < delays[1000] < 0.22
+    assert delays[1980] > 2 * delays[1000]
+
+def test_breaker_opens_on_failures_and_recovers_through_a_probe():
+    """Test that an open breaker rejects calls without touching the backend until a probe succeeds."""
+    now = [0.0]
+    backend = FakeBackend(failure_rate=1.0)
+    client = LLMClient(backend, breaker=CircuitBreaker(min_calls=3, open_seconds=10, clock=lambda: now[0]))
+    for _ in range(3):
+        with pytest.raises(LLMError): client.generate("Grade this")
+    with pytest.raises(LLMUnavailableError): client.generate("Grade this")
+    assert backend.calls == 3 and client.breaker.state == 'open'
+
+    now[0] = 11.0
+    backend.failure_rate = 0.0
+    assert client.generate("Grade this")  # the half-open probe
+    assert client.breaker.state == 'closed' and backend.calls == 4
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(min_calls=2, slow_call_seconds=0.5)
+    breaker.record(True, 0.9)
+    breaker.record(True, 0.9)
+    assert breaker.state == 'open' and not breaker.allow()
+
+def test_short_caller_deadlines_do_not_open_the_breaker():
+    """Test that timeouts under a caller's tight deadline are not counted against the provider."""
+    client = LLMClient(FakeBackend(latency=0.2), breaker=CircuitBreaker(min_calls=2, slow_call_seconds=0.1))
+    for _ in range(3):
+        with pytest.raises(LLMTimeoutError): client.generate("Grade this", timeout=0.05)
+    assert client.breaker.state == 'closed'
+
+    for _ in range(2):
+        with pytest.raises(LLMTimeoutError): client.generate("Grade this", timeout=0.15)
+    assert client.breaker.state == 'open'
+
+def test_slow_call_is_hedged_after_the_p95():
+    """Test that a call running past the recent p95 gets a duplicate, and the faster reply wins."""
+    class OneSlowCall(FakeBackend):
+        def generate(self, prompt, json_mode=False):
+            with self._lock:
+                self.calls += 1
+                call = self.calls
+            time.sleep(2.0 if call == 21 else 0.01)
+            return f"reply {call}"
+    client = LLMClient(OneSlowCall(), hedge=True)
+    for _ in range(20): client.generate("Warm up")
+
+    started = time.monotonic()
+    assert client.generate("Grade this") == "reply 22"
+    assert time.monotonic() - started < 1.0
+    assert client.stats() == {"hedged": 1, "hedge_wins": 1}
@@ -0,0 +1,57 @@
+import json
+import time
+from backend.metrics import Histogram, Registry, TracingMiddleware, REQUEST_SECONDS, span
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    """Test that bucket counts are cumulative and label values are escaped."""
+    histogram = Histogram('test_seconds', 'Test.', ('span',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0): histogram.observe(value, 'say "hi"')
+    lines = histogram.render()
+    assert 'test_seconds_bucket{span="say \\"hi\\"",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{span="say \\"hi\\"",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{span="say \\"hi\\"",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{span="say \\"hi\\""} 4' in lines
+
+def test_collectors_are_rendered_and_failures_skipped():
+    registry = Registry()
+    registry.register_collector(lambda: [("jobs_total", "counter", "Jobs.", [({"status": "done"}, 3)])])
+    registry.register_collector(lambda: 1 / 0)
+    assert 'jobs_total{status="done"} 3' in registry.render()
+
+def test_middleware_times_streamed_bodies_and_logs_slow_requests(capsys):
+    """Test that spans inside the body count toward the request and show up in Server-Timing."""
+    def wsgi_app(environ, start_response):
+        with span('lookup'): pass
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        def body():
+            with span('generate'): time.sleep(0.02)
+            yield b'done'
+        return body()
+    headers = {}
+    middleware = TracingMiddleware(wsgi_app, slow_ms=10)
+    body = middleware({'PATH_INFO': '/test-stream', 'REQUEST_METHOD': 'GET'}, lambda status, h, exc_info=None: headers.update(h))
+    assert b''.join(body) == b'done'
+
+    assert headers['Server-Timing'].startswith('lookup;dur=')
+    slow = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert slow["slow_request"] == '/test-stream' and slow["ms"] >= 20 and set(slow["spans_ms"]) == {'lookup', 'generate'}
+    assert any(line.startswith('mockview_request_duration_seconds_count{endpoint="/test-stream",method="GET",status="200"} 1') for line in REQUEST_SECONDS.render())
+
+def test_a_body_closed_without_being_iterated_releases_the_profiler():
+    """Test that closing an unread body (a client that went away) finishes the request and frees the profiler for the next one."""
+    closed = []
+    class Body:
+        def __iter__(self): yield b'never read'
+        def close(self): closed.append(True)
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [])
+        return Body()
+    middleware = TracingMiddleware(wsgi_app, profile_rate=1.0)
+    environ = {'PATH_INFO': '/test-abandoned', 'REQUEST_METHOD': 'GET'}
+    middleware(environ, lambda *args: None).close()
+
+    assert closed == [True]
+    assert any(line.startswith('mockview_request_duration_seconds_count{endpoint="/test-abandoned",method="GET",status="200"} 1') for line in REQUEST_SECONDS.render())
+    body = middleware(environ, lambda *args: None)
+    assert body.profiler is not None
+    body.close()
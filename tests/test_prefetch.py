@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import wait
+from backend.prefetch import Prefetcher, WarmPool
+
+def test_prefetched_result_is_handed_over_once_for_the_same_key():
+    """Test that take() returns the background result only for a matching key, and only once."""
+    prefetcher = Prefetcher(max_workers=1)
+    prefetcher.submit('s1', 'question', ('dsa', 3), lambda: 'next question')
+    assert prefetcher.take('s1', 'question', ('dsa', 3), timeout=5) == 'next question'
+    assert prefetcher.take('s1', 'question', ('dsa', 3), timeout=5) is None
+
+    prefetcher.submit('s1', 'question', ('dsa', 3), lambda: 'stale question')
+    assert prefetcher.take('s1', 'question', ('dsa', 4), timeout=5) is None
+    assert prefetcher.stats()["stale"] == 1
+
+def test_resubmitting_the_same_key_reuses_the_running_work():
+    """Test that a slot already holding a key is not recomputed, and failures read as a miss."""
+    release, calls = threading.Event(), []
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 'hint'
+    prefetcher = Prefetcher(max_workers=2)
+    first = prefetcher.submit('s1', 'hint', 'q', slow)
+    assert prefetcher.submit('s1', 'hint', 'q', slow) is first
+    release.set()
+    assert prefetcher.take('s1', 'hint', 'q', timeout=5) == 'hint' and len(calls) == 1
+
+    prefetcher.submit('s1', 'hint', 'q', lambda: 1 / 0)
+    assert prefetcher.take('s1', 'hint', 'q', timeout=5) is None
+
+def test_old_sessions_are_evicted():
+    prefetcher = Prefetcher(max_workers=1, max_sessions=2)
+    for sid in ('a', 'b', 'c'): prefetcher.submit(sid, 'question', 1, lambda: sid)
+    assert prefetcher.take('a', 'question', 1) is None
+    assert prefetcher.take('c', 'question', 1, timeout=5) == 'c'
+
+def test_warm_pool_never_blocks_and_refills_in_the_background():
+    """Test that a cold pool returns None at once, then serves items generated in the background."""
+    counter = iter(range(100))
+    pool = WarmPool(lambda topic, persona: f"{topic}-{persona}-{next(counter)}", size=2)
+    assert pool.take('dsa', 'Strict') is None
+    assert pool.refill('dsa', 'Strict') == []  # already being filled by take()
+    pool = WarmPool(pool.generate, size=2)
+    wait(pool.refill('dsa', 'Strict'), timeout=5)
+    assert pool.stats() == {"ready": 2, "pending": 0}
+
+    taken = {pool.take('dsa', 'Strict'), pool.take('dsa', 'Strict')}
+    assert len(taken) == 2 and all(item.startswith('dsa-Strict-') for item in taken)
+    assert pool.take('os', 'Strict') is None  # pools are per key
@@ -0,0 +1,84 @@
+import time
+import random
+import threading
+from backend.question_bank import Bitset, QuestionBank
+from backend.session_store import MemorySessionStore
+from backend.progress_store import ProgressStore, PROGRESS_TTL, create_progress_store_from_env, encode_runs, decode_runs
+
+def make_bank(ids_by_topic):
+    bank = QuestionBank()
+    for topic, ids in ids_by_topic.items():
+        bank.add_topic(topic, [{"id": qid, "question": f"{qid}?", "answer": "...", "tags": []} for qid in ids])
+    return bank
+
+def test_run_length_encoding_round_trips_and_stays_small():
+    """Test that bitmaps survive encoding and a long answered stretch costs a few bytes."""
+    rng = random.Random(0)
+    for positions in ([], [0], [7, 8, 9, 200], rng.sample(range(5000), 700)):
+        bits = Bitset()
+        for position in positions: bits.add(position)
+        assert sorted(decode_runs(encode_runs(bits))) == sorted(positions)
+
+    contiguous = Bitset()
+    for position in range(3, 20003): contiguous.add(position)
+    assert len(encode_runs(contiguous)) <= 4
+
+def test_answers_and_merged_history_are_remembered_per_user_and_topic():
+    bank = make_bank({"dsa": [f"dsa-{i}" for i in range(10)], "os": [f"os-{i}" for i in range(5)]})
+    progress = ProgressStore(MemorySessionStore())
+    assert progress.mark_question("alice", "dsa-3", bank) == 1
+    assert progress.mark_question("alice", "dsa-3", bank) == 0
+    assert progress.merge("alice", ["dsa-1", "os-4", "dynamic-abc", "unknown", None], bank) == 2
+
+    assert sorted(progress.answered("alice", "dsa", bank)) == [1, 3]
+    assert sorted(progress.answered("alice", "os", bank)) == [4]
+    assert len(progress.answered("bob", "dsa", bank)) == 0
+
+def test_progress_follows_questions_when_a_topic_file_changes():
+    """Test that bitmaps saved against an older topic version are remapped by id."""
+    store, versions = MemorySessionStore(), MemorySessionStore()
+    old_bank = make_bank({"dsa": ["a", "b", "c", "d"]})
+    ProgressStore(store, versions).merge("alice", ["b", "d"], old_bank)
+
+    new_bank = make_bank({"dsa": ["new", "d", "c", "a"]})  # reordered, "b" removed
+    progress = ProgressStore(store, versions)
+    assert sorted(progress.answered("alice", "dsa", new_bank)) == [1]
+    progress.mark_question("alice", "new", new_bank)
+    assert sorted(progress.answered("alice", "dsa", new_bank)) == [0, 1]
+
+def test_versions_survive_eviction_of_progress_records():
+    """Test that a full LRU of progress records never evicts the topic versions they refer to."""
+    progress = ProgressStore(MemorySessionStore(max_sessions=2))
+    old_bank = make_bank({"dsa": ["a", "b", "c"]})
+    for user in ("alice", "bob"): progress.mark_question(user, "b", old_bank)
+
+    new_bank = make_bank({"dsa": ["c", "b", "a"]})
+    assert sorted(progress.answered("bob", "dsa", new_bank)) == [1]
+
+def test_versions_outlive_the_progress_ttl_of_active_users(tmp_path, monkeypatch):
+    """Test that a version written once is still there for a record kept alive past PROGRESS_TTL."""
+    monkeypatch.setenv("MOCKVIEW_SESSION_BACKEND", "sqlite")
+    monkeypatch.setenv("MOCKVIEW_PROGRESS_URL", str(tmp_path / 'progress.sqlite3'))
+    old_bank, started = make_bank({"dsa": ["a", "b", "c"]}), time.time()
+    create_progress_store_from_env(None).mark_question("alice", "a", old_bank)
+    monkeypatch.setattr(time, 'time', lambda: started + PROGRESS_TTL * 0.9)
+    create_progress_store_from_env(None).mark_question("alice", "b", old_bank)
+
+    monkeypatch.setattr(time, 'time', lambda: started + PROGRESS_TTL * 1.1)
+    new_bank = make_bank({"dsa": ["c", "b", "a"]})
+    assert sorted(create_progress_store_from_env(None).answered("alice", "dsa", new_bank)) == [1, 2]
+
+def test_concurrent_answers_to_one_topic_are_all_kept():
+    """Test that marks racing on one (user, topic) record do not overwrite each other."""
+    class SlowStore(MemorySessionStore):
+        def get(self, sid):
+            time.sleep(0.001)  # widens the window between reading a record and writing it back
+            return super().get(sid)
+    bank = make_bank({"dsa": [f"dsa-{i}" for i in range(200)]})
+    progress = ProgressStore(SlowStore())
+    def answer(ids):
+        for question_id in ids: progress.mark_question("alice", question_id, bank)
+    threads = [threading.Thread(target=answer, args=([f"dsa-{i}" for i in range(start, 200, 4)],)) for start in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(progress.answered("alice", "dsa", bank)) == 200
@@ -0,0 +1,51 @@
+import random
+import pytest
+from backend.question_bank import QuestionBank, Bitset
+
+MOCK_QUESTIONS = [
+    {"id": f"dsa-{i:03d}", "question": f"Question {i}?", "answer": "...", "difficulty": "easy", "tags": ["Arrays"]}
+    for i in range(50)
+]
+
+@pytest.fixture
+def bank():
+    """Returns a QuestionBank holding a single 50-question topic."""
+    bank = QuestionBank()
+    bank.add_topic('dsa', MOCK_QUESTIONS)
+    return bank
+
+def test_lookup_by_id_and_position(bank):
+    """Test that questions are indexed by id and by position in their topic."""
+    assert bank.get('dsa-007')['question'] == "Question 7?"
+    assert bank.position_of('dsa', 'dsa-007') == 7
+    assert bank.topic_ids('dsa')[0] == 'dsa-000'
+    assert bank.get('missing') is None
+
+def test_bitset_round_trip():
+    """Test that a Bitset survives serialization and supports union."""
+    bits = Bitset()
+    for i in (0, 9, 130):
+        bits.add(i)
+    restored = Bitset.from_bytes(bits.to_bytes())
+    assert list(restored) == [0, 9, 130]
+    assert len(restored.union(Bitset.from_bytes(b'\x02'))) == 4
+
+def test_sample_skips_excluded_ids(bank):
+    """Test that sampling never returns an excluded question, even when almost all are excluded."""
+    asked = [q['id'] for q in MOCK_QUESTIONS if q['id'] != 'dsa-042']
+    for seed in range(20):
+        assert bank.sample('dsa', asked, rng=random.Random(seed))['id'] == 'dsa-042'
+    assert bank.sample('dsa', bank.exclusion_set('dsa', asked))['id'] == 'dsa-042'
+
+def test_sample_exhausted_or_unknown_topic(bank):
+    """Test that sampling returns None when nothing is left or the topic is unknown."""
+    assert bank.sample('dsa', [q['id'] for q in MOCK_QUESTIONS]) is None
+    assert bank.sample('python') is None
+
+def test_questions_are_compact_records(bank):
+    """Test that bank questions behave like the JSON records while sharing interned tags."""
+    first, second = bank.get('dsa-001'), bank.get('dsa-002')
+    assert first['answer'] == "..." and first.get('tags') == ("Arrays",) and 'question' in first
+    assert first.tags is second.tags
+    assert first.get('missing', 'default') == 'default'
+    assert dict(first)['id'] == 'dsa-001'
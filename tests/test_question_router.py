@@ -2,6 +2,7 @@
 import pytest
 from unittest.mock import patch
 from backend.question_router import QuestionRouter
+from backend.question_loader import validate_questions
 
 # Mock data simulating the JSON files
 MOCK_TOPICS = {
@@ -77,4 +78,97 @@ def test_get_question_invalid_topic(mock_load_json):
     router = QuestionRouter('../data/questions')
     question = router.get_question('python') # This topic is not in our mock data
     
-    assert question is None
\ No newline at end of file
+    assert question is None
+
+def test_find_question_by_tag_uses_normalized_index(mock_load_json):
+    """Test tag lookup with case differences, synonyms and fuzzy spellings."""
+    router = QuestionRouter('../data/questions')
+    topics_before = list(router.topics)
+
+    assert router.find_question_by_tag('arrays')['id'] == "dsa-001"
+    assert router.find_question_by_tag('C++')['id'] == "cpp-001"  # matched through the 'cpp' topic
+    assert router.find_question_by_tag('Tree')['id'] == "dsa-002"  # fuzzy match on 'trees'
+    assert router.find_question_by_tag('STL', excluded_ids=["cpp-001"]) is None
+    assert router.topics == topics_before  # lookups no longer shuffle shared state
+
+def test_find_questions_by_tags_returns_distinct_questions(mock_load_json):
+    """Test that a batch lookup returns at most one distinct question per skill."""
+    router = QuestionRouter('../data/questions')
+    questions = router.find_questions_by_tags(['Arrays', 'Trees', 'Arrays', 'Kubernetes'])
+
+    assert sorted(q['id'] for q in questions) == ["dsa-001", "dsa-002"]
+
+def test_startup_load_validates_and_reports(mock_load_json):
+    """Test that eager loading skips invalid or duplicate records and reports per-topic stats."""
+    bad_cpp = MOCK_CPP_QUESTIONS + [{"id": "dsa-001", "question": "Dup?", "answer": "..."}, {"id": "cpp-002", "question": ""}]
+    with patch('backend.question_router.load_json', side_effect=lambda path: bad_cpp if 'cpp.json' in path else mock_load_json.side_effect(path)):
+        router = QuestionRouter('../data/questions')
+
+    report = router.load_report
+    assert report["topics"]["dsa"]["questions"] == 2
+    assert report["topics"]["cpp"] == {**report["topics"]["cpp"], "questions": 1, "skipped": 2}
+    assert len(report["errors"]) == 2
+    assert router.bank.get('dsa-001')['question'] == "What is an array?"
+
+def test_records_with_a_non_string_difficulty_are_skipped():
+    """Test that a record like {"difficulty": 3} is reported instead of aborting the load."""
+    records = MOCK_DSA_QUESTIONS + [{"id": "dsa-003", "question": "What is a heap?", "answer": "...", "difficulty": 3}]
+    questions, errors = validate_questions('dsa', records, {})
+    assert [q.id for q in questions] == ["dsa-001", "dsa-002"]
+    assert errors == ["dsa[2] (dsa-003): difficulty must be a string"]
+
+def test_requests_never_read_files(mock_load_json):
+    """Test that lookups, including unknown topics, are answered from the loaded snapshot."""
+    router = QuestionRouter('../data/questions')
+    calls = mock_load_json.call_count
+    assert router.get_question('python') is None
+    assert router.get_question('dsa') is not None
+    assert router.available_topics() == ["dsa", "cpp"]
+    assert mock_load_json.call_count == calls
+
+def test_router_serves_topics_from_a_compiled_bank(mock_load_json, tmp_path):
+    """Test that compiled topics are memory-mapped instead of parsed from JSON."""
+    from backend.bank_format import compile_bank
+    path = str(tmp_path / "questions.bank")
+    compile_bank({"dsa": MOCK_DSA_QUESTIONS, "cpp": MOCK_CPP_QUESTIONS}, path)
+    mock_load_json.reset_mock()
+
+    router = QuestionRouter('../data/questions', compiled_path=path)
+
+    assert mock_load_json.call_count == 1  # only topics.json
+    assert router.load_report["topics"]["dsa"]["source"] == "compiled"
+    assert router.get_question('dsa', ["dsa-001"])['id'] == "dsa-002"
+    assert router.find_question_by_tag('STL')['id'] == "cpp-001"
+
+def test_reload_swaps_in_a_new_snapshot(tmp_path):
+    """Test that a reload picks up appended questions and new topic files while old snapshots stay intact."""
+    import json
+    data = tmp_path / "questions"
+    data.mkdir()
+    (data / "dsa.json").write_text(json.dumps(MOCK_DSA_QUESTIONS[:1]))
+    router = QuestionRouter(str(data))
+    before = router.snapshot
+
+    (data / "dsa.json").write_text(json.dumps(MOCK_DSA_QUESTIONS))
+    (data / "rust.json").write_text(json.dumps([{"id": "rust-001", "question": "What is ownership?", "answer": "...", "tags": ["Memory"]}]))
+    reloaded = []
+    router.on_reload(reloaded.append)
+    router.reload()
+
+    assert router.bank.get("dsa-002") is not None and before.bank.get("dsa-002") is None
+    assert router.bank.position_of("dsa", "dsa-001") == before.bank.position_of("dsa", "dsa-001") == 0
+    assert "rust" in router.available_topics()
+    assert router.find_question_by_tag("memory")["id"] == "rust-001"
+    assert reloaded == [router.snapshot]
+
+def test_reload_keeps_a_topic_caught_mid_write(tmp_path):
+    """Test that a topic file that fails to parse keeps serving its previous questions."""
+    import json
+    data = tmp_path / "questions"
+    data.mkdir()
+    (data / "dsa.json").write_text(json.dumps(MOCK_DSA_QUESTIONS))
+    router = QuestionRouter(str(data))
+
+    (data / "dsa.json").write_text(json.dumps(MOCK_DSA_QUESTIONS)[:40])
+    router.reload()
+    assert router.get_question("dsa") is not None
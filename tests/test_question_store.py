@@ -0,0 +1,57 @@
+import json
+from backend.question_store import QuestionStore
+from backend.question_router import QuestionRouter
+
+EXISTING = [{"id": "cpp-001", "question": "What is the difference between a vector and a list in the C++ STL?", "answer": "Contiguous vs linked.", "difficulty": "medium", "tags": ["STL"]}]
+
+def _write_topic(tmp_path, records=EXISTING):
+    (tmp_path / "cpp.json").write_text(json.dumps(records), encoding='utf-8')
+
+def test_appended_questions_are_loaded_with_the_topic_and_compacted_into_it(tmp_path):
+    """Test that appends go to the overlay, which the router reads, until compaction folds it into the JSON file."""
+    _write_topic(tmp_path)
+    store = QuestionStore(str(tmp_path))
+    added, rejected = store.append("cpp", [{"id": "cpp-100", "question": "Explain RAII.", "answer": "Resources are tied to object lifetime.", "difficulty": "medium", "tags": ["Memory Management"]}])
+    assert [q['id'] for q in added] == ["cpp-100"] and rejected == []
+    assert json.loads((tmp_path / "cpp.json").read_text(encoding='utf-8')) == EXISTING
+    assert QuestionRouter(str(tmp_path)).bank.get("cpp-100")['question'] == "Explain RAII."
+
+    assert store.compact("cpp") == 1
+    assert not (tmp_path / "cpp.jsonl").exists()
+    assert [q['id'] for q in json.loads((tmp_path / "cpp.json").read_text(encoding='utf-8'))] == ["cpp-001", "cpp-100"]
+
+def test_colliding_ids_are_renamed_and_near_duplicates_rejected(tmp_path):
+    """Test that an id already in the bank gets the next free number and a reworded question is skipped."""
+    _write_topic(tmp_path)
+    store = QuestionStore(str(tmp_path))
+    added, rejected = store.append("cpp", [
+        {"id": "cpp-001", "question": "Explain smart pointers in C++.", "answer": "They own heap objects."},
+        {"id": "cpp-002", "question": "What's the difference between vector and list in C++ STL?", "answer": "Same as before."},
+        {"id": "cpp-003", "question": "Explain smart pointers in C++!", "answer": "Repeated within the batch."},
+    ])
+    assert [(q['id'], q['question']) for q in added] == [("cpp-002", "Explain smart pointers in C++.")]
+    assert len(rejected) == 2 and "near-duplicate of cpp-001" in rejected[0] and "near-duplicate of cpp-002" in rejected[1]
+    assert "cpp-002" in QuestionStore(str(tmp_path))
+
+def test_loader_ignores_a_torn_append_and_copies_left_by_an_interrupted_compaction(tmp_path):
+    """Test that an unterminated overlay line and overlay records already in the JSON file are skipped."""
+    _write_topic(tmp_path)
+    overlay = json.dumps(EXISTING[0]) + "\n" + json.dumps({"id": "cpp-200", "question": "What is a vtable?", "answer": "A table of virtual function pointers."}) + "\n" + '{"id": "cpp-201", "quest'
+    (tmp_path / "cpp.jsonl").write_text(overlay, encoding='utf-8')
+    router = QuestionRouter(str(tmp_path))
+    assert sorted(q['id'] for q in router.questions["cpp"]) == ["cpp-001", "cpp-200"]
+    assert router.load_report["errors"] == []
+
+def test_only_written_topics_are_indexed_and_questions_without_content_words_never_match(tmp_path):
+    """Test that opening a store computes no signatures, and that phrasing-only questions are neither matched nor duplicates."""
+    _write_topic(tmp_path)
+    (tmp_path / "os.json").write_text(json.dumps([{"id": "os-001", "question": "What is a process?", "answer": "A running program."}]), encoding='utf-8')
+    store = QuestionStore(str(tmp_path))
+    assert len(store.index) == 0 and "os-001" in store
+
+    added, rejected = store.append("cpp", [
+        {"id": "cpp-010", "question": "What is it?", "answer": "Something."},
+        {"id": "cpp-011", "question": "How is it used?", "answer": "Somehow."},
+    ])
+    assert [q['id'] for q in added] == ["cpp-010", "cpp-011"] and rejected == []
+    assert len(store.index) == 1  # cpp-001; the two new questions have no content words
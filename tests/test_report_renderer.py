@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+from backend.report_renderer import ReportQueue, build_report_html
+
+HISTORY = [{"question": "What is <RAII>?", "score": 80, "feedback": "Good.", "modelAnswer": "Scope-bound resources."}]
+SUMMARY = {"count": 1, "average_score": 80}
+
+class FakeRenderer:
+    """Records batch sizes and returns a fake PDF per report."""
+    def __init__(self):
+        self.batches = []
+    def __call__(self, reports):
+        self.batches.append(len(reports))
+        return [b'%PDF ' + build_report_html(*report).encode() for report in reports]
+
+def make_queue(renderer, **kwargs):
+    return ReportQueue(renderer=renderer, executor=ThreadPoolExecutor(max_workers=1), **kwargs)
+
+def test_report_html_escapes_user_text():
+    """Test that history text cannot inject markup into the report."""
+    html = build_report_html(HISTORY, SUMMARY, "2024-01-01 00:00:00")
+    assert "&lt;RAII&gt;" in html and "<RAII>" not in html
+
+def test_identical_reports_share_one_job():
+    """Test that resubmitting the same history is deduplicated by content hash."""
+    renderer = FakeRenderer()
+    queue = make_queue(renderer)
+    first = queue.submit(HISTORY, SUMMARY)
+    second = queue.submit(HISTORY, SUMMARY)
+
+    job = queue.wait(first, timeout=5)
+    assert first == second
+    assert job.status == 'done' and job.pdf.startswith(b'%PDF')
+    assert renderer.batches == [1]
+
+def test_bulk_reports_are_rendered_in_batches():
+    """Test that bulk submissions are split into worker batches of batch_size."""
+    renderer = FakeRenderer()
+    queue = make_queue(renderer, batch_size=2)
+    job_ids = queue.submit_many([(HISTORY, {"count": 1, "average_score": n}) for n in range(5)])
+
+    assert all(queue.wait(job_id, timeout=5).status == 'done' for job_id in job_ids)
+    assert renderer.batches == [2, 2, 1]
+
+def test_failed_render_marks_job_failed_and_can_be_retried():
+    """Test that a renderer error fails the job and a resubmission renders it again."""
+    def broken(reports): raise RuntimeError("no fonts")
+    queue = make_queue(broken)
+    job_id = queue.submit(HISTORY, SUMMARY)
+    assert queue.wait(job_id, timeout=5).status == 'failed'
+
+    queue.renderer = FakeRenderer()
+    assert queue.wait(queue.submit(HISTORY, SUMMARY), timeout=5).status == 'done'
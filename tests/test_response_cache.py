@@ -0,0 +1,53 @@
+import time
+import pytest
+from backend.response_cache import ResponseCache
+from backend.evaluator import Evaluator
+from backend.llm_client import LLMClient, FakeBackend
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Returns a path for a throwaway SQLite cache file."""
+    return str(tmp_path / "responses.sqlite3")
+
+def test_memory_hit_and_miss_counters():
+    """Test that a memory-only cache counts hits and misses."""
+    cache = ResponseCache(path=None)
+    key = cache.key('hint', "What is a mutex?", 'Neutral')
+
+    assert cache.get(key) is None
+    cache.set(key, "Think about mutual exclusion.")
+    assert cache.get(key) == "Think about mutual exclusion."
+
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_disk_tier_survives_restart(cache_path):
+    """Test that values written by one cache instance are served by the next one."""
+    key = ResponseCache.key('explanation', "Q", "A", 'Strict')
+    ResponseCache(cache_path).set(key, "An analogy.")
+
+    restarted = ResponseCache(cache_path)
+    assert restarted.get(key) == "An analogy."
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_ttl_and_lru_eviction(cache_path):
+    """Test that expired entries miss and the LRU tier stays within its size."""
+    cache = ResponseCache(cache_path, max_memory_items=2, ttl=0.05)
+    for name in ("a", "b", "c"):
+        cache.set(cache.key('hint', name), name)
+    assert cache.stats()["memory_items"] == 2
+
+    time.sleep(0.1)
+    assert cache.get(cache.key('hint', "a")) is None
+
+def test_evaluator_caches_llm_results():
+    """Test that a repeated LLM evaluation is served from the cache."""
+    backend = FakeBackend()
+    evaluator = Evaluator(llm_client=LLMClient(backend), cache=ResponseCache(path=None), escalation_band=None)
+
+    first = evaluator.evaluate("an answer", "the model answer", "a question", use_llm=True)
+    second = evaluator.evaluate("an answer", "the model answer", "a question", use_llm=True)
+
+    assert first == second
+    assert backend.calls == 1
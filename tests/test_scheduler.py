@@ -0,0 +1,63 @@
+import random
+import pytest
+from backend.question_bank import QuestionBank, Bitset
+from backend.scheduler import AdaptiveScheduler, new_state, REVIEW_GAPS
+
+QUESTIONS = [
+    {"id": f"q-{i:03d}", "question": f"Question {i}?", "answer": "...", "difficulty": ("easy", "medium", "hard")[i % 3], "tags": [f"Tag{i % 10}"]}
+    for i in range(90)
+]
+
+@pytest.fixture
+def bank():
+    """Returns a bank with one topic of 30 questions per difficulty."""
+    bank = QuestionBank()
+    bank.add_topic('dsa', QUESTIONS)
+    return bank
+
+def ask(scheduler, bank, asked, state):
+    question, position, is_review = scheduler.next_question(bank, 'dsa', asked, state)
+    asked.add(position)
+    return question, is_review
+
+def test_difficulty_follows_running_score(bank):
+    """Test that strong answers raise the difficulty and weak ones lower it."""
+    scheduler, asked, state = AdaptiveScheduler(random.Random(0)), Bitset(), new_state()
+    assert ask(scheduler, bank, asked, state)[0].difficulty == 'medium'
+    scheduler.record_answer(state, 95)
+    assert ask(scheduler, bank, asked, state)[0].difficulty == 'hard'
+    for _ in range(3):
+        scheduler.record_answer(state, 10)
+    state['review'] = []  # weak answers would otherwise be reviewed first
+    assert ask(scheduler, bank, asked, state)[0].difficulty == 'easy'
+
+def test_recent_tags_are_avoided_and_nothing_repeats(bank):
+    """Test that consecutive picks prefer fresh tags and never repeat an asked question."""
+    scheduler, asked, state = AdaptiveScheduler(random.Random(1)), Bitset(), new_state()
+    seen = [ask(scheduler, bank, asked, state)[0] for _ in range(5)]
+    assert len({q.tags for q in seen}) == 5
+    for _ in range(85):
+        ask(scheduler, bank, asked, state)
+    assert len(asked) == 90
+    assert scheduler.next_question(bank, 'dsa', asked, state) is None
+
+def test_weak_answers_come_back_for_review(bank):
+    """Test that a weak answer is asked again after the review gap."""
+    scheduler, asked, state = AdaptiveScheduler(random.Random(2)), Bitset(), new_state()
+    weak, _ = ask(scheduler, bank, asked, state)
+    scheduler.record_answer(state, 20)
+    for _ in range(REVIEW_GAPS[0] - 1):
+        assert ask(scheduler, bank, asked, state)[0] is not weak
+        scheduler.record_answer(state, 60)
+    question, is_review = scheduler.next_question(bank, 'dsa', asked, state)[0::2]
+    assert question is weak and is_review
+
+def test_an_exhausted_difficulty_is_skipped_and_the_last_questions_are_found(bank):
+    """Test that once a difficulty is used up, picks move on and still find every remaining question."""
+    scheduler, asked, state = AdaptiveScheduler(random.Random(3)), Bitset(), new_state()
+    for position in bank.difficulty_positions('dsa')['medium']:
+        asked.add(position)
+    picked = [ask(scheduler, bank, asked, state)[0] for _ in range(60)]
+    assert {q.difficulty for q in picked} == {'easy', 'hard'}
+    assert len({q.id for q in picked}) == 60
+    assert scheduler.next_question(bank, 'dsa', asked, state) is None
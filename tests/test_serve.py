@@ -0,0 +1,57 @@
+import time
+import socket
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from backend.serve import PooledWSGIServer
+
+
+def test_pooled_server_runs_requests_in_parallel_up_to_its_thread_count():
+    active, peak, lock = [0], [0], threading.Lock()
+    def app(environ, start_response):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.2)
+        with lock: active[0] -= 1
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    server = PooledWSGIServer('127.0.0.1', 0, app, threads=2, timeout=5)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            bodies = list(pool.map(lambda _: urllib.request.urlopen(f"http://127.0.0.1:{server.port}/", timeout=5).read(), range(4)))
+    finally:
+        server.shutdown()
+    assert bodies == [b'ok'] * 4
+    assert peak[0] == 2
+
+
+def test_busy_worker_leaves_new_connections_to_its_siblings():
+    listener = socket.create_server(('127.0.0.1', 0))
+    port, release = listener.getsockname()[1], threading.Event()
+    def app_for(name):
+        def app(environ, start_response):
+            if name == 'busy': release.wait(5)
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [name.encode()]
+        return app
+
+    busy = PooledWSGIServer('127.0.0.1', port, app_for('busy'), threads=1, timeout=5, fd=listener.fileno())
+    threading.Thread(target=busy.serve_forever, daemon=True).start()
+    pool = ThreadPoolExecutor(max_workers=1)
+    first = pool.submit(lambda: urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read())
+    time.sleep(0.2)  # the busy worker's only thread now holds the first request
+
+    idle = PooledWSGIServer('127.0.0.1', port, app_for('idle'), threads=1, timeout=5, fd=listener.fileno())
+    threading.Thread(target=idle.serve_forever, daemon=True).start()
+    try:
+        bodies = [urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read() for _ in range(3)]
+        assert not first.done()
+    finally:
+        release.set()
+        assert first.result() == b'busy'
+        busy.shutdown(); idle.shutdown(); pool.shutdown()
+        listener.close()
+    assert bodies == [b'idle'] * 3
@@ -0,0 +1,81 @@
+import pytest
+import threading
+from flask import Flask, session
+from backend.session_store import CompactSessionInterface, MemorySessionStore, SQLiteSessionStore
+
+class CountingStore(MemorySessionStore):
+    """A MemorySessionStore that counts writes."""
+    writes = 0
+    def set(self, sid, data):
+        self.writes += 1
+        super().set(sid, data)
+
+@pytest.fixture
+def store():
+    return CountingStore()
+
+@pytest.fixture
+def client(store):
+    """Returns a test client for a tiny app using the compact session interface."""
+    app = Flask(__name__)
+    app.session_interface = CompactSessionInterface(store)
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value; session['asked'] = b'\x05'
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        return f"{session.get('value')}:{session.get('asked')!r}"
+
+    return app.test_client()
+
+def test_cookie_holds_only_the_session_id(client, store):
+    """Test that data round-trips through the store while the cookie carries just an id."""
+    client.get('/set/hello')
+    sid = client.get_cookie('session').value
+
+    assert "hello" not in sid
+    assert client.get('/get').get_data(as_text=True) == "hello:b'\\x05'"
+    assert store.get(sid) is not None
+
+def test_unmodified_sessions_are_not_rewritten(client, store):
+    """Test that read-only requests do not write the session back to the store."""
+    client.get('/set/hello')
+    for _ in range(3):
+        client.get('/get')
+    assert store.writes == 1
+
+def test_memory_store_evicts_least_recently_used():
+    """Test that the in-memory store keeps at most max_sessions entries."""
+    store = MemorySessionStore(max_sessions=2)
+    for sid in ("a", "b", "c"):
+        store.set(sid, b"{}")
+    assert store.get("a") is None and store.get("c") == b"{}"
+
+def test_sqlite_store_round_trip(tmp_path):
+    """Test that the SQLite store persists and deletes sessions."""
+    path = str(tmp_path / "sessions.sqlite3")
+    SQLiteSessionStore(path).set("abc", b'{"topic":"os"}')
+    store = SQLiteSessionStore(path)
+    assert store.get("abc") == b'{"topic":"os"}'
+    store.delete("abc")
+    assert store.get("abc") is None
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_updates_to_one_session_are_not_lost(backend, tmp_path):
+    """Test that updates racing on one session each apply on top of the others, across connections too."""
+    path = str(tmp_path / "sessions.sqlite3")
+    stores = [MemorySessionStore()] * 2 if backend == "memory" else [SQLiteSessionStore(path), SQLiteSessionStore(path)]
+    interfaces = [CompactSessionInterface(store) for store in stores]
+    stores[0].set("abc", interfaces[0].serializer.dumps({"count": 0}).encode('utf-8'))
+
+    def bump(interface):
+        for _ in range(50): interface.update("abc", lambda data: data.update(count=data["count"] + 1))
+    threads = [threading.Thread(target=bump, args=(interfaces[i % 2],)) for i in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert interfaces[1].update("abc", lambda data: None) == {"count": 200}
+    assert interfaces[0].update("gone", lambda data: None) is None
@@ -0,0 +1,21 @@
+from backend.skill_extractor import SkillExtractor
+
+TOPICS = {"cpp": ["STL", "Memory Management", "Pointers"], "dbms": ["SQL", "Transactions"], "os": ["Concurrency"]}
+TAGS = ["stl", "pointers", "sql", "cpp", "databases", "operating systems"]
+
+def test_skills_are_ranked_by_mentions_through_synonyms_and_plurals():
+    """Test that synonyms and singular forms count for the bank's skill, most mentioned first."""
+    extractor = SkillExtractor.from_bank(TAGS, TOPICS)
+    jd = "Senior engineer: modern C++, STL, raw pointer and smart pointers. PostgreSQL or MySQL, multithreading; SQL tuning."
+    assert extractor.rank(jd) == [("SQL", 3), ("cpp", 1), ("STL", 1), ("Pointers", 1), ("Memory Management", 1), ("Concurrency", 1)]
+    assert extractor.extract(jd, limit=2) == ["SQL", "cpp"]
+
+def test_matches_respect_word_breaks_and_prefer_the_longest_mention():
+    """Test that skills inside other words are ignored and overlapping mentions count once, for the longest."""
+    extractor = SkillExtractor({"sql": "SQL", "operating systems": "operating systems", "systems": "Systems"})
+    assert extractor.rank("NoSQL stores and mysqldump") == []
+    assert extractor.rank("Operating-systems internals, SQL") == [("operating systems", 1), ("SQL", 1)]
+
+def test_unknown_text_yields_no_skills():
+    """Test that a description with no known skills returns nothing, leaving the decision to the caller."""
+    assert SkillExtractor.from_bank(TAGS, TOPICS).extract("Great communication and a can-do attitude.") == []